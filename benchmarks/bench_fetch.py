@@ -0,0 +1,98 @@
+"""
+Benchmark of the fetch path against the local GitHub stand-in (benchmarks/github_server.py).
+
+Usage:
+    python benchmarks/bench_fetch.py [--issues N] [--items N] [--profile NAME ...]
+
+For every latency/failure profile, each fetch is timed with a new transport:
+- all: every open issue, with the paginated GraphQL query
+- by-number: the issues of a list of numbers, with aliased GraphQL queries
+- column: the issues of a project column
+- sync: the REST incremental sync of the issue store, then the same again,
+  when every page is answered 304 Not Modified
+
+No network is needed.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# The fetch functions read source/summary_information.conf and write to working/
+os.chdir(ROOT)
+
+from github_server import OWNER, PROFILES, PROJECT_NUMBER, REPO, GitHubStandIn, synthetic_data
+from scripts import fetch_issues, github_transport
+from scripts.github_transport import GitHubTransport, ResponseCache
+
+
+def run(stand_in, cache_directory, fetch):
+    """
+    run Times a fetch with a new transport pointed at the stand-in
+
+    :return: (seconds, number of results, transport)
+    """
+    transport = GitHubTransport("token", base_url=stand_in.url, cache=ResponseCache(cache_directory))
+    github_transport._transport = transport
+    start = time.perf_counter()
+    result = fetch()
+    return time.perf_counter() - start, len(result), transport
+
+
+def bench(profile_name, issues, items):
+    data = synthetic_data(issues, items)
+    numbers = [record['number'] for record in data['issues'] if 'pull_request' not in record][:items]
+
+    with tempfile.TemporaryDirectory() as tmp, GitHubStandIn(data, PROFILES[profile_name]()) as stand_in:
+        fetch_issues.PROJECT_CACHE = os.path.join(tmp, 'projects.json')
+        cache_directory = os.path.join(tmp, 'http')
+
+        def sync():
+            updated = fetch_issues.fetch_updated_issues(OWNER, REPO, '2000-01-01T00:00:00Z')
+            fetch_issues.fetch_open_issue_labels(OWNER, REPO)
+            return updated
+
+        fetches = [
+            ('all', lambda: fetch_issues.fetch_repository_issues(OWNER, REPO)),
+            ('by-number', lambda: fetch_issues.fetch_issues_by_number(OWNER, REPO, numbers)),
+            ('column', lambda: fetch_issues.get_issues_in_column(OWNER, REPO, PROJECT_NUMBER, 'Report')),
+            ('sync', sync),
+            ('sync (304)', sync),
+        ]
+
+        rows = []
+        for name, fetch in fetches:
+            injected = dict(stand_in.injected)
+            elapsed, results, transport = run(stand_in, cache_directory, fetch)
+            failures = sum(stand_in.injected.values()) - sum(injected.values())
+            rows.append((name, elapsed, results, transport.requests, transport.not_modified, failures,
+                         transport.retries, transport.waited))
+        return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the fetch path against a local GitHub stand-in.")
+    parser.add_argument('--issues', type=int, default=1000)
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--profile', choices=sorted(PROFILES), nargs='*', default=['fast', 'wan', 'flaky', 'rate-limited'])
+    args = parser.parse_args()
+
+    # The fetch functions print their progress, which would get in the way of the table
+    stdout = sys.stdout
+    print(f"{'profile':<14} {'fetch':<12} {'seconds':>8} {'results':>8} {'requests':>9} {'304':>5} {'failures':>9} "
+          f"{'retries':>8} {'waited':>7}")
+    for profile in args.profile:
+        with open(os.devnull, 'w') as devnull:
+            sys.stdout = devnull
+            try:
+                rows = bench(profile, args.issues, args.items)
+            finally:
+                sys.stdout = stdout
+        for name, elapsed, results, requests, not_modified, failures, retries, waited in rows:
+            print(f"{profile:<14} {name:<12} {elapsed:>8.3f} {results:>8} {requests:>9} {not_modified:>5} {failures:>9} "
+                  f"{retries:>8} {waited:>7.1f}")
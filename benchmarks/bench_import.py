@@ -0,0 +1,58 @@
+"""
+Benchmark of the start-up time of the report scripts.
+
+Usage:
+    python benchmarks/bench_import.py [--runs N]
+
+Every module is imported in a fresh interpreter, best of N runs, so that steps
+which don't talk to GitHub (linting, rendering) can be checked to start fast.
+Only the import itself is timed, not the interpreter start-up, and the heavy
+libraries that the import pulled in are listed.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MODULES = ['generate_report', 'scripts.fetch_issues', 'scripts.helpers', 'scripts.linter', 'scripts.convert',
+           'scripts.latex']
+HEAVY_MODULES = ['requests', 'dotenv', 'dateutil.parser', 'pygments.lexers', 'pygments.formatters']
+
+TIMER = """
+import sys, time
+start = time.perf_counter()
+{import_statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def time_import(module, runs):
+    """
+    time_import Imports a module in fresh interpreters
+
+    :return: (best seconds, heavy modules loaded)
+    """
+    code = TIMER.format(import_statement=f"import {module}", heavy=HEAVY_MODULES)
+    best, loaded = None, ''
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.split()
+        elapsed = float(output[0])
+        best = elapsed if best is None else min(best, elapsed)
+        loaded = output[1] if len(output) > 1 else ''
+    return best, loaded
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the report scripts.")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<22} {'ms':>7}  heavy imports")
+    for module in MODULES:
+        elapsed, loaded = time_import(module, args.runs)
+        print(f"{module:<22} {elapsed * 1000:>7.1f}  {loaded or '-'}")
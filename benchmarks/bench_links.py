@@ -0,0 +1,59 @@
+"""
+Benchmark of helpers.replace_internal_links on synthetic reports with a growing number of cross-references.
+
+Usage:
+    python benchmarks/bench_links.py [max findings]
+
+Every finding references 10 others, and has a code block with a '#' in it. The time per reference
+should stay flat as the report grows: every body is rewritten in a single pass.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scripts import helpers
+from scripts.findings import Finding, Findings
+
+REFERENCES = 10
+
+BODY = """**Description:** The function does not check the bounds, like {references}.
+
+```solidity
+uint256 a = b[#{n}];
+```
+
+**Recommended Mitigation:** Check the bounds.
+"""
+
+
+def synthetic_findings(count):
+    findings = []
+    for n in range(1, count + 1):
+        references = ", ".join(f"#{(n + step) % count + 1}" for step in range(REFERENCES))
+        findings.append(Finding(n, f"Finding {n}", BODY.format(references=references, n=n), "Severity: High Risk",
+                                "Report Status: Open", "org/repo"))
+    return Findings(findings)
+
+
+def bench(count, repeat=3):
+    findings = synthetic_findings(count)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        helpers.replace_internal_links(findings)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    max_findings = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    sizes = [size for size in (100, 500, 1_000, 5_000, 9_999) if size <= max_findings]
+
+    print(f"{'findings':>10} {'references':>11} {'seconds':>10} {'us/ref':>10}")
+    for size in sizes:
+        elapsed = bench(size)
+        print(f"{size:>10} {size * REFERENCES:>11} {elapsed:>10.4f} {elapsed / (size * REFERENCES) * 1e6:>10.2f}")
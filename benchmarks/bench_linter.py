@@ -0,0 +1,68 @@
+"""
+Benchmark of linter.lint on synthetic reports of growing size.
+
+Usage:
+    python benchmarks/bench_linter.py [max lines]
+
+The time per line should stay flat as the report grows: lint walks the lines once.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scripts import linter
+
+ARGS = ("Acme", "SourceOrg", "source-repo", "InternalOrg", "internal-repo")
+
+FINDING = [
+    "### Finding {n}",
+    "",
+    "**Description:**",
+    "",
+    "The function at https://github.com/InternalOrg/internal-repo/blob/main/src/A.sol#L{n} does not check $a \\\\le b$.",
+    "See [the docs](https://docs.example.com) and [another finding](#finding-1).",
+    "",
+    "```solidity",
+    "uint256[] memory a = new uint256[](",
+    "    {n});",
+    "```",
+    "",
+    "**Recommended Mitigation:**",
+    "- Check the bounds.",
+    "",
+    "**Acme:** Fixed in commit abc{n}.",
+    "",
+]
+
+
+def synthetic_report(lines):
+    report = []
+    n = 0
+    while len(report) < lines:
+        report.extend(line.replace("{n}", str(n)) for line in FINDING)
+        n += 1
+    return report[:lines]
+
+
+def bench(lines, repeat=3):
+    best = None
+    for _ in range(repeat):
+        report = synthetic_report(lines)
+        start = time.perf_counter()
+        linter.lint_lines(report, *ARGS)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    max_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sizes = [size for size in (1_000, 10_000, 100_000, 1_000_000) if size <= max_lines]
+
+    print(f"{'lines':>10} {'seconds':>10} {'us/line':>10}")
+    for size in sizes:
+        elapsed = bench(size)
+        print(f"{size:>10} {elapsed:>10.4f} {elapsed / size * 1e6:>10.2f}")
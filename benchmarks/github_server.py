@@ -0,0 +1,411 @@
+"""
+A local stand-in for the parts of GitHub's API the fetch path uses.
+
+It serves synthetic data from memory:
+- GET /repos/{owner}/{repo}/issues, paginated with a Link header, with ETags
+  and 304 responses to conditional requests, like GitHub's REST API
+- POST /graphql, for the RepositoryIssues, OpenIssueLabels, IssuesByNumber,
+  ProjectColumn and ProjectItems queries of scripts/fetch_issues.py
+
+A Profile adds latency and failures: slow pages, 502 responses and secondary
+rate limits (403 with Retry-After). Point the transport at it with
+GITHUB_API_URL, or with the base_url of a GitHubTransport.
+
+Usage:
+    python benchmarks/github_server.py [--issues N] [--items N] [--profile NAME] [--port PORT]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+OWNER = 'org'
+REPO = 'repo'
+PROJECT_NUMBER = 1
+STATUS_OPTIONS = ['Todo', 'In Progress', 'Report', 'Done']
+
+SEVERITIES = ['Critical Risk', 'High Risk', 'Medium Risk', 'Low Risk', 'Informational', 'Gas Optimization']
+STATUSES = ['Open', 'Acknowledged', 'Resolved', 'Partially Resolved']
+
+BODY = """**Description:** Finding {number} in [`Vault.sol`](https://github.com/{owner}/{repo}/blob/main/src/Vault.sol#L{number}).
+
+**Impact:** See #{other}.
+
+**Proof of Concept:**
+```solidity
+function test_{number}() public {{
+    vault.deposit({number});
+}}
+```
+
+**Recommended Mitigation:** Check the amount.
+"""
+
+
+class Profile:
+    """ Latency and failures injected in the responses. Rates are the fraction of requests affected. """
+
+    def __init__(self, latency=0.0, slow_rate=0.0, slow_latency=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 seed=0):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """
+        draw Returns the delay, and the failure status or None, of the next request
+        """
+        with self._lock:
+            delay = self.latency
+            if self.random.random() < self.slow_rate:
+                delay += self.slow_latency
+            roll = self.random.random()
+        if roll < self.error_rate:
+            return delay, 502
+        if roll < self.error_rate + self.rate_limit_rate:
+            return delay, 403
+        return delay, None
+
+
+PROFILES = {
+    'fast': lambda: Profile(),
+    'wan': lambda: Profile(latency=0.05),
+    'slow-pages': lambda: Profile(latency=0.05, slow_rate=0.2, slow_latency=1.0),
+    'flaky': lambda: Profile(latency=0.05, error_rate=0.1),
+    'rate-limited': lambda: Profile(latency=0.05, rate_limit_rate=0.1),
+}
+
+
+def synthetic_data(issues=1000, items=300, pull_requests=50, closed_rate=0.1, seed=0, owner=OWNER, repo=REPO):
+    """
+    synthetic_data Generates the issues and project of a repository
+
+    :param issues: Number of issues. Pull requests are numbered among them, like on GitHub.
+    :param items: Number of project items. Most are issues of the repository, some are pull requests or other repositories.
+    :param closed_rate: Fraction of closed issues
+    :return: Dictionary with the issues (REST representation) and the project.
+    """
+    rng = random.Random(seed)
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, 0))
+
+    records = []
+    for number in range(1, issues + pull_requests + 1):
+        created = start + number * 60
+        record = {
+            'number': number,
+            'title': f"Finding {number}: unchecked amount in deposit",
+            'body': BODY.format(number=number, other=rng.randint(1, issues), owner=owner, repo=repo),
+            'state': 'closed' if rng.random() < closed_rate else 'open',
+            'labels': [{'name': f"Severity: {rng.choice(SEVERITIES)}"}, {'name': f"Report Status: {rng.choice(STATUSES)}"}],
+            'html_url': f"https://github.com/{owner}/{repo}/issues/{number}",
+            'created_at': iso(created),
+            'updated_at': iso(created + rng.randint(0, 86400)),
+        }
+        records.append(record)
+
+    # Spread the pull requests among the issues
+    for record in rng.sample(records, pull_requests):
+        record['pull_request'] = {'url': record['html_url'].replace('/issues/', '/pulls/')}
+        record['html_url'] = record['pull_request']['url']
+
+    options = [{'id': f"option-{index}", 'name': name} for index, name in enumerate(STATUS_OPTIONS)]
+    issue_numbers = [record['number'] for record in records if 'pull_request' not in record]
+    project_items = []
+    for index in range(items):
+        kind = rng.random()
+        if kind < 0.05:
+            content = {}
+        elif kind < 0.1:
+            content = {'number': rng.randint(1, 100), 'repository': {'name': 'other-repo'}}
+        else:
+            content = {'number': rng.choice(issue_numbers), 'repository': {'name': repo}}
+        project_items.append({'option': rng.choice(options)['id'], 'content': content})
+
+    return {
+        'owner': owner,
+        'repo': repo,
+        'issues': records,
+        'project': {
+            'id': 'PVT_standin',
+            'number': PROJECT_NUMBER,
+            'fields': [{'id': 'field-title', 'name': 'Title'},
+                       {'id': 'field-status', 'name': 'Status', 'options': options}],
+            'items': project_items,
+        },
+    }
+
+
+def iso(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def graphql_issue(record):
+    return {
+        'number': record['number'],
+        'title': record['title'],
+        'body': record['body'],
+        'state': record['state'].upper(),
+        'url': record['html_url'],
+        'createdAt': record['created_at'],
+        'updatedAt': record['updated_at'],
+        'labels': {'nodes': [{'name': label['name']} for label in record['labels']]},
+    }
+
+
+def connection(nodes, page_size, cursor):
+    offset = int(cursor) if cursor else 0
+    page = nodes[offset:offset + page_size]
+    has_next = offset + page_size < len(nodes)
+    return {'pageInfo': {'hasNextPage': has_next, 'endCursor': str(offset + page_size) if has_next else None},
+            'nodes': page}
+
+
+class GitHubStandIn:
+    def __init__(self, data, profile=None, host='127.0.0.1', port=0):
+        """
+        :param data: Data of synthetic_data
+        :param profile: Profile of injected latency and failures, or None for none
+        :param port: Port to listen on, 0 for any free port
+        """
+        self.data = data
+        self.profile = profile or Profile()
+        self.issues = {record['number']: record for record in data['issues']}
+        self.requests = 0
+        self.injected = {502: 0, 403: 0}
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(StandInHandler):
+            server_state = stand_in
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # REST
+
+    def rest_issues(self, params):
+        """
+        rest_issues Returns the issues of a page of GET /repos/{owner}/{repo}/issues, and whether there is a next page
+        """
+        state = params.get('state', 'open')
+        since = params.get('since')
+        labels = set(params['labels'].split(',')) if params.get('labels') else set()
+        per_page = min(int(params.get('per_page', 30)), 100)
+        page = int(params.get('page', 1))
+
+        records = [record for record in self.data['issues']
+                   if (state == 'all' or record['state'] == state) and (not since or record['updated_at'] >= since)
+                   and labels <= {label['name'] for label in record['labels']}]
+        return records[(page - 1) * per_page:page * per_page], page * per_page < len(records)
+
+    # GraphQL
+
+    def graphql(self, query, variables):
+        operation = re.search(r'query\s+(\w+)', query).group(1)
+        if operation == 'RepositoryIssues':
+            return self.repository_issues(variables)
+        if operation == 'OpenIssueLabels':
+            return self.open_issue_labels(variables)
+        if operation == 'IssuesByNumber':
+            return self.issues_by_number(query)
+        if operation == 'ProjectColumn':
+            return self.project_column(variables)
+        if operation == 'ProjectItems':
+            return self.project_items(variables)
+        return {'errors': [{'type': 'UNKNOWN_QUERY', 'message': f"The stand-in doesn't implement {operation}"}]}
+
+    def repository_issues(self, variables):
+        labels = set(variables.get('labels') or [])
+        nodes = [graphql_issue(record) for record in self.data['issues']
+                 if 'pull_request' not in record and record['state'] == 'open'
+                 and (not labels or labels & {label['name'] for label in record['labels']})]
+        return {'data': {'repository': {'issues': connection(nodes, variables['pageSize'], variables.get('cursor'))}}}
+
+    def open_issue_labels(self, variables):
+        response = self.repository_issues(variables)
+        for node in response['data']['repository']['issues']['nodes']:
+            for name in list(node):
+                if name not in ('number', 'labels'):
+                    del node[name]
+        return response
+
+    def issues_by_number(self, query):
+        repository = {}
+        errors = []
+        for alias, number in re.findall(r'(\w+): issue\(number: (\d+)\)', query):
+            record = self.issues.get(int(number))
+            if record is None or 'pull_request' in record:
+                repository[alias] = None
+                errors.append({'type': 'NOT_FOUND', 'path': ['repository', alias],
+                               'message': f"Could not resolve to an Issue with the number of {number}."})
+            else:
+                repository[alias] = graphql_issue(record)
+        response = {'data': {'repository': repository}}
+        if errors:
+            response['errors'] = errors
+        return response
+
+    def item_connection(self, page_size, cursor):
+        nodes = [{'fieldValues': {'nodes': [{}, {'optionId': item['option'], 'field': {'id': 'field-status'}}]},
+                  'content': item['content']}
+                 for item in self.data['project']['items']]
+        return connection(nodes, page_size, cursor)
+
+    def project_column(self, variables):
+        project = self.data['project']
+        if variables['owner'] != self.data['owner']:
+            return {'data': {'repositoryOwner': None}}
+        if variables['number'] != project['number']:
+            return {'data': {'repositoryOwner': {'projectV2': None}},
+                    'errors': [{'type': 'NOT_FOUND', 'message': "Could not resolve to a ProjectV2."}]}
+        return {'data': {'repositoryOwner': {'projectV2': {
+            'id': project['id'],
+            'fields': {'nodes': project['fields']},
+            'items': self.item_connection(variables['pageSize'], None),
+        }}}}
+
+    def project_items(self, variables):
+        if variables['projectId'] != self.data['project']['id']:
+            return {'data': {'node': None}, 'errors': [{'type': 'NOT_FOUND', 'message': "Could not resolve to a node."}]}
+        return {'data': {'node': {'items': self.item_connection(variables['pageSize'], variables.get('cursor'))}}}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server_state = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None, resource='core'):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-RateLimit-Resource', resource)
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Remaining', str(max(0, 5000 - self.server_state.requests)))
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def inject(self, resource):
+        """
+        inject Waits and fails the request as the profile says
+
+        :return: True if a failure was sent.
+        """
+        state = self.server_state
+        with state._lock:
+            state.requests += 1
+        delay, status = state.profile.draw()
+        if delay:
+            time.sleep(delay)
+        if status is None:
+            return False
+
+        with state._lock:
+            state.injected[status] += 1
+        if status == 403:
+            self.send_json(403, {'message': "You have exceeded a secondary rate limit."},
+                           {'Retry-After': str(state.profile.retry_after)}, resource)
+        else:
+            self.send_json(502, {'message': "Server Error"}, resource=resource)
+        return True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self.inject('core'):
+            return
+
+        state = self.server_state
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)/issues', url.path)
+        if not match or match.groups() != (state.data['owner'], state.data['repo']):
+            self.send_json(404, {'message': "Not Found"})
+            return
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        records, has_next = state.rest_issues(params)
+        etag = '"' + hashlib.sha256(json.dumps(records).encode()).hexdigest()[:32] + '"'
+
+        headers = {'ETag': etag, 'Last-Modified': formatdate(usegmt=True)}
+        if has_next:
+            next_params = dict(params, page=int(params.get('page', 1)) + 1)
+            headers['Link'] = f'<{state.url}{url.path}?{urlencode(next_params)}>; rel="next"'
+
+        if self.headers.get('If-None-Match') == etag:
+            with state._lock:
+                state.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_json(200, records, headers)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.inject('graphql'):
+            return
+
+        if urlparse(self.path).path != '/graphql':
+            self.send_json(404, {'message': "Not Found"})
+            return
+
+        body = self.server_state.graphql(payload.get('query', ''), payload.get('variables') or {})
+        self.send_json(200, body, resource='graphql')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve synthetic GitHub data locally.")
+    parser.add_argument('--issues', type=int, default=1000)
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='fast')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    stand_in = GitHubStandIn(synthetic_data(args.issues, args.items), PROFILES[args.profile](), port=args.port)
+    print(f"Serving {args.issues} issues and {args.items} project items of {OWNER}/{REPO} at {stand_in.url} "
+          f"(profile '{args.profile}'). Set GITHUB_API_URL={stand_in.url}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        stand_in.server.server_close()
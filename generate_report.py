@@ -1,136 +1,354 @@
+import argparse
+import os
 import re
-import subprocess
+import time
+import scripts.anchors as anchors
+import scripts.build as build
+import scripts.convert as convert
+import scripts.fetch_issues as fetcher
+import scripts.findings as findings
+import scripts.fragments as fragments
+import scripts.github_transport as github_transport
 import scripts.helpers as helpers
+import scripts.highlight as highlight
+import scripts.issue_store as issue_store
+import scripts.latex as latex
 import scripts.linter as linter
+import scripts.postprocess as postprocess
+import scripts.resolve_auditors as auditors
+import scripts.snapshot as snapshots
+import scripts.template as template
+import scripts.watch as watch
+from scripts.disk_cache import DiskCache
 from scripts.fetch_issues import fetch_issues
 from scripts.resolve_auditors import resolve_auditors
 
-# Get issues
-fetch_issues()
-
-# Get static info from conf files
-summary_data = helpers.get_summary_information()
-severity_count_data = helpers.get_severity_counts()
-
-# If placeholder name is still in the summary_information.conf file, it means that the user didn't provide a GitHub repository, likely to be the first push on clone.
-if summary_data['project_name'] == "PROJECT_NAME":
-    print("Error: 'project_name' in source/summary_information.conf is still set to the default placeholder 'PROJECT_NAME'.")
-    print("Please update it to the actual project name before generating the report.")
-    exit(0)
-
-if summary_data['team_name'] == "TEAM_NAME":
-    print("Error: 'team_name' in source/summary_information.conf is still set to the default placeholder 'TEAM_NAME'.")
-    print("Please update it to the actual team name before generating the report.")
-    exit(0)
-
-# Strip trailing slashes from GitHub URLs to prevent regex failures
-for key in ('project_github', 'project_github_2', 'project_github_3', 'private_github'):
-    summary_data[key] = summary_data[key].rstrip('/')
-
-# Build title text: include team name only if it's not already part of the project name
-if summary_data['team_name'].lower() in summary_data['project_name'].lower():
-    title_text = summary_data['project_name']
-else:
-    title_text = summary_data['team_name'] + " " + summary_data['project_name']
-
-# Project name taken from summary_information.conf, inserted in Title section -> title.tex file
-REPLACE_TITLE = [["__PLACEHOLDER__PROJECT_NAME", title_text],
-                 ["__PLACEHOLDER__REPORT_VERSION", summary_data['report_version']]]
-
-pattern = r'/(?P<org_name>[^/]+)/([^/]+?)(?=/(?:src|branch|tree)|\.git|$)'
-source_org, source_repo_name = re.search(pattern, summary_data['project_github']).groups()
-if summary_data['project_github_2']:
-    _, source_repo_name_2 = re.search(pattern, summary_data['project_github_2']).groups()
-else:
-    source_repo_name_2 = ""
-
-if summary_data['project_github_3']:
-    _, source_repo_name_3 = re.search(pattern, summary_data['project_github_3']).groups()
-else:
-    source_repo_name_3 = ""
-
-internal_org, internal_repo_name = re.search(pattern, summary_data['private_github']).groups()
-
-# Information from summary_information.conf, inserted in Summary section -> summary.tex file
-REPLACE_SUMMARY = [["__PLACEHOLDER__REVIEW_LENGTH", str(helpers.calculate_period(summary_data['review_timeline']))],
-                   ["__PLACEHOLDER__TEAM_NAME", summary_data['team_name']],
-                   ["__PLACEHOLDER__TEAM_WEBSITE", summary_data['team_website']],
-                   ["__PLACEHOLDER__PROJECT_NAME", summary_data['project_name']],
-                   ["__PLACEHOLDER__REPO_LINK_3", summary_data['project_github_3']],
-                   ["__PLACEHOLDER__REPO_NAME_3", source_repo_name_3],
-                   ["__PLACEHOLDER__COMMIT_HASH_LINK_3", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_3']) + "/blob/" + summary_data['commit_hash_3']],
-                   ["__PLACEHOLDER__COMMIT_HASH_3", summary_data['commit_hash_3']],
-                   ["__PLACEHOLDER__REPO_LINK_2", summary_data['project_github_2']],
-                   ["__PLACEHOLDER__REPO_NAME_2", source_repo_name_2],
-                   ["__PLACEHOLDER__COMMIT_HASH_LINK_2", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_2']) + "/blob/" + summary_data['commit_hash_2']],
-                   ["__PLACEHOLDER__COMMIT_HASH_2", summary_data['commit_hash_2']],
-                   ["__PLACEHOLDER__REPO_LINK", summary_data['project_github']],
-                   ["__PLACEHOLDER__REPO_NAME", source_repo_name],
-                   ["__PLACEHOLDER__COMMIT_HASH_LINK", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github']) + "/blob/" + summary_data['commit_hash']],
-                   ["__PLACEHOLDER__COMMIT_HASH", summary_data['commit_hash']],
-                   ["__PLACEHOLDER__FIX_COMMIT_HASH_LINK", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github']) + "/blob/" + summary_data['fix_commit_hash'] if summary_data['fix_commit_hash'] else ""],
-                   ["__PLACEHOLDER__FIX_COMMIT_HASH", summary_data['fix_commit_hash'] or ""],
-                   ["__PLACEHOLDER__FIX_COMMIT_HASH_LINK_2", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_2']) + "/blob/" + summary_data['fix_commit_hash_2'] if summary_data['fix_commit_hash_2'] else ""],
-                   ["__PLACEHOLDER__FIX_COMMIT_HASH_2", summary_data['fix_commit_hash_2'] or ""],
-                   ["__PLACEHOLDER__FIX_COMMIT_HASH_LINK_3", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_3']) + "/blob/" + summary_data['fix_commit_hash_3'] if summary_data['fix_commit_hash_3'] else ""],
-                   ["__PLACEHOLDER__FIX_COMMIT_HASH_3", summary_data['fix_commit_hash_3'] or ""],
-                   ["__PLACEHOLDER__AUDIT_TIMELINE", summary_data['review_timeline']],
-                   ["__PLACEHOLDER__AUDIT_METHODS", summary_data['review_methods']]]
-
-
-# Severities count taken from severity_count.conf, inserted in Total Issues section -> summary.tex file
-findings_sentence = helpers.build_findings_sentence(severity_count_data)
-
-REPLACE_SEVERITIES = [["__PLACEHOLDER__FINDINGS_SENTENCE", findings_sentence],
-                      ["__PLACEHOLDER__ISSUE_CRITICAL_COUNT", severity_count_data['critical']],
-                      ["__PLACEHOLDER__ISSUE_HIGH_COUNT", severity_count_data['high']],
-                      ["__PLACEHOLDER__ISSUE_MEDIUM_COUNT", severity_count_data['medium']],
-                      ["__PLACEHOLDER__ISSUE_LOW_COUNT", severity_count_data['low']],
-                      ["__PLACEHOLDER__ISSUE_INFORMATIONAL_COUNT" ,severity_count_data['informational']],
-                      ["__PLACEHOLDER__ISSUE_GAS_OPTIMIZATION_COUNT", severity_count_data['gas_optimization']],
-                      ["__PLACEHOLDER__ISSUE_TOTAL_COUNT", severity_count_data['total']]]
-
-
-
-# Lint the report.md
-print("Linting the report.md file ...")
-report = helpers.get_file_contents(helpers.SOURCE_REPORT)
-report = linter.lint(report, summary_data['team_name'], source_org, source_repo_name, internal_org, internal_repo_name)
-helpers.save_file_contents(helpers.SOURCE_REPORT, report)
-print(f"Done.\n")
-
-# Resolve auditor names to markdown links in working directory
-print("Resolving auditor names ...")
-resolve_auditors()
-print(f"Done.\n")
-
-# Convert all .md to .tex and save to working dir
-print("Converting Markdown files to LaTeX ...")
-with open("./working/conversion.log", "w") as log:
-    subprocess.call("./scripts/convert.sh", stdout=log, stderr=log)
-print(f"Done.\n")
-
-# Process for title.tex: Get the file and replace placeholders.
-print("Replacing information in title.tex ...")
-title = helpers.get_file_contents("./templates/title.tex")
-title = helpers.replace_in_file_content(title, REPLACE_TITLE)
-helpers.save_file_contents("./working/title.tex", title)
-print(f"Done.\n")
-
-# Process for summary.tex: Get the file and replace placeholders.
-print("Replacing information in summary.tex ...")
-summary = helpers.get_file_contents("./templates/summary.tex")
-summary = helpers.replace_in_file_content(summary, REPLACE_SUMMARY)
-summary = helpers.replace_in_file_content(summary, REPLACE_SEVERITIES)
-helpers.save_file_contents("./working/summary.tex", summary)
-print(f"Done.\n")
-
-# Generate PDF in output folder
-print("Generating report PDF file ...")
-with open("./working/generation.log", "w") as log:
-    # This is actually repeated by the GitHub Action, but it's useful to have it here for running locally
-    subprocess.call("./scripts/generate.sh", stdout=log, stderr=log)
-# Edit the report markdown for Solodit, after everything else is complete
-helpers.edit_report_md()
-print(f"\nAll tasks completed. Report should be in the 'output' folder.")
-print(f"If it wasn't generated, check 'working/conversion.log' and 'working/generation.log'.")
+TEMPLATES = './templates'
+WORKING = './working'
+
+# Templates that are rendered with the summary information instead of copied as they are
+RENDERED_TEMPLATES = ['title.tex', 'summary.tex']
+
+# Watch mode rebuilds when a file in these changes
+WATCHED = ['./source', './templates']
+
+STAGES_HELP = ("fetch, lint, auditors, convert (or convert:<file>, e.g. convert:disclaimer), templates, title, summary, "
+               "compile, solodit")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the audit report PDF from the GitHub issues. Only the stages "
+                                                 "whose inputs changed since the last run are run again.")
+    snapshot = parser.add_mutually_exclusive_group()
+    snapshot.add_argument("--record", metavar="SNAPSHOT",
+                          help="save the issues and project columns fetched from GitHub to a snapshot file")
+    snapshot.add_argument("--replay", metavar="SNAPSHOT",
+                          help="read the issues and project columns from a snapshot file instead of GitHub")
+    stages = parser.add_mutually_exclusive_group()
+    stages.add_argument("--only", metavar="STAGE", help=f"run only this stage, even if it is up to date: {STAGES_HELP}")
+    stages.add_argument("--from", dest="start", metavar="STAGE",
+                        help="run this stage and every stage that depends on it, even if they are up to date")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, keep rebuilding the stages affected by every change to source/ and "
+                             "templates/, without fetching from GitHub again")
+    return parser.parse_args(argv)
+
+
+def get_summary_data():
+    """
+    get_summary_data Returns the summary information, and exits if it still has the placeholders of the template
+    """
+    summary_data = helpers.get_summary_information()
+
+    # If placeholder name is still in the summary_information.conf file, it means that the user didn't provide a GitHub repository, likely to be the first push on clone.
+    if summary_data['project_name'] == "PROJECT_NAME":
+        print("Error: 'project_name' in source/summary_information.conf is still set to the default placeholder 'PROJECT_NAME'.")
+        print("Please update it to the actual project name before generating the report.")
+        exit(0)
+
+    if summary_data['team_name'] == "TEAM_NAME":
+        print("Error: 'team_name' in source/summary_information.conf is still set to the default placeholder 'TEAM_NAME'.")
+        print("Please update it to the actual team name before generating the report.")
+        exit(0)
+
+    # Strip trailing slashes from GitHub URLs to prevent regex failures
+    for key in ('project_github', 'project_github_2', 'project_github_3', 'private_github'):
+        summary_data[key] = summary_data[key].rstrip('/')
+
+    return summary_data
+
+
+def title_replacements(summary_data):
+    # Build title text: include team name only if it's not already part of the project name
+    if summary_data['team_name'].lower() in summary_data['project_name'].lower():
+        title_text = summary_data['project_name']
+    else:
+        title_text = summary_data['team_name'] + " " + summary_data['project_name']
+
+    # Project name taken from summary_information.conf, inserted in Title section -> title.tex file
+    REPLACE_TITLE = [["__PLACEHOLDER__PROJECT_NAME", title_text],
+                     ["__PLACEHOLDER__REPORT_VERSION", summary_data['report_version']]]
+
+    return REPLACE_TITLE
+
+
+def repository_names(summary_data):
+    """
+    repository_names Returns the organizations and names of the repositories of the report
+
+    :return: (source_org, source_repo_name, source_repo_name_2, source_repo_name_3, internal_org, internal_repo_name)
+    """
+    pattern = r'/(?P<org_name>[^/]+)/([^/]+?)(?=/(?:src|branch|tree)|\.git|$)'
+    source_org, source_repo_name = re.search(pattern, summary_data['project_github']).groups()
+    if summary_data['project_github_2']:
+        _, source_repo_name_2 = re.search(pattern, summary_data['project_github_2']).groups()
+    else:
+        source_repo_name_2 = ""
+
+    if summary_data['project_github_3']:
+        _, source_repo_name_3 = re.search(pattern, summary_data['project_github_3']).groups()
+    else:
+        source_repo_name_3 = ""
+
+    internal_org, internal_repo_name = re.search(pattern, summary_data['private_github']).groups()
+
+    return source_org, source_repo_name, source_repo_name_2, source_repo_name_3, internal_org, internal_repo_name
+
+
+def summary_replacements(summary_data):
+    _, source_repo_name, source_repo_name_2, source_repo_name_3, _, _ = repository_names(summary_data)
+    severity_count_data = helpers.get_severity_counts()
+
+    # Information from summary_information.conf, inserted in Summary section -> summary.tex file
+    REPLACE_SUMMARY = [["__PLACEHOLDER__REVIEW_LENGTH", str(helpers.calculate_period(summary_data['review_timeline']))],
+                       ["__PLACEHOLDER__TEAM_NAME", summary_data['team_name']],
+                       ["__PLACEHOLDER__TEAM_WEBSITE", summary_data['team_website']],
+                       ["__PLACEHOLDER__PROJECT_NAME", summary_data['project_name']],
+                       ["__PLACEHOLDER__REPO_LINK_3", summary_data['project_github_3']],
+                       ["__PLACEHOLDER__REPO_NAME_3", source_repo_name_3],
+                       ["__PLACEHOLDER__COMMIT_HASH_LINK_3", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_3']) + "/blob/" + summary_data['commit_hash_3']],
+                       ["__PLACEHOLDER__COMMIT_HASH_3", summary_data['commit_hash_3']],
+                       ["__PLACEHOLDER__REPO_LINK_2", summary_data['project_github_2']],
+                       ["__PLACEHOLDER__REPO_NAME_2", source_repo_name_2],
+                       ["__PLACEHOLDER__COMMIT_HASH_LINK_2", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_2']) + "/blob/" + summary_data['commit_hash_2']],
+                       ["__PLACEHOLDER__COMMIT_HASH_2", summary_data['commit_hash_2']],
+                       ["__PLACEHOLDER__REPO_LINK", summary_data['project_github']],
+                       ["__PLACEHOLDER__REPO_NAME", source_repo_name],
+                       ["__PLACEHOLDER__COMMIT_HASH_LINK", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github']) + "/blob/" + summary_data['commit_hash']],
+                       ["__PLACEHOLDER__COMMIT_HASH", summary_data['commit_hash']],
+                       ["__PLACEHOLDER__FIX_COMMIT_HASH_LINK", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github']) + "/blob/" + summary_data['fix_commit_hash'] if summary_data['fix_commit_hash'] else ""],
+                       ["__PLACEHOLDER__FIX_COMMIT_HASH", summary_data['fix_commit_hash'] or ""],
+                       ["__PLACEHOLDER__FIX_COMMIT_HASH_LINK_2", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_2']) + "/blob/" + summary_data['fix_commit_hash_2'] if summary_data['fix_commit_hash_2'] else ""],
+                       ["__PLACEHOLDER__FIX_COMMIT_HASH_2", summary_data['fix_commit_hash_2'] or ""],
+                       ["__PLACEHOLDER__FIX_COMMIT_HASH_LINK_3", re.sub(r'(/(?:tree|src|branch)/.*)?(?:\.git)?$', '', summary_data['project_github_3']) + "/blob/" + summary_data['fix_commit_hash_3'] if summary_data['fix_commit_hash_3'] else ""],
+                       ["__PLACEHOLDER__FIX_COMMIT_HASH_3", summary_data['fix_commit_hash_3'] or ""],
+                       ["__PLACEHOLDER__AUDIT_TIMELINE", summary_data['review_timeline']],
+                       ["__PLACEHOLDER__AUDIT_METHODS", summary_data['review_methods']]]
+
+
+    # Severities count taken from severity_count.conf, inserted in Total Issues section -> summary.tex file
+    findings_sentence = helpers.build_findings_sentence(severity_count_data)
+
+    REPLACE_SEVERITIES = [["__PLACEHOLDER__FINDINGS_SENTENCE", findings_sentence],
+                          ["__PLACEHOLDER__ISSUE_CRITICAL_COUNT", severity_count_data['critical']],
+                          ["__PLACEHOLDER__ISSUE_HIGH_COUNT", severity_count_data['high']],
+                          ["__PLACEHOLDER__ISSUE_MEDIUM_COUNT", severity_count_data['medium']],
+                          ["__PLACEHOLDER__ISSUE_LOW_COUNT", severity_count_data['low']],
+                          ["__PLACEHOLDER__ISSUE_INFORMATIONAL_COUNT" ,severity_count_data['informational']],
+                          ["__PLACEHOLDER__ISSUE_GAS_OPTIMIZATION_COUNT", severity_count_data['gas_optimization']],
+                          ["__PLACEHOLDER__ISSUE_TOTAL_COUNT", severity_count_data['total']]]
+
+    # Summary of findings table written by fetch_issues, inserted in Summary of Findings section -> summary.tex file
+    REPLACE_FINDINGS = [["__PLACEHOLDER__SUMMARY_OF_FINDINGS", "\n".join(helpers.get_file_contents(helpers.SUMMARY_OF_FINDINGS))]]
+
+    return REPLACE_SUMMARY + REPLACE_SEVERITIES + REPLACE_FINDINGS
+
+
+def template_files(source=TEMPLATES, destination=WORKING):
+    """
+    template_files Returns the (template, copy in the working directory) paths of the templates that are copied
+    """
+    files = []
+    for directory, _, names in os.walk(source):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, source)
+            if relative not in RENDERED_TEMPLATES:
+                files.append((path, os.path.join(destination, relative)))
+    return sorted(files)
+
+
+def code_files(*modules):
+    """
+    code_files Returns the source files of modules, which are inputs of the stages whose outputs they write
+    """
+    return [module.__file__ for module in modules]
+
+
+def report_stages(args, summary_data, conversion_cache=None):
+    """
+    report_stages Returns the stages of the report build, in pipeline order (see scripts/build.py)
+
+    :param args: The parsed command line
+    :param summary_data: The summary information, from get_summary_data
+    :param conversion_cache: DiskCache the conversions share, or None to always run pandoc
+    """
+    source_org, source_repo_name, _, _, internal_org, internal_repo_name = repository_names(summary_data)
+
+    def fetch():
+        fetch_issues(record=args.record, replay=args.replay)
+
+    def lint():
+        print("Linting the report.md file ...")
+        report = helpers.get_file_contents(helpers.SOURCE_REPORT)
+        report = linter.lint(report, summary_data['team_name'], source_org, source_repo_name, internal_org, internal_repo_name)
+        helpers.save_file_contents(helpers.SOURCE_REPORT, report)
+        print(f"Done.\n")
+
+    def resolve():
+        # Resolve auditor names to markdown links in working directory
+        print("Resolving auditor names ...")
+        resolve_auditors()
+        print(f"Done.\n")
+
+    def copy_templates():
+        postprocess.copy_templates(TEMPLATES, WORKING, ignore=RENDERED_TEMPLATES)
+        # The templates copied above set up minted
+        if highlight.HIGHLIGHT_MODE == highlight.PYGMENTS:
+            highlight.write_style_definitions()
+
+    def title():
+        print("Replacing information in title.tex ...")
+        helpers.render_template(os.path.join(TEMPLATES, 'title.tex'), os.path.join(WORKING, 'title.tex'),
+                                title_replacements(summary_data))
+        print(f"Done.\n")
+
+    def summary():
+        print("Replacing information in summary.tex ...")
+        helpers.render_template(os.path.join(TEMPLATES, 'summary.tex'), os.path.join(WORKING, 'summary.tex'),
+                                summary_replacements(summary_data))
+        print(f"Done.\n")
+
+    def compile_pdf():
+        # Generate PDF in output folder
+        print("Generating report PDF file ...")
+        with open("./working/generation.log", "w") as log:
+            # This is actually repeated by the GitHub Action, but it's useful to have it here for running locally
+            passes = latex.generate_pdf(log=log)
+        if passes is not None:
+            print(f"Done in {passes} pdflatex passes.\n")
+
+    def convert_file(conversion):
+        return lambda: convert.convert_file(conversion, cache=conversion_cache)
+
+    # GitHub can't be fingerprinted, so fetching always runs, unless the issues are replayed from a snapshot.
+    # Stages after it only run again if the files it wrote changed.
+    # The code that writes the outputs of a stage is one of its inputs, so changing it runs the stage again.
+    fetched = [helpers.SOURCE_REPORT, helpers.SEVERITY_COUNTS, helpers.SUMMARY_OF_FINDINGS, helpers.MITIGATION_TABLE]
+    fetch_code = code_files(fetcher, findings, fragments, github_transport, helpers, issue_store, snapshots, anchors)
+    stages = [
+        build.Stage('fetch', fetch, [helpers.SUMMARY_INFORMATION] + ([args.replay] if args.replay else []) + fetch_code,
+                    fetched + ([args.record] if args.record else []), [args.record, args.replay], always=not args.replay),
+        build.Stage('lint', lint, [helpers.SOURCE_REPORT, helpers.SUMMARY_INFORMATION] + code_files(linter),
+                    [helpers.SOURCE_REPORT]),
+        build.Stage('auditors', resolve, [auditors.AUDITORS_JSON, auditors.SOURCE_LEAD, auditors.SOURCE_ASSISTING]
+                    + code_files(auditors), [auditors.WORKING_LEAD, auditors.WORKING_ASSISTING]),
+    ]
+
+    for conversion in convert.CONVERSIONS:
+        source, output, reader = conversion
+        name = os.path.splitext(os.path.basename(source))[0]
+        stages.append(build.Stage(f'convert:{name}', convert_file(conversion), [source] + convert.CONVERSION_SOURCES, [output],
+                                  [reader, convert.FILTER_MODE, highlight.HIGHLIGHT_MODE]))
+
+    templates = template_files()
+    stages += [
+        # In pygments mode, highlighting.tex is replaced by the style definitions
+        build.Stage('templates', copy_templates, [path for path, _ in templates] + code_files(postprocess, highlight),
+                    [copy for _, copy in templates], [highlight.HIGHLIGHT_MODE]),
+        build.Stage('title', title, [os.path.join(TEMPLATES, 'title.tex'), helpers.SUMMARY_INFORMATION]
+                    + code_files(helpers, template), [os.path.join(WORKING, 'title.tex')]),
+        build.Stage('summary', summary, [os.path.join(TEMPLATES, 'summary.tex'), helpers.SUMMARY_INFORMATION,
+                                         helpers.SEVERITY_COUNTS, helpers.SUMMARY_OF_FINDINGS]
+                    + code_files(helpers, template), [os.path.join(WORKING, 'summary.tex')]),
+    ]
+
+    # Everything the stages above wrote to the working directory goes into the PDF, as well as the templates it
+    # comes from: in pygments mode, the copy of highlighting.tex is replaced by the style definitions
+    latex_inputs = [path for stage in stages if stage.name not in ('fetch', 'lint', 'auditors')
+                    for path in stage.outputs]
+    stages += [
+        # Installing pdflatex after a build that skipped the compilation makes it stale
+        build.Stage('compile', compile_pdf, latex_inputs + [path for path, _ in templates] + code_files(latex, highlight),
+                    [latex.OUTPUT_PDF], [highlight.HIGHLIGHT_MODE, latex.MAX_PASSES, latex.pdflatex_path()]),
+        # Edit the report markdown for Solodit
+        build.Stage('solodit', helpers.edit_report_md,
+                    [helpers.WORKING_LEAD_AUDITORS, helpers.WORKING_ASSISTING_AUDITORS, helpers.SOURCE_REPORT]
+                    + code_files(helpers), [helpers.OUTPUT_SOLODIT]),
+    ]
+    return stages
+
+
+def build_report(args, cache, changed=None, fetch=True):
+    """
+    build_report Builds the report, running only the stale stages
+
+    :param cache: DiskCache of the conversions
+    :param changed: Paths of the only files that changed since the last build, or None to check every stage
+    :param fetch: Whether to fetch the issues. Without it the report.md already in source/ is used.
+    :return: Dictionary of the seconds every stage that ran took, by name.
+    """
+    # Read again on every build, as watch mode rebuilds when it changes
+    summary_data = get_summary_data()
+
+    # The conversion log only has the conversions of this build
+    open(convert.CONVERSION_LOG, 'w').close()
+
+    stages = [stage for stage in report_stages(args, summary_data, cache) if fetch or stage.name != 'fetch']
+    start = time.perf_counter()
+    ran = build.run(stages, only=args.only, start=args.start, changed=changed)
+
+    if any(name.startswith('convert:') for name in ran):
+        print(f"Conversion cache: {cache.summary()}.")
+        if highlight.HIGHLIGHT_MODE == highlight.PYGMENTS and convert.FILTER_MODE == 'inprocess':
+            print(f"Highlight cache: {highlight.cache().summary()}.")
+    print(f"Ran {len(ran)} of {len(stages)} stages in {time.perf_counter() - start:.1f}s"
+          + (f": {', '.join(stage.name for stage in stages if stage.name in ran)}." if ran else ", everything is up to date."))
+    return ran
+
+
+def watch_report(args, cache):
+    """
+    watch_report Rebuilds the report on every change to its sources, until interrupted
+
+    Rebuilds don't fetch from GitHub, unless the issues are replayed from a snapshot, in which case the snapshot is
+    watched too. Only the stages that read the changed files, and the ones after them, are checked.
+    """
+    # Every rebuild is a normal build of all the stages that are stale
+    args = argparse.Namespace(**{**vars(args), 'only': None, 'start': None})
+    fetch = bool(args.replay)
+    paths = WATCHED + ([args.replay] if args.replay else [])
+
+    # The linter rewrites report.md in source/
+    stages = [stage for stage in report_stages(args, get_summary_data(), cache) if fetch or stage.name != 'fetch']
+    written = sorted({path for stage in stages for path in stage.outputs})
+
+    watch.watch(paths, lambda changed: build_report(args, cache, changed, fetch), written)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = DiskCache(convert.CONVERSION_CACHE, convert.CONVERSION_CACHE_MAX_BYTES, '.tex')
+
+    build_report(args, cache)
+
+    print(f"\nAll tasks completed. Report should be in the 'output' folder.")
+    print(f"If it wasn't generated, check 'working/conversion.log' and 'working/generation.log'.")
+
+    if args.watch:
+        print()
+        watch_report(args, cache)
+
+
+if __name__ == '__main__':
+    main()
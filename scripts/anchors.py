@@ -0,0 +1,183 @@
+"""
+Native implementation of pandoc's `auto_identifiers` algorithm.
+
+pandoc gives every heading an identifier which ends up as the `\\label` (and,
+in older versions, the `\\hypertarget`) of the section in the LaTeX output, and
+numbers duplicate headings across the whole document. The findings of report.md
+are converted on their own (see convert.py), so the converter numbers their
+headings again once they are stitched together. The identifiers are computed
+here from the headers pandoc read, without running pandoc again.
+
+Set PANDOC_IDENTIFIER_PARITY=1 to cross-check the numbered labels of report.tex
+against a real pandoc run of the whole document (slow, meant for debugging
+mismatches).
+"""
+
+from functools import lru_cache
+import json
+import os
+import re
+import subprocess
+import unicodedata
+
+MARKDOWN = 'markdown'
+GFM = 'gfm'
+
+PARITY_ENV = 'PANDOC_IDENTIFIER_PARITY'
+
+GFM_KEPT_CATEGORIES = ('Mn', 'Mc', 'Me', 'Pc')
+
+
+def _is_allowed(c, flavor):
+    if c.isspace() or c.isalnum() or c in '_-':
+        return True
+    if flavor == GFM:
+        return unicodedata.category(c) in GFM_KEPT_CATEGORIES
+    return c == '.'
+
+
+def inline_text(inlines):
+    """
+    inline_text Returns the text of a list of inlines of a pandoc JSON document, like pandoc's `stringify`
+
+    Code and math are kept verbatim, notes and raw inlines are dropped, and quotes are turned into curly quotes.
+    """
+    parts = []
+    for inline in inlines:
+        kind, content = inline['t'], inline.get('c')
+        if kind == 'Str':
+            parts.append(content)
+        elif kind in ('Code', 'Math'):
+            parts.append(content[1])
+        elif kind in ('Space', 'SoftBreak', 'LineBreak'):
+            parts.append(' ')
+        elif kind == 'Quoted':
+            open_quote, close_quote = ('\u2018', '\u2019') if content[0]['t'] == 'SingleQuote' else ('\u201c', '\u201d')
+            parts.append(open_quote + inline_text(content[1]) + close_quote)
+        elif kind in ('Note', 'RawInline'):
+            continue
+        elif kind in ('Link', 'Image', 'Span', 'Cite'):
+            parts.append(inline_text(content[1]))
+        else:
+            # Emph, Strong, Underline, Strikeout, Superscript, Subscript and SmallCaps only hold inlines
+            parts.append(inline_text(content))
+    return ''.join(parts)
+
+
+def iter_headers(blocks):
+    """
+    iter_headers Yields the identifier and the inlines of every header of a pandoc JSON document, in document order
+
+    Headers nested in other blocks, e.g. in block quotes or list items, are included.
+
+    :param blocks: The blocks of the document, or any part of it
+    """
+    if isinstance(blocks, dict):
+        if blocks.get('t') == 'Header':
+            _, (ident, _, _), inlines = blocks['c']
+            yield ident, inlines
+        else:
+            yield from iter_headers(blocks.get('c'))
+    elif isinstance(blocks, list):
+        for item in blocks:
+            yield from iter_headers(item)
+
+
+@lru_cache(maxsize=4096)
+def slug(text, flavor=MARKDOWN):
+    """
+    slug Returns the identifier pandoc derives from the text of a heading, ignoring duplicates.
+
+    :param text: Plain text of the heading, e.g. from inline_text
+    :param flavor: MARKDOWN for `auto_identifiers`, GFM for `gfm_auto_identifiers`
+    :return: The identifier, or an empty string if nothing is left of the heading.
+    """
+    text = text.lower()
+
+    if flavor == GFM:
+        text = ''.join('-' if c.isspace() else c for c in text)
+        return ''.join(c for c in text if _is_allowed(c, flavor))
+
+    text = '-'.join(''.join(c for c in text if _is_allowed(c, flavor)).split())
+    # Identifiers may not begin with a number or punctuation mark
+    for i, c in enumerate(text):
+        if c.isalpha():
+            return text[i:]
+    return ''
+
+
+class IdentifierRegistry:
+    """
+    Hands out unique identifiers in document order, like pandoc does for a whole document:
+    the first heading keeps its identifier, later duplicates get '-1', '-2', ...
+
+    The markdown reader picks the first free suffix and falls back to 'section' for
+    empty identifiers. The gfm reader just counts occurrences of each identifier and
+    leaves headings without one unlabelled (an empty string here).
+    """
+
+    def __init__(self, flavor=MARKDOWN):
+        self.flavor = flavor
+        self.used = set()
+        self.occurrences = {}
+
+    def register(self, base):
+        """
+        register Returns the identifier of the next heading of the document, given the one derived from its text (see slug)
+        """
+        if self.flavor == GFM:
+            if not base:
+                return ''
+            n = self.occurrences.get(base, 0)
+            self.occurrences[base] = n + 1
+            return f"{base}-{n}" if n else base
+
+        base = base or 'section'
+        unique = base
+        n = 0
+        while unique in self.used:
+            n += 1
+            unique = f"{base}-{n}"
+        self.used.add(unique)
+        return unique
+
+
+def latex_label(ident):
+    """
+    latex_label Escapes an identifier the way pandoc's LaTeX writer does for labels and hypertargets.
+    """
+    return ''.join(c if c.isascii() and c.isalnum() or c in '_-+=:;.' else f"ux{ord(c):x}" for c in ident)
+
+
+def pandoc_identifiers(markdown, flavor=MARKDOWN):
+    """
+    pandoc_identifiers Runs the real pandoc over a document and returns the labels of all its headings, in order.
+    """
+    latex = subprocess.check_output(['pandoc', '-f', flavor, '-t', 'latex'], input=markdown.encode()).decode()
+    return re.findall(r'\\label\{([^}]*)\}', latex)
+
+
+def document_identifiers(document, flavor=MARKDOWN):
+    """
+    document_identifiers Returns the native identifiers of every header of a pandoc JSON document, in order
+    """
+    registry = IdentifierRegistry(flavor)
+    return [registry.register(slug(inline_text(inlines), flavor)) for _, inlines in iter_headers(document['blocks'])]
+
+
+def verify_parity(markdown, flavor=MARKDOWN):
+    """
+    verify_parity Compares the native identifiers of a document with the ones generated by pandoc.
+
+    :return: A list of (native, pandoc) label pairs that differ. Empty when both agree.
+    """
+    document = json.loads(subprocess.check_output(['pandoc', '-f', flavor, '-t', 'json'], input=markdown.encode()))
+    native = [latex_label(i) for i in document_identifiers(document, flavor) if i]
+    expected = pandoc_identifiers(markdown, flavor)
+    if len(native) != len(expected):
+        return [(native, expected)]
+    return [(n, p) for n, p in zip(native, expected) if n != p]
+
+
+def parity_check_enabled():
+    return os.getenv(PARITY_ENV, '') not in ('', '0')
@@ -0,0 +1,243 @@
+"""
+Builds the report as a graph of stages.
+
+Every stage declares the files it reads and the files it writes. A stage
+depends on the earlier stages that write the files it reads, and it only runs
+when it is stale: when its inputs or parameters changed since it last ran, or
+when one of its outputs is missing or was changed by something else. Inputs
+are compared by content hash, so a stage that runs again and writes the same
+files doesn't make the stages after it stale. Stages whose dependencies are
+done run concurrently.
+
+The fingerprints of the stages that ran are kept in working/.cache/build.json.
+A stage can rewrite one of its inputs (the linter rewrites report.md in place):
+its fingerprint is taken after it runs, so its own output doesn't make it
+stale, and the stage that wrote the file before it doesn't check it.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import hashlib
+import json
+import os
+import threading
+import time
+
+BUILD_STATE = './working/.cache/build.json'
+
+MAX_WORKERS = os.cpu_count() or 1
+
+
+class Stage:
+    def __init__(self, name, action, inputs=(), outputs=(), params=(), always=False):
+        """
+        :param name: Unique name of the stage, e.g. 'convert:disclaimer'
+        :param action: Function without arguments that runs the stage
+        :param inputs: Paths of the files the stage reads
+        :param outputs: Paths of the files the stage writes
+        :param params: Strings of everything else that changes what the stage does, e.g. a pandoc reader
+        :param always: Whether the stage reads something that can't be fingerprinted, like GitHub, and always runs
+        """
+        self.name = name
+        self.action = action
+        # Normalized, so './source/report.md' and 'source/report.md' are the same file
+        self.inputs = [os.path.normpath(path) for path in inputs]
+        self.outputs = [os.path.normpath(path) for path in outputs]
+        self.params = [str(param) for param in params]
+        self.always = always
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        for part in [self.name] + self.params:
+            digest.update(part.encode() + b'\0')
+        for path in self.inputs:
+            digest.update(path.encode() + b'\0' + (file_hash(path) or 'missing').encode() + b'\0')
+        return digest.hexdigest()
+
+    def matches(self, name):
+        # 'convert' selects every 'convert:...' stage
+        return self.name == name or self.name.startswith(name + ':')
+
+
+def file_hash(path):
+    """
+    file_hash Returns the sha256 of the contents of a file, or None if it doesn't exist
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_state(path=BUILD_STATE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state, path=BUILD_STATE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def dependencies(stages):
+    """
+    dependencies Returns the names of the stages every stage depends on: the earlier stages that write its inputs
+    """
+    writers = {}
+    result = {}
+    for stage in stages:
+        result[stage.name] = {writers[path] for path in stage.inputs if path in writers}
+        for path in stage.outputs:
+            writers[path] = stage.name
+    return result
+
+
+def dependents(stages, names):
+    """
+    dependents Returns the given stages and every stage that depends on them, directly or not
+    """
+    selected = set(names)
+    for stage, depends_on in dependencies(stages).items():
+        if depends_on & selected:
+            selected.add(stage)
+    return selected
+
+
+def last_writers(stages):
+    """
+    last_writers Returns the name of the last stage that writes every output
+    """
+    return {path: stage.name for stage in stages for path in stage.outputs}
+
+
+def is_stale(stage, state, outputs=None):
+    """
+    is_stale Returns whether a stage has to run again
+
+    :param outputs: The outputs to check, by default all of them. Outputs that a later stage rewrites aren't
+        checked, as they are expected to change.
+    """
+    recorded = state.get(stage.name)
+    if stage.always or recorded is None or recorded['fingerprint'] != stage.fingerprint():
+        return True
+    return any(file_hash(path) != recorded['outputs'].get(path)
+               for path in (stage.outputs if outputs is None else outputs))
+
+
+def select(stages, only=None, start=None):
+    """
+    select Returns the names of the stages to run whether they are stale or not, and the names of the stages to skip
+
+    :param only: Name of the stage to run on its own, e.g. 'lint' or 'convert' for all the conversions
+    :param start: Name of the stage to run with every stage that depends on it
+    :return: (forced, skipped) sets of stage names, both empty for a normal build.
+    """
+    names = {stage.name for stage in stages}
+    name = only or start
+    if name is None:
+        return set(), set()
+
+    matching = {stage.name for stage in stages if stage.matches(name)}
+    if not matching:
+        print(f"Unknown stage '{name}'. The stages are: {', '.join(stage.name for stage in stages)}.")
+        exit(1)
+
+    forced = matching if only else dependents(stages, matching)
+    return forced, names - forced
+
+
+def affected(stages, paths):
+    """
+    affected Returns the names of the stages that read one of the given files, and of every stage that depends on them
+    """
+    paths = {os.path.normpath(path) for path in paths}
+    return dependents(stages, {stage.name for stage in stages if paths.intersection(stage.inputs)})
+
+
+def run(stages, only=None, start=None, max_workers=MAX_WORKERS, state_path=BUILD_STATE, changed=None):
+    """
+    run Runs the stale stages, each one once its dependencies are done
+
+    A stage that fails (raises or exits) doesn't stop the stages that don't depend on it, e.g. the Solodit export
+    is still written when the compilation fails. Once they are done, the stages that failed and the ones they kept
+    from running are printed, and the first failure is raised again.
+
+    :param stages: List of Stage, in pipeline order
+    :param only: Name of the stage to run on its own, stale or not
+    :param start: Name of the stage to run, stale or not, with every stage that depends on it
+    :param changed: Paths of the only files known to have changed, e.g. by watch mode. Only the stages they affect
+        are checked, and the others are skipped without hashing their inputs.
+    :return: Dictionary of the seconds every stage that ran took, by name.
+    """
+    depends_on = dependencies(stages)
+    writers = last_writers(stages)
+    forced, skipped = select(stages, only, start)
+    if changed is not None:
+        skipped |= {stage.name for stage in stages} - affected(stages, changed)
+    state = load_state(state_path)
+    state_lock = threading.Lock()
+
+    pending = {stage.name: stage for stage in stages}
+    done = set()
+    ran = {}
+
+    def execute(stage):
+        start_time = time.perf_counter()
+        stage.action()
+        elapsed = time.perf_counter() - start_time
+        with state_lock:
+            state[stage.name] = {
+                'fingerprint': stage.fingerprint(),
+                'outputs': {path: file_hash(path) for path in stage.outputs},
+            }
+            save_state(state, state_path)
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        failure = None
+        failed = set()
+        blocked = set()
+        while pending or running:
+            # Skipping a stage can make the next ones ready, so go on until nothing is ready
+            ready = True
+            while ready:
+                ready = [name for name in pending if depends_on[name] <= done]
+                for name in ready:
+                    stage = pending.pop(name)
+                    outputs = [path for path in stage.outputs if writers[path] == name]
+                    if name in skipped or (name not in forced and not is_stale(stage, state, outputs)):
+                        done.add(name)
+                    else:
+                        running[pool.submit(execute, stage)] = name
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    ran[name] = future.result()
+                    done.add(name)
+                except BaseException as e:
+                    failure = failure or e
+                    failed.add(name)
+                    # The stages that depend on it can't run
+                    for dependent in dependents(stages, {name}) - {name}:
+                        if pending.pop(dependent, None) is not None:
+                            blocked.add(dependent)
+
+        if failure is not None:
+            order = [stage.name for stage in stages]
+            print(f"Failed stages: {', '.join(name for name in order if name in failed)}.")
+            if blocked:
+                print(f"Skipped because a stage they depend on failed: {', '.join(name for name in order if name in blocked)}.")
+            raise failure
+
+    return ran
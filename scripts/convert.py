@@ -0,0 +1,409 @@
+"""
+Converts the markdown sources of the report to LaTeX with pandoc.
+
+Every conversion is a stage of the report build (see generate_report.py and
+build.py), so only the files that changed are converted, and the conversions
+run concurrently. Each one appends its output to the conversion log as a
+single entry.
+
+The report filters (see pandoc_filters.py) are applied in one of two ways:
+- 'inprocess': pandoc writes the document as JSON, the filters run in this
+  process and a second pandoc turns the result into LaTeX. No Python
+  interpreter is started for the filters.
+- 'filter': pandoc runs scripts/pandoc-filter.py as its only --filter.
+
+Converted files are cached under working/, keyed on everything that can change
+the output: the input bytes, the pandoc version, the reader and filter mode,
+and the source of the filters and of the conversion. Unchanged inputs are
+restored from the cache instead of running pandoc again.
+
+report.tex goes through the rewrites of postprocess.py before it is written.
+
+report.md is split on the markers get_issues writes around every finding (see
+fragments.py), and each finding is converted, post-processed and cached on its
+own. Editing one finding only converts that finding again; the others come from
+the cache and are stitched back together. pandoc numbers duplicate headings
+across the whole document, so the cache keeps the identifier of every header
+pandoc read along with the LaTeX of the finding, and the labels are numbered
+again once the document is stitched. Every fragment also gets a hypertarget
+named after its marker, which the summary of findings links to.
+"""
+
+from functools import lru_cache
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+
+from . import anchors, fragments, highlight, pandoc_filters, postprocess
+
+CONVERSION_LOG = './working/conversion.log'
+
+FILTER_SCRIPT = './scripts/pandoc-filter.py'
+FILTER_MODE = 'inprocess'
+
+# Every file whose contents change the converted LaTeX: the filters, the post-processing and the stitching of fragments
+CONVERSION_SOURCES = [__file__, anchors.__file__, fragments.__file__, pandoc_filters.__file__, highlight.__file__,
+                      postprocess.__file__, FILTER_SCRIPT]
+
+CONVERSION_CACHE = './working/.cache/conversion'
+CONVERSION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# A paragraph that separates fragments converted in the same pandoc run
+FRAGMENT_BOUNDARY = 'ReportFragmentBoundary'
+FRAGMENT_BOUNDARY_PATTERN = re.compile(r'\n*^' + FRAGMENT_BOUNDARY + r'$\n*', re.MULTILINE)
+FRAGMENT_BOUNDARY_BLOCK = {'t': 'Para', 'c': [{'t': 'Str', 'c': FRAGMENT_BOUNDARY}]}
+
+LABEL_PATTERN = re.compile(r'\\label\{([^}]*)\}')
+LABEL_OR_HYPERTARGET_PATTERN = re.compile(r'\\(label|hypertarget)\{([^}]*)\}')
+
+# Input file, output file and pandoc reader of every conversion.
+# protocol_summary.md and executive_summary.md use --from markdown (not gfm)
+# so pandoc honours dash-ratio column widths in tables. Under --from gfm, all
+# columns render as auto-width (l/c) and long cells can push later columns off
+# the page; --from markdown emits p{width%} columns matching the dash ratios.
+CONVERSIONS = [
+    ('./working/lead_auditors.md', './working/lead_auditors.tex', 'gfm'),
+    ('./working/assisting_auditors.md', './working/assisting_auditors.tex', 'gfm'),
+    ('./source/about_cyfrin.md', './working/about_cyfrin.tex', 'gfm'),
+    ('./source/disclaimer.md', './working/disclaimer.tex', 'gfm'),
+    ('./source/protocol_summary.md', './working/protocol_summary.tex', 'markdown'),
+    ('./source/audit_scope.md', './working/audit_scope.tex', 'gfm'),
+    ('./source/executive_summary.md', './working/executive_summary.tex', 'markdown'),
+    ('./source/report.md', './working/report.tex', 'gfm'),
+    ('./source/additional_comments.md', './working/additional_comments.tex', 'gfm'),
+    ('./source/appendix.md', './working/appendix.tex', 'gfm'),
+]
+
+# Conversions run on their own (see convert_file) share the conversion log
+_log_lock = threading.Lock()
+
+
+def pandoc_command(reader, highlight_mode=highlight.HIGHLIGHT_MODE):
+    return ['pandoc', '--filter', FILTER_SCRIPT, '--from', reader, '--to', 'latex',
+            '--metadata', f'highlight={highlight_mode}']
+
+
+def run_pandoc(command, input=None):
+    return subprocess.run(command, input=input, capture_output=True, text=True, encoding='utf-8')
+
+
+def read_markdown(markdown, reader, highlight_mode=highlight.HIGHLIGHT_MODE):
+    """
+    read_markdown Parses markdown text with pandoc, without the report filters
+
+    :return: The completed process, with the document as pandoc JSON as its stdout.
+    """
+    return run_pandoc(['pandoc', '--from', reader, '--to', 'json', '--metadata', f'highlight={highlight_mode}'],
+                      input=markdown)
+
+
+def markdown_to_latex(markdown, reader, filter_mode=FILTER_MODE, highlight_mode=highlight.HIGHLIGHT_MODE, parsed=None):
+    """
+    markdown_to_latex Converts markdown text to LaTeX with pandoc and the report filters
+
+    :param markdown: The text to convert
+    :param reader: pandoc reader, 'gfm' or 'markdown'
+    :param filter_mode: 'inprocess' or 'filter', see the module docstring
+    :param highlight_mode: 'minted' or 'pygments', see highlight.py
+    :param parsed: The completed process of read_markdown for the same text, if the caller already has it. The
+        'inprocess' mode filters it instead of parsing the text again.
+    :return: The completed process of the last pandoc run, with the LaTeX as its stdout and the errors of all runs.
+    """
+    if filter_mode == 'filter':
+        return run_pandoc(pandoc_command(reader, highlight_mode), input=markdown)
+
+    to_json = parsed or read_markdown(markdown, reader, highlight_mode)
+    if to_json.returncode != 0:
+        return to_json
+
+    document = pandoc_filters.filter_document(to_json.stdout, 'latex')
+
+    to_latex = run_pandoc(['pandoc', '--from', 'json', '--to', 'latex'], input=document)
+    to_latex.stderr = to_json.stderr + to_latex.stderr
+    return to_latex
+
+
+@lru_cache(maxsize=None)
+def pandoc_version():
+    return run_pandoc(['pandoc', '--version']).stdout.split('\n')[0]
+
+
+@lru_cache(maxsize=None)
+def sources_hash():
+    digest = hashlib.sha256()
+    for path in CONVERSION_SOURCES:
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def cache_key(data, reader, filter_mode, highlight_mode=highlight.HIGHLIGHT_MODE, rewrite=False):
+    """
+    cache_key Returns the key of a conversion in the cache
+
+    :param data: The bytes of the markdown to convert
+    :param rewrite: Whether the LaTeX goes through the rewrites of postprocess.py
+    """
+    digest = hashlib.sha256()
+    for part in (pandoc_version(), highlight.PYGMENTS_VERSION, reader, filter_mode, highlight_mode, str(rewrite),
+                 sources_hash()):
+        digest.update(part.encode() + b'\0')
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def convert_together(texts, reader, filter_mode=FILTER_MODE, highlight_mode=highlight.HIGHLIGHT_MODE, rewrite=False):
+    """
+    convert_together Converts fragments in a single pandoc run, separated by a paragraph the output is split on
+
+    :param texts: The markdown of the fragments
+    :param rewrite: Whether to apply the rewrites of postprocess.py to the LaTeX of every fragment
+    :return: The completed process, and a {'latex': ..., 'headers': [[identifier, base], ...]} dictionary for every
+        fragment, with the identifier pandoc gave every header in this run and the one derived from its text alone.
+        The list is None if pandoc failed, or if a fragment swallowed a boundary (e.g. an unclosed code fence).
+    """
+    markdown = f"\n\n{FRAGMENT_BOUNDARY}\n\n".join(texts)
+    parsed = read_markdown(markdown, reader, highlight_mode)
+    if parsed.returncode != 0:
+        return parsed, None
+    result = markdown_to_latex(markdown, reader, filter_mode, highlight_mode, parsed)
+    if result.returncode != 0:
+        return result, None
+
+    groups = [[]]
+    for block in json.loads(parsed.stdout)['blocks']:
+        if block == FRAGMENT_BOUNDARY_BLOCK:
+            groups.append([])
+        else:
+            groups[-1].append(block)
+    latex = FRAGMENT_BOUNDARY_PATTERN.split(result.stdout)
+    if len(groups) != len(texts) or len(latex) != len(texts):
+        return result, None
+
+    flavor = anchors.GFM if reader == 'gfm' else anchors.MARKDOWN
+    converted = []
+    for tex, blocks in zip(latex, groups):
+        tex = tex.strip('\n')
+        if rewrite:
+            tex = postprocess.postprocess(tex)
+        headers = [[ident, anchors.slug(anchors.inline_text(inlines), flavor)]
+                   for ident, inlines in anchors.iter_headers(blocks)]
+        converted.append({'latex': tex, 'headers': headers})
+    return result, converted
+
+
+def numbered_consistently(fragment, flavor):
+    """
+    numbered_consistently Returns whether the labels of a converted fragment can be numbered again
+
+    They can if they are the identifiers of its headers, in order, and every identifier is the one derived from the
+    text of the header, with or without a '-n' suffix. Explicit identifiers, for instance, are not.
+    """
+    labels = [anchors.latex_label(ident) for ident, _ in fragment['headers'] if ident]
+    if LABEL_PATTERN.findall(fragment['latex']) != labels:
+        return False
+    for ident, base in fragment['headers']:
+        if flavor == anchors.MARKDOWN:
+            base = base or 'section'
+        if ident != base and not re.fullmatch(re.escape(base) + r'-\d+', ident):
+            return False
+    return True
+
+
+def renumber_labels(converted, flavor):
+    """
+    renumber_labels Gives the headings of separately converted fragments the labels pandoc would generate for the
+    whole document, where duplicate headings get '-1', '-2', ... suffixes
+
+    :param converted: The fragments from convert_together, in document order, all numbered_consistently
+    :return: The LaTeX of every fragment.
+    """
+    registry = anchors.IdentifierRegistry(flavor)
+    latex = []
+    for fragment in converted:
+        old = [anchors.latex_label(ident) for ident, _ in fragment['headers'] if ident]
+        new = [anchors.latex_label(ident) for ident in (registry.register(base) for _, base in fragment['headers']) if ident]
+        position = 0
+
+        def replace(match):
+            # A \hypertarget comes right before the \label of the same heading
+            nonlocal position
+            command, label = match.groups()
+            if position == len(old) or label != old[position]:
+                return match.group(0)
+            replacement = f"\\{command}{{{new[position]}}}"
+            if command == 'label':
+                position += 1
+            return replacement
+
+        latex.append(LABEL_OR_HYPERTARGET_PATTERN.sub(replace, fragment['latex']) if old != new else fragment['latex'])
+    return latex
+
+
+def with_target(latex, target):
+    """
+    with_target Adds the hypertarget of a fragment (see fragments.targets) after the label of its first heading,
+    or at its start if it has none
+    """
+    if not latex:
+        return latex
+    anchor = f"\\hypertarget{{{anchors.latex_label(target)}}}{{}}"
+    match = LABEL_PATTERN.search(latex)
+    if match is None:
+        return f"{anchor}%\n{latex}"
+    return latex[:match.end()] + anchor + latex[match.end():]
+
+
+def convert_fragments(markdown, reader, filter_mode=FILTER_MODE, cache=None, highlight_mode=highlight.HIGHLIGHT_MODE,
+                      rewrite=False):
+    """
+    convert_fragments Converts a document split with fragment markers one fragment at a time
+
+    Fragments found in the cache are reused, the others are converted together in a single pandoc run and cached on
+    their own. The results are stitched back together, and the headings are numbered again from the headers pandoc
+    read, as if the whole document had been converted at once. If the labels of a fragment can't be numbered again
+    (see numbered_consistently), the whole document is converted in a single run instead, and nothing is cached.
+
+    :param markdown: The whole document, with its fragment markers
+    :param rewrite: Whether to apply the rewrites of postprocess.py to every fragment, before it is cached
+    :return: The completed process, with the LaTeX of the whole document as its stdout, and the number of converted fragments.
+    """
+    flavor = anchors.GFM if reader == 'gfm' else anchors.MARKDOWN
+    parts = fragments.split_fragments(markdown)
+    texts = [text for _, text in parts]
+    keys = [f"{name}-{cache_key(text.encode(), reader, filter_mode, highlight_mode, rewrite)}" for name, text in parts]
+    converted = [None] * len(parts)
+    if cache is not None:
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is not None:
+                converted[i] = json.loads(cached)
+    missing = [i for i, fragment in enumerate(converted) if fragment is None]
+
+    stderr = ''
+    together = True
+    if missing:
+        result, fresh = convert_together([texts[i] for i in missing], reader, filter_mode, highlight_mode, rewrite)
+        if result.returncode == 0 and fresh is None:
+            # A fragment swallowed the boundary (e.g. an unclosed code fence), convert them one by one
+            together = False
+            fresh = []
+            for i in missing:
+                result, one = convert_together([texts[i]], reader, filter_mode, highlight_mode, rewrite)
+                if result.returncode != 0:
+                    break
+                stderr += result.stderr
+                fresh.extend(one)
+        else:
+            stderr += result.stderr
+        if result.returncode != 0:
+            return result, len(missing)
+
+        for i, fragment in zip(missing, fresh):
+            converted[i] = fragment
+            if cache is not None and numbered_consistently(fragment, flavor):
+                cache.put(keys[i], json.dumps(fragment).encode())
+
+    if all(numbered_consistently(fragment, flavor) for fragment in converted):
+        latex = renumber_labels(converted, flavor)
+    else:
+        # The labels of a single run of the whole document are the ones pandoc generates for it
+        if len(missing) < len(parts) or not together:
+            result, converted = convert_together(texts, reader, filter_mode, highlight_mode, rewrite)
+            if result.returncode != 0:
+                return result, len(parts)
+            if converted is None:
+                result.returncode = 1
+                result.stderr += ("The headings of the fragments can't be numbered like pandoc does for the whole "
+                                  "document, and a fragment swallows the ones after it (e.g. an unclosed code fence).\n")
+                return result, len(parts)
+            stderr = result.stderr
+            missing = range(len(parts))
+        latex = [fragment['latex'] for fragment in converted]
+
+    latex = [with_target(tex, target) for tex, target in zip(latex, fragments.targets(name for name, _ in parts))]
+    document = '\n\n'.join(tex for tex in latex if tex) + '\n'
+
+    if anchors.parity_check_enabled():
+        expected = anchors.pandoc_identifiers(markdown, reader)
+        if LABEL_PATTERN.findall(document) != expected:
+            stderr += f"Warning: the labels of the stitched fragments differ from pandoc's: {expected}\n"
+    return subprocess.CompletedProcess(args=[], returncode=0, stdout=document, stderr=stderr), len(missing)
+
+
+def run_conversion(conversion, filter_mode=FILTER_MODE, cache=None, highlight_mode=highlight.HIGHLIGHT_MODE):
+    """
+    run_conversion Runs a single pandoc conversion, or restores its output from the cache
+
+    Files with fragment markers (see fragments.py) are converted fragment by fragment. report.tex goes through the
+    rewrites of postprocess.py.
+
+    :param conversion: A (source, output, reader) tuple from CONVERSIONS
+    :param filter_mode: 'inprocess' or 'filter', see the module docstring
+    :param cache: DiskCache for converted files, or None to always run pandoc
+    :param highlight_mode: 'minted' or 'pygments', see highlight.py
+    :return: The completed process, the time it took in seconds and a short description of what was done.
+    """
+    source, output, reader = conversion
+    start = time.perf_counter()
+    rewrite = os.path.abspath(output) == os.path.abspath(postprocess.REPORT_TEX)
+
+    with open(source, 'rb') as f:
+        data = f.read()
+
+    if cache is not None:
+        key = cache_key(data, reader, filter_mode, highlight_mode, rewrite)
+        cached = cache.get(key)
+        if cached is not None:
+            with open(output, 'wb') as f:
+                f.write(cached)
+            result = subprocess.CompletedProcess(args=[], returncode=0, stdout='', stderr='')
+            return result, time.perf_counter() - start, "restored from cache"
+
+    markdown = data.decode()
+    if fragments.MARKER_PATTERN.search(markdown):
+        result, converted = convert_fragments(markdown, reader, filter_mode, cache, highlight_mode, rewrite)
+        note = f"{converted} of {len(fragments.split_fragments(markdown))} fragments converted"
+    else:
+        result = markdown_to_latex(markdown, reader, filter_mode, highlight_mode)
+        if rewrite and result.returncode == 0:
+            result.stdout = postprocess.postprocess(result.stdout)
+        note = "converted"
+
+    if result.returncode != 0:
+        return result, time.perf_counter() - start, f"exit code {result.returncode}"
+
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(result.stdout)
+    if cache is not None:
+        cache.put(key, result.stdout.encode())
+
+    # The LaTeX went to the output file, only the errors belong in the log
+    result.stdout = ''
+    return result, time.perf_counter() - start, note
+
+
+def convert_file(conversion, filter_mode=FILTER_MODE, cache=None, highlight_mode=highlight.HIGHLIGHT_MODE):
+    """
+    convert_file Converts a single file, as a stage of the build
+
+    The conversion is appended to the conversion log, and the build exits if it fails.
+
+    :param conversion: A (source, output, reader) tuple from CONVERSIONS
+    :param cache: DiskCache for converted files, or None to always run pandoc
+    """
+    source, output, reader = conversion
+    result, elapsed, note = run_conversion(conversion, filter_mode, cache, highlight_mode)
+
+    with _log_lock, open(CONVERSION_LOG, 'a') as log:
+        log.write(f"==> {source} -> {output} (--from {reader}, {note}, {elapsed:.2f}s)\n")
+        log.write(result.stdout)
+        log.write(result.stderr)
+
+    if result.returncode != 0:
+        print(f"Conversion of '{source}' failed. Check '{CONVERSION_LOG}' for details.")
+        exit(1)
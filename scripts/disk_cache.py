@@ -0,0 +1,148 @@
+"""
+A small content-addressed cache of files on disk.
+
+Entries are files named after their key. Reading an entry refreshes its
+modification time, so when the cache grows over its size limit the least
+recently used entries are evicted first. The size of the cache is only read
+from the directory once, and then kept up to date by every write, so writing
+an entry doesn't list the whole directory unless something has to be evicted.
+Entries written by other processes are counted the next time it is listed.
+
+A cache that is shared between builds (e.g. one outside the repository) can
+store a checksum with every entry. Entries that don't match their checksum,
+like files truncated by a full disk, are removed and count as misses.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes, suffix='', checksum=False):
+        """
+        :param directory: Where the entries are stored. Created if it does not exist.
+        :param max_bytes: Size limit of all the entries together
+        :param suffix: File extension of the entries, e.g. '.tex'
+        :param checksum: Whether to store a sha256 with every entry and check it when the entry is read
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.checksum = checksum
+        self.hits = 0
+        self.misses = 0
+        # Total size of the entries, read from the directory on the first write
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key, touch=True):
+        """
+        get Returns the cached bytes for a key, or None if there is no such entry.
+
+        :param touch: Whether to mark the entry as recently used
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as entry:
+                data = entry.read()
+            if self.checksum:
+                data = self._verified(data)
+                if data is None:
+                    os.remove(path)
+                    raise FileNotFoundError(path)
+            if touch:
+                os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        put Stores the bytes of a key, then evicts old entries if the cache is over its size limit.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first, so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as entry:
+            if self.checksum:
+                entry.write(hashlib.sha256(data).hexdigest().encode() + b'\n')
+            entry.write(data)
+            size = entry.tell()
+        path = self.path(key)
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry_size for _, entry_size, _ in self.entries())
+            else:
+                self._size += size - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    @staticmethod
+    def _verified(stored):
+        """
+        _verified Returns the data of an entry stored with its checksum, or None if it doesn't match.
+        """
+        digest, _, data = stored.partition(b'\n')
+        if hashlib.sha256(data).hexdigest().encode() != digest:
+            return None
+        return data
+
+    def keys(self):
+        names = [os.path.basename(path) for _, _, path in self.entries()]
+        return [name[:len(name) - len(self.suffix)] for name in names]
+
+    def entries(self):
+        """
+        entries Returns (modification time, size, path) of every entry, oldest first.
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+
+        for name in names:
+            if not name.endswith(self.suffix) or name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def summary(self):
+        return f"{self.hits} hits, {self.misses} misses"
@@ -1,19 +1,158 @@
+import json
 import os
-import requests
 import re
-from dotenv import load_dotenv
-from github import Auth, Github
-from .helpers import get_issues, get_summary_information
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .github_transport import get_transport
+from .findings import Findings
+from .helpers import get_issues, get_phase_information, get_summary_information, write_report_and_counts
+from .issue_store import IssueStore
+from .snapshot import Snapshot, load_snapshots, save_snapshots
 
 
-load_dotenv()
+# Phases of a combined report fetched at the same time, enough for all of them
+MAX_PHASE_WORKERS = 9
 
-# Load github repo information and personal access token
-REPO = get_summary_information()['private_github'].rstrip('/')
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-# Use the non-deprecated Auth.Token API when a token is available, otherwise
-# fall back to an anonymous client (e.g. first clone before a token is set).
-github = Github(auth=Auth.Token(GITHUB_TOKEN)) if GITHUB_TOKEN else Github()
+# The largest page GitHub's GraphQL API allows
+PAGE_SIZE = 100
+
+# Everything get_issues needs from an issue, labels included, so no follow-up requests are made
+ISSUE_FIELDS = """
+fragment IssueFields on Issue {
+    number
+    title
+    body
+    state
+    url
+    createdAt
+    updatedAt
+    labels(first: 100) {
+        nodes {
+            name
+        }
+    }
+}
+"""
+
+# The issues connection only has issues, pull requests are excluded by GitHub.
+# Oldest first, the order the findings are numbered in. $labels is null when not filtering by label.
+REPOSITORY_ISSUES_QUERY = """
+query RepositoryIssues($owner: String!, $name: String!, $pageSize: Int!, $cursor: String, $labels: [String!]) {
+    repository(owner: $owner, name: $name) {
+        issues(first: $pageSize, after: $cursor, states: [OPEN], labels: $labels,
+               orderBy: {field: CREATED_AT, direction: ASC}) {
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+            nodes {
+                ...IssueFields
+            }
+        }
+    }
+}
+""" + ISSUE_FIELDS
+
+# Only the number and labels of the open issues, to find the issues closed or relabeled since the last sync
+OPEN_ISSUE_LABELS_QUERY = """
+query OpenIssueLabels($owner: String!, $name: String!, $pageSize: Int!, $cursor: String, $labels: [String!]) {
+    repository(owner: $owner, name: $name) {
+        issues(first: $pageSize, after: $cursor, states: [OPEN], labels: $labels) {
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+            nodes {
+                number
+                labels(first: 100) {
+                    nodes {
+                        name
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+# Number of issues requested by number in a single query, each one as an alias of `issue(number:)`
+ISSUES_PER_QUERY = 50
+
+# Ids of the project, field and option of every column looked up before
+PROJECT_CACHE = './working/.cache/projects.json'
+_project_cache_lock = threading.Lock()
+
+# The column of an item, and the issue it is for
+PROJECT_ITEM_FIELDS = """
+fragment ProjectItemFields on ProjectV2ItemConnection {
+    pageInfo {
+        hasNextPage
+        endCursor
+    }
+    nodes {
+        fieldValues(first: 100) {
+            nodes {
+                ... on ProjectV2ItemFieldSingleSelectValue {
+                    optionId
+                    field {
+                        ... on ProjectV2FieldCommon {
+                            id
+                        }
+                    }
+                }
+            }
+        }
+        content {
+            ... on Issue {
+                number
+                repository {
+                    name
+                }
+            }
+        }
+    }
+}
+"""
+
+# Organizations and users both own projects, so the owner is looked up as either
+PROJECT_COLUMN_QUERY = """
+query ProjectColumn($owner: String!, $number: Int!, $pageSize: Int!) {
+    repositoryOwner(login: $owner) {
+        ... on ProjectV2Owner {
+            projectV2(number: $number) {
+                id
+                fields(first: 100) {
+                    nodes {
+                        ... on ProjectV2SingleSelectField {
+                            id
+                            name
+                            options {
+                                id
+                                name
+                            }
+                        }
+                    }
+                }
+                items(first: $pageSize) {
+                    ...ProjectItemFields
+                }
+            }
+        }
+    }
+}
+""" + PROJECT_ITEM_FIELDS
+
+PROJECT_ITEMS_QUERY = """
+query ProjectItems($projectId: ID!, $pageSize: Int!, $cursor: String) {
+    node(id: $projectId) {
+        ... on ProjectV2 {
+            items(first: $pageSize, after: $cursor) {
+                ...ProjectItemFields
+            }
+        }
+    }
+}
+""" + PROJECT_ITEM_FIELDS
 
 def extract_github_owner_repo(repo_url):
     """
@@ -41,30 +180,97 @@ def extract_github_owner_repo(repo_url):
     # If we can't parse it, return None
     return None, None
 
-def fetch_issues():
-    # Get summary information for filters
+def fetch_issues(record=None, replay=None):
+    """
+    fetch_issues Fetches the issues of the report and writes report.md from them
+
+    A combined report fetches the repositories of all its [phase_N] sections concurrently, so it takes
+    about as long as its slowest phase. The #xx links of every repository are resolved on their own,
+    then the issues are merged by severity, in the order of the phases.
+
+    :param record: Path of a snapshot to save the fetched issues and project columns to
+    :param replay: Path of a snapshot to read the issues and project columns from, instead of GitHub
+    :return: The total number of issues in the report.
+    """
     summary_info = get_summary_information()
 
+    # A report without phases has a single one, the repository of [summary]
+    phases = get_phase_information()
+    if not phases:
+        phases = [dict(summary_info, name=summary_info['project_name'])]
+
+    snapshots = []
+    if replay:
+        recorded = load_snapshots(replay)
+        print(f"Replaying the issues recorded from {replay}, GitHub is not contacted.")
+    for phase in phases:
+        repository = phase['private_github'].rstrip('/')
+        if not replay:
+            snapshots.append(Snapshot(repository))
+        elif repository in recorded:
+            snapshots.append(recorded[repository])
+        elif len(phases) == 1 and len(recorded) == 1:
+            snapshot = next(iter(recorded.values()))
+            print(f"Warning: the snapshot is of {snapshot.repository}, not {repository}.")
+            snapshots.append(snapshot)
+        else:
+            print(f"Couldn't find the issues of {repository} in the snapshot {replay}.")
+            return 0
+
+    with ThreadPoolExecutor(max_workers=min(MAX_PHASE_WORKERS, len(phases))) as executor:
+        futures = [executor.submit(fetch_issues_for_phase, phase, snapshot, bool(replay))
+                   for phase, snapshot in zip(phases, snapshots)]
+        results = [future.result() for future in futures]
+
+    if any(result is None for result in results):
+        return 0
+
+    if record:
+        save_snapshots(record, snapshots)
+        print(f"Recorded the issues of {len(snapshots)} repositories to {record}.")
+
+    # This will create `report.md` and `severity_counts.conf`
+    issues_obtained = write_report_and_counts(Findings.merge(results))
+    if(issues_obtained) > 0:
+        print(f"Done. {issues_obtained} issues obtained.")
+    else:
+        print(f"Done. No issues obtained.")
+    if not replay:
+        print(f"GitHub API: {get_transport().summary()}\n")
+    return issues_obtained
+
+
+def fetch_issues_for_phase(phase, snapshot, replay=False):
+    """
+    fetch_issues_for_phase Fetches the issues of one repository, with the filters of its phase
+
+    :param phase: Dictionary with the private_github, project_number and filter_issue_* of the phase
+    :param snapshot: Snapshot to replay the issues from, or to record them in
+    :param replay: Whether to read the issues from the snapshot instead of GitHub
+    :return: The Findings of the repository, from get_issues, or None if the issues couldn't be fetched.
+    """
+    repository = phase['private_github'].rstrip('/')
+
     # Get filter options
-    filter_issue_id_list = summary_info.get('filter_issue_id_list', [])
-    filter_issue_label = summary_info.get('filter_issue_label', '')
-    filter_issue_column = summary_info.get('filter_issue_column', 'Report')
+    filter_issue_id_list = phase.get('filter_issue_id_list', [])
+    filter_issue_label = phase.get('filter_issue_label', '')
+    filter_issue_column = phase.get('filter_issue_column', 'Report')
 
     # Parse the GitHub repository string to get owner and repo name
-    repo_owner, repo_name = extract_github_owner_repo(REPO)
+    repo_owner, repo_name = extract_github_owner_repo(repository)
 
     if not repo_owner or not repo_name:
-        print(f"Invalid repository format: {REPO}")
+        print(f"Invalid repository format: {repository}")
         print("Expected format: owner/repo or https://github.com/owner/repo")
-        return 0
+        return None
 
-    print(f"Extracted owner: {repo_owner}, repo: {repo_name} from {REPO}")
+    print(f"Extracted owner: {repo_owner}, repo: {repo_name} from {repository}")
 
     # Initialize combined issue ID list
     combined_issue_ids = [str(id) for id in filter_issue_id_list] if filter_issue_id_list else []
 
     # Filter by project column if specified
-    project_number = summary_info.get('project_number')
+    project_number = phase.get('project_number')
     if filter_issue_column and project_number:
         # Validate project_number is not empty
         if not str(project_number).strip():
@@ -75,12 +281,16 @@ def fetch_issues():
                 project_number = int(project_number)
 
                 print(f"Fetching issues from column '{filter_issue_column}' in project #{project_number}...")
-                column_issue_numbers = get_issues_in_column(
-                    repo_owner,
-                    repo_name,
-                    project_number,
-                    filter_issue_column
-                )
+                if replay:
+                    column_issue_numbers = snapshot.issues_in_column(repo_owner, project_number, filter_issue_column)
+                else:
+                    column_issue_numbers = get_issues_in_column(
+                        repo_owner,
+                        repo_name,
+                        project_number,
+                        filter_issue_column
+                    )
+                    snapshot.add_column(repo_owner, project_number, filter_issue_column, column_issue_numbers)
 
                 if column_issue_numbers:
                     print(f"Found {len(column_issue_numbers)} issues in column '{filter_issue_column}'")
@@ -107,275 +317,414 @@ def fetch_issues():
                 print("Detailed error info: ", str(e))
                 # Continue without column filtering
 
-    # Prepare filter options for get_issues
-    filter_options = {
-        'issue_ids': combined_issue_ids if combined_issue_ids else None,
-        'label': filter_issue_label if filter_issue_label else None
-    }
+    # Get the issues from the repo: only the listed ones if there is a list, all of them otherwise
+    print(f"Fetching issues from repository {repository} with filters...")
+    try:
+        if replay and combined_issue_ids:
+            issues = snapshot.issues_by_number(combined_issue_ids, filter_issue_label)
+        elif replay:
+            issues = snapshot.open_issues(filter_issue_label)
+        elif combined_issue_ids:
+            issues = fetch_issues_by_number(repo_owner, repo_name, combined_issue_ids, filter_issue_label)
+        else:
+            with IssueStore() as store:
+                issues = sync_repository_issues(repo_owner, repo_name, store, filter_issue_label)
+    except Exception as e:
+        print(f"Couldn't fetch the issues from repository {repository}.\nError:{e} \n")
+        return None
 
-    # Get all issues from the repo. This will create `report.md` and `severity_counts.conf`
-    print(f"Fetching issues from repository {REPO} with filters...")
-    issues_obtained = get_issues(REPO, github, filter_options)
-    if(issues_obtained) > 0:
-        print(f"Done. {issues_obtained} issues obtained.\n")
-    else:
-        print(f"Done. No issues obtained.\n")
+    if not replay:
+        snapshot.add_issues(issues)
+
+    return get_issues(repository, issues)
 
 
 # GitHub Project API Functions
 
-def run_graphql_query(query, variables=None):
-    """Run a GraphQL query against GitHub's API"""
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Content-Type": "application/json",
-    }
-    
-    payload = {"query": query}
-    if variables:
-        payload["variables"] = variables
-    
-    response = requests.post("https://api.github.com/graphql", json=payload, headers=headers)
-    
-    # Check for HTTP errors
-    response.raise_for_status()
-    
-    # Parse the response
-    response_data = response.json()
-    
+def run_graphql_query(query, variables=None, allowed_errors=()):
+    """Run a GraphQL query against GitHub's API
+
+    Errors whose type is in allowed_errors (e.g. "NOT_FOUND") don't raise, their fields are null in the data.
+    """
+    response_data = get_transport().graphql(query, variables)
+
     # Check for GraphQL errors
-    if "errors" in response_data:
-        error_message = "; ".join([error.get("message", "Unknown error") for error in response_data["errors"]])
+    errors = [error for error in response_data.get("errors", []) if error.get("type") not in allowed_errors]
+    if errors:
+        error_message = "; ".join([error.get("message", "Unknown error") for error in errors])
         raise Exception(f"GraphQL Error: {error_message}")
     
     return response_data
 
-def get_organization_id(org_name):
-    """Get organization node ID from organization name"""
-    print(f"Looking up organization: {org_name}")
-    query = """
-    query($login: String!) {
-        organization(login: $login) {
-            id
-        }
+def issue_record(node):
+    """
+    issue_record Converts an issue of a GraphQL response to the dictionary get_issues reads
+
+    Keys: number, title, body, state ('open' or 'closed'), labels (list of names), html_url,
+    created_at and updated_at.
+    """
+    return {
+        'number': node['number'],
+        'title': node['title'],
+        'body': node['body'],
+        'state': node['state'].lower(),
+        'labels': [label['name'] for label in node['labels']['nodes']],
+        'html_url': node['url'],
+        'created_at': node['createdAt'],
+        'updated_at': node['updatedAt'],
     }
+
+
+def repository_issue_nodes(query, repo_owner, repo_name, label=None):
     """
-    variables = {"login": org_name}
-    try:
+    repository_issue_nodes Pages through the open issues of a repository, a page of 100 per request
+
+    :param query: REPOSITORY_ISSUES_QUERY or OPEN_ISSUE_LABELS_QUERY
+    :param label: Only fetch the issues with this label, filtered by GitHub
+    :return: Generator of the issue nodes of the responses.
+    """
+    cursor = None
+    while True:
+        variables = {"owner": repo_owner, "name": repo_name, "pageSize": PAGE_SIZE, "cursor": cursor,
+                     "labels": [label] if label else None}
         result = run_graphql_query(query, variables)
-        
-        # Check if organization data exists
-        if not result.get("data") or not result["data"].get("organization"):
-            raise Exception(f"Organization '{org_name}' not found. Check the repository owner name.")
-            
-        return result["data"]["organization"]["id"]
-    except Exception as e:
-        print(f"Could not find organization '{org_name}', trying as user instead: {str(e)}")
-        # Try as a user instead
-        return get_user_id(org_name)
-
-def get_user_id(user_name):
-    """Get user node ID from username"""
-    print(f"Looking up user: {user_name}")
-    query = """
-    query($login: String!) {
-        user(login: $login) {
-            id
-        }
-    }
+
+        repository = result["data"]["repository"]
+        if repository is None:
+            raise Exception(f"Repository '{repo_owner}/{repo_name}' not found")
+
+        connection = repository["issues"]
+        yield from connection["nodes"]
+
+        if not connection["pageInfo"]["hasNextPage"]:
+            return
+        cursor = connection["pageInfo"]["endCursor"]
+
+
+def fetch_repository_issues(repo_owner, repo_name, label=None):
     """
-    variables = {"login": user_name}
-    result = run_graphql_query(query, variables)
-    
-    # Check if user data exists
-    if not result.get("data") or not result["data"].get("user"):
-        raise Exception(f"User '{user_name}' not found. Check the repository owner name.")
-        
-    return result["data"]["user"]["id"]
-
-def get_project_id(owner_id, project_number):
-    """Get project ID from owner ID and project number"""
-    print(f"Looking up project #{project_number} for owner ID: {owner_id}")
-    query = """
-    query($ownerId: ID!, $number: Int!) {
-        node(id: $ownerId) {
-            ... on Organization {
-                projectV2(number: $number) {
-                    id
-                }
-            }
-            ... on User {
-                projectV2(number: $number) {
-                    id
-                }
-            }
-        }
+    fetch_repository_issues Fetches every open issue of a repository, a page of 100 per request
+
+    :param label: Only fetch the issues with this label, filtered by GitHub
+    :return: List of issue records (see issue_record), oldest first.
+    """
+    return [issue_record(node) for node in repository_issue_nodes(REPOSITORY_ISSUES_QUERY, repo_owner, repo_name, label)]
+
+def rest_issue_record(issue):
+    """
+    rest_issue_record Converts an issue of a REST response to the same dictionary as issue_record
+    """
+    return {
+        'number': issue['number'],
+        'title': issue['title'],
+        'body': issue['body'] or '',
+        'state': issue['state'],
+        'labels': [label['name'] for label in issue['labels']],
+        'html_url': issue['html_url'],
+        'created_at': issue['created_at'],
+        'updated_at': issue['updated_at'],
     }
+
+
+def rest_issue_pages(repo_owner, repo_name, params):
     """
-    variables = {"ownerId": owner_id, "number": project_number}
-    result = run_graphql_query(query, variables)
-    
-    # Check if node data exists
-    if not result.get("data") or not result["data"].get("node"):
-        raise Exception(f"Node with ID '{owner_id}' not found")
-    
-    # Check if owner has a project with the given number
-    node_data = result["data"]["node"]
-    if not node_data.get("projectV2"):
-        raise Exception(f"Project #{project_number} not found for the given owner. Check your project_number in the config.")
-    
-    return node_data["projectV2"]["id"]
+    rest_issue_pages Lists the issues of a repository with the REST API, following the pages of its Link header
+
+    These are conditional GET requests: the pages that haven't changed since the last build are
+    replayed from the transport's cache, and cost no rate limit.
+
+    :param params: Query parameters of the first page, e.g. {'state': 'open'}
+    :return: Generator of the issues, pull requests excluded.
+    """
+    transport = get_transport()
+    response = transport.get(f"repos/{repo_owner}/{repo_name}/issues", params=dict(params, per_page=PAGE_SIZE))
+    while True:
+        if response.status_code == 404:
+            raise Exception(f"Repository '{repo_owner}/{repo_name}' not found")
+        response.raise_for_status()
+
+        # The REST issues list has pull requests too
+        yield from (issue for issue in response.json() if 'pull_request' not in issue)
+
+        if 'next' not in response.links:
+            return
+        response = transport.get(response.links['next']['url'])
+
+
+def fetch_updated_issues(repo_owner, repo_name, since, label=None):
+    """
+    fetch_updated_issues Fetches the issues updated at or after a time, open or closed
+
+    :param since: ISO 8601 time, e.g. '2025-01-01T00:00:00Z'
+    :param label: Only fetch the issues with this label, filtered by GitHub
+    :return: List of issue records (see issue_record).
+    """
+    params = {'state': 'all', 'since': since}
+    if label:
+        params['labels'] = label
+    return [rest_issue_record(issue) for issue in rest_issue_pages(repo_owner, repo_name, params)]
+
+
+def fetch_open_issue_labels(repo_owner, repo_name, label=None):
+    """
+    fetch_open_issue_labels Fetches the number and labels of every open issue of a repository, without their bodies
+
+    :param label: Only fetch the issues with this label, filtered by GitHub
+    :return: Dictionary of the list of label names of every open issue, by number.
+    """
+    return {node['number']: [name['name'] for name in node['labels']['nodes']]
+            for node in repository_issue_nodes(OPEN_ISSUE_LABELS_QUERY, repo_owner, repo_name, label)}
+
+
+def sync_repository_issues(repo_owner, repo_name, store, label=None):
+    """
+    sync_repository_issues Brings the issue store up to date with a repository, and returns its open issues
+
+    The first sync fetches every open issue. The next ones fetch only the issues updated since the
+    last one, with a conditional REST request that costs no rate limit when nothing changed, then
+    the number and labels of the open issues, so issues closed, deleted, transferred or relabeled
+    without being updated are caught too.
+
+    With a label, GitHub only returns the issues that have it, and they are stored apart from the
+    issues of the same repository synced without a label. An issue whose label is removed is no
+    longer among the open issues with the label, so it is marked closed in that copy.
+
+    :param store: The IssueStore
+    :param label: Only sync and return the issues with this label
+    :return: List of issue records (see issue_record), oldest first.
+    """
+    repository = f"{repo_owner}/{repo_name}"
+    scope = f"{repository} label:{label}" if label else repository
+    since = store.last_sync(scope)
+
+    if since is None:
+        print(f"No local copy of the issues of {repository}{f' with label {label!r}' if label else ''}, "
+              "fetching all of them...")
+        store.save(scope, fetch_repository_issues(repo_owner, repo_name, label))
+    else:
+        updated = fetch_updated_issues(repo_owner, repo_name, since, label)
+        store.save(scope, updated)
+        closed, relabeled = store.reconcile(scope, fetch_open_issue_labels(repo_owner, repo_name, label))
+        print(f"Issue store: {len(updated)} issues updated since {since}, {closed} closed, {relabeled} relabeled.")
+
+    return store.open_issues(scope)
+
+
+def issues_by_number_query(numbers):
+    """
+    issues_by_number_query Returns a query fetching the given issues, one alias per issue
+    """
+    aliases = "\n".join(f"        issue_{number}: issue(number: {number}) {{\n            ...IssueFields\n        }}"
+                        for number in numbers)
+    return f"""
+query IssuesByNumber($owner: String!, $name: String!) {{
+    repository(owner: $owner, name: $name) {{
+{aliases}
+    }}
+}}
+""" + ISSUE_FIELDS
+
+
+def fetch_issues_by_number(repo_owner, repo_name, issue_numbers, label=None):
+    """
+    fetch_issues_by_number Fetches only the given issues, ISSUES_PER_QUERY of them per request
+
+    Numbers that are not issues of the repository (e.g. pull requests) are skipped.
+
+    Unlike the issues connection, `issue(number:)` has no labels argument, so GitHub can't filter
+    these by label. The nodes come with their labels though, and the ones without the label are
+    dropped as the response is read, before any record is built for them.
+
+    :param issue_numbers: Issue numbers, as ints or strings
+    :param label: Only return the issues with this label
+    :return: List of issue records (see issue_record), by issue number.
+    """
+    numbers = []
+    for number in issue_numbers:
+        try:
+            numbers.append(int(number))
+        except ValueError:
+            print(f"Warning: '{number}' is not an issue number, skipping it.")
+    numbers = sorted(set(numbers))
+
+    issues = []
+    for start in range(0, len(numbers), ISSUES_PER_QUERY):
+        batch = numbers[start:start + ISSUES_PER_QUERY]
+        # A number without an issue is a NOT_FOUND error for its alias only, the others are still returned
+        result = run_graphql_query(issues_by_number_query(batch), {"owner": repo_owner, "name": repo_name},
+                                   allowed_errors=("NOT_FOUND",))
+
+        repository = result["data"]["repository"] if result.get("data") else None
+        if repository is None:
+            raise Exception(f"Repository '{repo_owner}/{repo_name}' not found")
+
+        for number in batch:
+            node = repository.get(f"issue_{number}")
+            if node is None:
+                print(f"Warning: issue #{number} not found in {repo_owner}/{repo_name}, skipping it.")
+                continue
+            if label and not any(name['name'] == label for name in node['labels']['nodes']):
+                continue
+            issues.append(issue_record(node))
+
+    return issues
+
+def column_issue_numbers(items, status_field_id, status_option_id, repo_name):
+    """
+    column_issue_numbers Returns the numbers of the issues of a page of project items that are in a column
+
+    :param items: The items connection of a GraphQL response
+    :param status_field_id: Id of the single select field of the column
+    :param status_option_id: Id of the option of the column, in its single select field
+    :param repo_name: Only the issues of this repository are returned
+    """
+    issue_numbers = []
+    for item in items["nodes"]:
+        # Check if the item is in the specified column. Option ids are only unique within their field.
+        in_column = any(field_value and (field_value.get("field") or {}).get("id") == status_field_id
+                        and field_value.get("optionId") == status_option_id
+                        for field_value in (item.get("fieldValues") or {}).get("nodes", []))
+
+        # Check if the item is from the specified repository and is an issue
+        content = item.get("content")
+        if in_column and content and "number" in content:
+            if content.get("repository", {}).get("name") == repo_name:
+                issue_numbers.append(content["number"])
+    return issue_numbers
+
+
+def find_column(fields, column_name):
+    """
+    find_column Finds the single select field that has an option named column_name
+
+    :return: The ids of the field and of the option, or (None, None).
+    """
+    # List available fields and options for debugging
+    print("Available fields in project:")
+
+    for field in fields:
+        if field and "name" in field:
+            print(f"  - Field: {field.get('name', 'Unnamed')}")
+
+            if "options" in field:
+                print(f"    Options: {', '.join([opt.get('name', 'Unnamed') for opt in field['options']])}")
+
+                for option in field["options"]:
+                    if option["name"] == column_name:
+                        print(f"    Found column '{column_name}' in field '{field.get('name', 'Unnamed')}'")
+                        return field["id"], option["id"]
+
+    return None, None
+
+
+def load_project_cache():
+    try:
+        with open(PROJECT_CACHE, "r") as cache_file:
+            return json.load(cache_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_project_cache(cache):
+    os.makedirs(os.path.dirname(PROJECT_CACHE), exist_ok=True)
+    tmp_path = PROJECT_CACHE + ".tmp"
+    with open(tmp_path, "w") as cache_file:
+        json.dump(cache, cache_file, indent=2)
+    os.replace(tmp_path, PROJECT_CACHE)
+
+
+def update_project_cache(key, ids):
+    """
+    update_project_cache Sets the ids of a column in PROJECT_CACHE, or removes them if ids is None
+
+    The phases of a combined report look up their columns concurrently, so the cache is read again
+    before every change.
+    """
+    with _project_cache_lock:
+        cache = load_project_cache()
+        if ids is None:
+            cache.pop(key, None)
+        else:
+            cache[key] = ids
+        save_project_cache(cache)
+
+
+def fetch_column_items(project_id, status_field_id, status_option_id, repo_name, cursor=None):
+    """
+    fetch_column_items Follows the items of a project from a cursor to the last page
+
+    :return: The issue numbers in the column, or None if there is no project with this id.
+    """
+    issue_numbers = []
+    while True:
+        result = run_graphql_query(PROJECT_ITEMS_QUERY, {"projectId": project_id, "pageSize": PAGE_SIZE, "cursor": cursor},
+                                   allowed_errors=("NOT_FOUND",))
+        project = (result.get("data") or {}).get("node")
+        if not project or "items" not in project:
+            return None
+
+        items = project["items"]
+        issue_numbers.extend(column_issue_numbers(items, status_field_id, status_option_id, repo_name))
+        if not items["pageInfo"]["hasNextPage"]:
+            return issue_numbers
+        cursor = items["pageInfo"]["endCursor"]
+
 
 def get_issues_in_column(repo_owner, repo_name, project_number, column_name):
     """
     Get issues that are in a specific column of a GitHub project
-    
+
+    The owner, project, fields and first page of items come in a single query, then the rest
+    of the items are paged through. The project, field and option ids are cached in PROJECT_CACHE,
+    so later runs go straight to the items.
+
     Args:
         repo_owner: GitHub username or organization name
         repo_name: Repository name
         project_number: Project number (from URL)
         column_name: Column name to filter by (e.g., "Report")
-        
+
     Returns:
         List of issue numbers in the specified column
     """
     try:
-        # First get the organization ID
-        print(f"Looking up owner ID for '{repo_owner}'...")
-        org_id = get_organization_id(repo_owner)
-        
-        # Get the project ID
-        print(f"Looking up project ID for project #{project_number}...")
-        project_id = get_project_id(org_id, project_number)
-        
-        # Get the field ID for the Status field
-        print(f"Looking for column '{column_name}' in project...")
-        query = """
-        query($projectId: ID!) {
-            node(id: $projectId) {
-                ... on ProjectV2 {
-                    fields(first: 20) {
-                        nodes {
-                            ... on ProjectV2SingleSelectField {
-                                id
-                                name
-                                options {
-                                    id
-                                    name
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        variables = {"projectId": project_id}
-        result = run_graphql_query(query, variables)
-        
-        # Check if node data exists and has fields
-        if (not result.get("data") or 
-            not result["data"].get("node") or 
-            not result["data"]["node"].get("fields") or 
-            not result["data"]["node"]["fields"].get("nodes")):
-            raise Exception("Failed to get project fields")
-        
-        status_field = None
-        column_option_id = None
-        
-        # List available fields and options for debugging
-        print("Available fields in project:")
-        
-        for field in result["data"]["node"]["fields"]["nodes"]:
-            if field and "name" in field:
-                print(f"  - Field: {field.get('name', 'Unnamed')}")
-                
-                if "options" in field:
-                    print(f"    Options: {', '.join([opt.get('name', 'Unnamed') for opt in field['options']])}")
-                    
-                    for option in field["options"]:
-                        if option["name"] == column_name:
-                            status_field = field["id"]
-                            column_option_id = option["id"]
-                            print(f"    Found column '{column_name}' in field '{field.get('name', 'Unnamed')}'")
-                            break
-                if status_field:
-                    break
-        
+        cache_key = f"{repo_owner}/{project_number}/{column_name}"
+
+        cached = load_project_cache().get(cache_key)
+        # Entries cached without the id of the field are looked up again
+        if cached and cached.get("field_id"):
+            print(f"Using the cached ids of column '{column_name}' in project #{project_number}...")
+            issue_numbers = fetch_column_items(cached["project_id"], cached["field_id"], cached["option_id"], repo_name)
+            # An empty column could also be a column that was deleted since, so check it again
+            if issue_numbers:
+                return issue_numbers
+            update_project_cache(cache_key, None)
+
+        print(f"Looking up project #{project_number} of '{repo_owner}' and its column '{column_name}'...")
+        result = run_graphql_query(PROJECT_COLUMN_QUERY, {"owner": repo_owner, "number": project_number, "pageSize": PAGE_SIZE})
+
+        owner = result["data"]["repositoryOwner"]
+        if not owner:
+            raise Exception(f"Owner '{repo_owner}' not found. Check the repository owner name.")
+        project = owner.get("projectV2")
+        if not project:
+            raise Exception(f"Project #{project_number} not found for the given owner. Check your project_number in the config.")
+
+        status_field, column_option_id = find_column(project["fields"]["nodes"], column_name)
         if not status_field or not column_option_id:
             print(f"Column '{column_name}' not found in any project field")
             return []
-        
-        # Get all items in the project that are in the specified column
-        print("Fetching issues in the specified column...")
-        query = """
-        query($projectId: ID!) {
-            node(id: $projectId) {
-                ... on ProjectV2 {
-                    items(first: 100) {
-                        nodes {
-                            id
-                            fieldValues(first: 100) {
-                                nodes {
-                                    ... on ProjectV2ItemFieldSingleSelectValue {
-                                        name
-                                        optionId
-                                        field {
-                                            ... on ProjectV2FieldCommon {
-                                                id
-                                                name
-                                            }
-                                        }
-                                    }
-                                }
-                            }
-                            content {
-                                ... on Issue {
-                                    number
-                                    repository {
-                                        name
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        variables = {
-            "projectId": project_id
-        }
-        
-        result = run_graphql_query(query, variables)
-        
-        # Check if we got valid items data
-        if (not result.get("data") or 
-            not result["data"].get("node") or 
-            not result["data"]["node"].get("items") or 
-            not result["data"]["node"]["items"].get("nodes")):
-            raise Exception("Failed to get project items")
-        
+
+        update_project_cache(cache_key, {"project_id": project["id"], "field_id": status_field, "option_id": column_option_id})
+
         # Filter items that are in the specified column and match the repository
-        issue_numbers = []
-        items = result["data"]["node"]["items"]["nodes"]
-        
-        for item in items:
-            # Check if the item is in the specified column
-            in_column = False
-            if item.get("fieldValues", {}).get("nodes"):
-                for field_value in item["fieldValues"]["nodes"]:
-                    if (field_value and 
-                        field_value.get("field", {}).get("id") == status_field and 
-                        field_value.get("optionId") == column_option_id):
-                        in_column = True
-                        break
-            
-            # Check if the item is from the specified repository and is an issue
-            if in_column and item.get("content") and "number" in item["content"]:
-                if item["content"].get("repository", {}).get("name") == repo_name:
-                    issue_numbers.append(item["content"]["number"])
-        
+        print("Fetching issues in the specified column...")
+        items = project["items"]
+        issue_numbers = column_issue_numbers(items, status_field, column_option_id, repo_name)
+        if items["pageInfo"]["hasNextPage"]:
+            issue_numbers += fetch_column_items(project["id"], status_field, column_option_id, repo_name,
+                                                items["pageInfo"]["endCursor"]) or []
+
         return issue_numbers
     except Exception as e:
         print(f"Error in get_issues_in_column: {str(e)}")
@@ -0,0 +1,110 @@
+"""
+The findings of a report.
+
+get_issues turns every open issue of a repository into a Finding, and collects
+them in a Findings collection, indexed by issue number and by severity. Resolving
+the #xx links between findings, writing report.md, the severity counts, the
+summary of findings and the mitigation table all read the collection, so none of
+them has to recover titles, severities or statuses from markdown strings.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field, replace
+
+from . import fragments
+
+ANCHOR_PATTERN = re.compile('[^a-zA-Z0-9 ]')
+
+
+def link_anchor(title):
+    """
+    link_anchor Returns the anchor of the internal link to a finding title
+
+    All non-alphanumeric characters are removed, and spaces replaced with hyphens.
+    """
+    return ANCHOR_PATTERN.sub('', title.lower()).replace(" ", "-")
+
+
+@dataclass(slots=True)
+class Finding:
+    number: int
+    title: str
+    body: str
+    # The severity and status labels of the issue, e.g. 'Severity: High Risk' and 'Report Status: Resolved'
+    severity: str
+    status: str
+    repository: str = ''
+    anchor: str = field(init=False)
+    body_hash: str = field(init=False)
+
+    def __post_init__(self):
+        self.anchor = link_anchor(self.title)
+        self.body_hash = hashlib.sha256(self.body.encode()).hexdigest()
+
+    @property
+    def severity_name(self):
+        return self.severity[len('Severity: '):]
+
+    @property
+    def status_name(self):
+        return self.status[len('Report Status: '):]
+
+    @property
+    def fragment(self):
+        # The name of the fragment of report.md the finding is written to, see fragments.py
+        return f'issue-{self.number}'
+
+    def link(self):
+        return f"[*{self.title}*](#{self.anchor})"
+
+    def markdown(self):
+        """
+        markdown Returns the finding as written to report.md
+
+        The marker lets the converter convert and cache every finding on its own.
+        """
+        return f"\n\n{fragments.marker(self.fragment)}\n\n### {self.title}\n\n{self.body}\n"
+
+    def with_body(self, body):
+        return replace(self, body=body)
+
+
+class Findings:
+    """
+    Findings The findings of a report, in order, indexed by repository and number, and by severity label
+    """
+
+    def __init__(self, findings=()):
+        self._findings: list[Finding] = []
+        self._by_number: dict[tuple[str, int], Finding] = {}
+        self._by_severity: dict[str, list[Finding]] = {}
+        for finding in findings:
+            self.add(finding)
+
+    @classmethod
+    def merge(cls, collections):
+        """
+        merge Merges the findings of several repositories, in the order of the repositories
+        """
+        return cls(finding for findings in collections for finding in findings)
+
+    def add(self, finding):
+        self._findings.append(finding)
+        self._by_number[(finding.repository, finding.number)] = finding
+        self._by_severity.setdefault(finding.severity, []).append(finding)
+
+    def get(self, repository, number):
+        return self._by_number.get((repository, number))
+
+    def with_severity(self, label):
+        return self._by_severity.get(label, [])
+
+    def count(self, label):
+        return len(self.with_severity(label))
+
+    def __iter__(self):
+        return iter(self._findings)
+
+    def __len__(self):
+        return len(self._findings)
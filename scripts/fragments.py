@@ -0,0 +1,65 @@
+"""
+Markers that split report.md into separately addressable fragments.
+
+get_issues writes a marker line before every severity heading and every
+finding, e.g. `<!-- report-fragment: issue-12 -->`. The markers are HTML
+comments, so they don't show up in the converted report, but they let the
+converter split the report again and convert (and cache) each finding on its
+own. Everything before the first marker is kept as a 'preamble' fragment.
+
+The converter also gives every fragment a hypertarget named after its marker
+(see targets), so the summary of findings links to a finding whatever label
+pandoc gives its heading.
+"""
+
+import re
+
+MARKER_PATTERN = re.compile(r'^<!-- report-fragment: (\S+) -->$', re.MULTILINE)
+
+
+def marker(name):
+    return f"<!-- report-fragment: {name} -->"
+
+
+def is_marker(line):
+    return MARKER_PATTERN.match(line.rstrip('\r\n')) is not None
+
+
+def split_fragments(text):
+    """
+    split_fragments Splits a markdown document on its fragment markers
+
+    :param text: The whole document
+    :return: A list of (name, markdown) tuples, in document order. The markers themselves are dropped.
+    """
+    fragments = []
+    matches = list(MARKER_PATTERN.finditer(text))
+
+    if not matches or matches[0].start() > 0:
+        end = matches[0].start() if matches else len(text)
+        fragments.append(('preamble', text[:end]))
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        fragments.append((match.group(1), text[match.end():end]))
+
+    return fragments
+
+
+def targets(names):
+    """
+    targets Returns the LaTeX hypertarget of every fragment
+
+    Fragments with the same name, e.g. findings with the same number in a combined report, get '-1', '-2', ... suffixes.
+    Heading identifiers never contain ':', so the targets can't clash with the labels of headings.
+
+    :param names: The names of the fragments, in document order
+    :return: The list of targets, in the same order.
+    """
+    occurrences = {}
+    result = []
+    for name in names:
+        n = occurrences.get(name, 0)
+        occurrences[name] = n + 1
+        result.append(f"fragment:{name}-{n}" if n else f"fragment:{name}")
+    return result
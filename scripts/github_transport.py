@@ -0,0 +1,357 @@
+"""
+The HTTP transport shared by every request made to GitHub's API.
+
+A single requests.Session keeps connections alive between requests, so only the
+first one pays for the TLS handshake. Every request has a timeout. Requests
+that fail with a transient error (connection errors, timeouts, 5xx) or hit a
+rate limit are retried with exponential backoff; when GitHub says how long to
+wait, with Retry-After or X-RateLimit-Reset, that wait is used instead.
+
+The rate limit headers of every response are recorded, so the remaining budget
+can be reported at the end of a build.
+
+GET responses with an ETag or Last-Modified header are cached on disk. The next
+GET of the same URL is sent as a conditional request, and when GitHub answers
+304 Not Modified the cached response is replayed. Authenticated 304 responses
+don't count against the rate limit, so pages that haven't changed are free.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from .disk_cache import DiskCache
+
+# requests is imported by the functions that send or build requests: it is the slowest import of
+# the build, and most steps (linting, converting, compiling) never use the network.
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+
+def graphql_endpoint(api_url):
+    """
+    graphql_endpoint Returns the GraphQL endpoint that goes with a REST API root
+
+    GitHub Enterprise Server serves the REST API under /api/v3 and GraphQL at /api/graphql,
+    github.com and GHE.com at /graphql next to the REST API.
+
+    :param api_url: Root of the REST API, e.g. 'https://github.example.com/api/v3'
+    :return: The URL of the GraphQL endpoint.
+    """
+    api_url = api_url.rstrip("/")
+    if api_url.endswith("/api/v3"):
+        return api_url[:-len("/v3")] + "/graphql"
+    return api_url + "/graphql"
+
+
+# Set by GitHub Actions, next to GITHUB_API_URL
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "").rstrip("/") or graphql_endpoint(GITHUB_API_URL)
+
+# Seconds to wait for a connection, and for a response once connected
+CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", 60))
+
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", 5))
+# First backoff in seconds, doubled after every retry
+BACKOFF = 1.0
+# Longest wait before a retry. A rate limit that resets later than this is not waited for.
+MAX_WAIT = float(os.getenv("GITHUB_MAX_WAIT", 300))
+
+# Connections kept alive, enough for concurrent fetches
+POOL_SIZE = 16
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HTTP_CACHE = './working/.cache/http'
+HTTP_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Seconds a cached response is revalidated for. Older ones are fetched again unconditionally.
+HTTP_CACHE_TTL = float(os.getenv("GITHUB_CACHE_TTL", 7 * 24 * 3600))
+
+# Response headers replayed with a cached body, e.g. Link for pagination
+CACHED_HEADERS = ["ETag", "Last-Modified", "Link", "Content-Type"]
+
+
+class ResponseCache:
+    """ GET responses on disk, with the validators to revalidate them. """
+
+    def __init__(self, directory=HTTP_CACHE, max_bytes=HTTP_CACHE_MAX_BYTES, ttl=HTTP_CACHE_TTL):
+        self.disk_cache = DiskCache(directory, max_bytes, '.json')
+        self.ttl = ttl
+
+    @staticmethod
+    def key(url, authorization=None):
+        # Responses depend on who asks for them, so two tokens never share an entry
+        return hashlib.sha256(f"{url}\n{authorization or ''}".encode()).hexdigest()
+
+    def get(self, key):
+        """
+        get Returns the cached (headers, body) of a key, or None if there is none or it is older than the TTL
+        """
+        data = self.disk_cache.get(key)
+        if data is None:
+            return None
+        header, _, body = data.partition(b'\n')
+        entry = json.loads(header)
+        if time.time() - entry["stored_at"] > self.ttl:
+            return None
+        return entry["headers"], body
+
+    def put(self, key, response):
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        header = json.dumps({"stored_at": time.time(), "headers": headers})
+        self.disk_cache.put(key, header.encode() + b'\n' + response.content)
+
+    @staticmethod
+    def conditional_headers(headers):
+        conditions = {}
+        if "ETag" in headers:
+            conditions["If-None-Match"] = headers["ETag"]
+        if "Last-Modified" in headers:
+            conditions["If-Modified-Since"] = headers["Last-Modified"]
+        return conditions
+
+    @staticmethod
+    def replay(url, headers, body):
+        """
+        replay Returns a 200 requests.Response with the cached headers and body
+        """
+        import requests
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers.update(headers)
+        response._content = body
+        response.encoding = "utf-8"
+        return response
+
+
+class RateLimit:
+    """ The rate limit budget of a resource, as reported by the last response using it. """
+
+    def __init__(self, resource, limit, remaining, reset):
+        self.resource = resource
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+
+    def __repr__(self):
+        return f"{self.resource}: {self.remaining}/{self.limit} left, resets at {time.strftime('%H:%M:%S', time.localtime(self.reset))}"
+
+
+class GitHubTransport:
+    def __init__(self, token=None, base_url=GITHUB_API_URL, max_retries=MAX_RETRIES, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 cache=None, graphql_url=None):
+        """
+        :param token: GitHub token, or None for anonymous requests
+        :param base_url: Root of the REST API
+        :param max_retries: Retries of a request before giving up
+        :param timeout: (connect, read) timeouts in seconds
+        :param cache: ResponseCache for conditional GET requests, or None to send them unconditionally
+        :param graphql_url: The GraphQL endpoint. By default GITHUB_GRAPHQL_URL with the default base_url,
+                            and the endpoint that goes with base_url otherwise (see graphql_endpoint).
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url
+        if graphql_url is None:
+            graphql_url = GITHUB_GRAPHQL_URL if base_url == GITHUB_API_URL else graphql_endpoint(base_url)
+        self.graphql_url = graphql_url
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.cache = cache
+        # Replaced in tests, to retry without waiting
+        self.sleep = time.sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        self.session.headers["User-Agent"] = "report-generator-template"
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0
+        self.not_modified = 0
+        self.rate_limits = {}
+        self._lock = threading.Lock()
+
+    def url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return self.base_url + "/" + path.lstrip("/")
+
+    def record_rate_limit(self, response):
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        rate_limit = RateLimit(
+            headers.get("X-RateLimit-Resource", "core"),
+            int(headers.get("X-RateLimit-Limit", 0)),
+            int(headers["X-RateLimit-Remaining"]),
+            int(headers.get("X-RateLimit-Reset", 0)),
+        )
+        with self._lock:
+            self.rate_limits[rate_limit.resource] = rate_limit
+
+    def retry_after(self, response, attempt):
+        """
+        retry_after Returns how long to wait before retrying a response, or None if it should not be retried
+        """
+        headers = response.headers
+        rate_limited = response.status_code == 429 or (
+            response.status_code == 403 and ("Retry-After" in headers or headers.get("X-RateLimit-Remaining") == "0"))
+
+        if not rate_limited and response.status_code not in RETRY_STATUSES:
+            return None
+
+        # Secondary rate limits say how long to wait
+        if "Retry-After" in headers:
+            try:
+                return float(headers["Retry-After"])
+            except ValueError:
+                pass
+
+        # The primary rate limit is exhausted until its reset time
+        if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+            return max(0.0, int(headers["X-RateLimit-Reset"]) - time.time()) + 1
+
+        return self.backoff(attempt)
+
+    def backoff(self, attempt):
+        # Exponential, with some jitter so that concurrent builds don't retry in lockstep
+        return BACKOFF * (2 ** attempt) * (1 + random.random() / 4)
+
+    def wait(self, seconds):
+        with self._lock:
+            self.retries += 1
+            self.waited += seconds
+        self.sleep(seconds)
+
+    def request(self, method, path, **kwargs):
+        """
+        request Sends a request, retrying transient errors and rate limits
+
+        :param method: HTTP method, e.g. 'GET'
+        :param path: Path relative to the API root, or a full URL (e.g. from a Link header)
+        :return: The requests.Response of the last attempt. Error statuses are not raised.
+        """
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        url = self.url(path)
+
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                self.wait(self.backoff(attempt))
+                continue
+
+            self.record_rate_limit(response)
+            delay = self.retry_after(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                return response
+            if delay > MAX_WAIT:
+                print(f"Warning: GitHub asks to wait {delay:.0f}s before retrying {url}, giving up.")
+                return response
+            self.wait(delay)
+
+        return response
+
+    def get(self, path, params=None, **kwargs):
+        """
+        get Sends a GET request, as a conditional request if the response to the same URL is cached
+
+        A 304 Not Modified response is replaced by the cached response.
+        """
+        import requests
+
+        if self.cache is None:
+            return self.request("GET", path, params=params, **kwargs)
+
+        url = requests.Request("GET", self.url(path), params=params).prepare().url
+        key = self.cache.key(url, self.session.headers.get("Authorization"))
+        cached = self.cache.get(key)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            headers.update(self.cache.conditional_headers(cached[0]))
+        response = self.request("GET", url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self.not_modified += 1
+            return self.cache.replay(url, *cached)
+        if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+            self.cache.put(key, response)
+        return response
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def graphql(self, query, variables=None):
+        """
+        graphql Runs a GraphQL query
+
+        :return: The decoded JSON response, errors included.
+        """
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+
+        for attempt in range(self.max_retries + 1):
+            response = self.post(self.graphql_url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+
+            # The GraphQL rate limit is reported as an error of a successful response
+            errors = data.get("errors") or []
+            if attempt < self.max_retries and any(error.get("type") == "RATE_LIMITED" for error in errors):
+                reset = response.headers.get("X-RateLimit-Reset")
+                delay = max(0.0, int(reset) - time.time()) + 1 if reset else self.backoff(attempt)
+                if delay <= MAX_WAIT:
+                    self.wait(delay)
+                    continue
+            return data
+
+        return data
+
+    def summary(self):
+        summary = f"{self.requests} requests, {self.retries} retries ({self.waited:.1f}s waiting)"
+        if self.cache is not None:
+            summary += f", {self.not_modified} not modified"
+        if self.rate_limits:
+            summary += "; rate limit " + ", ".join(repr(rate_limit) for rate_limit in self.rate_limits.values())
+        return summary
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    get_transport Returns the transport shared by the whole process, authenticated with GITHUB_TOKEN
+
+    It is created on first use, after loading .env, so importing this module sends nothing and reads nothing.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            # The personal access token (GITHUB_TOKEN) can be in .env
+            from dotenv import load_dotenv
+            load_dotenv()
+            _transport = GitHubTransport(os.getenv("GITHUB_TOKEN"), cache=ResponseCache())
+        return _transport
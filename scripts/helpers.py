@@ -1,11 +1,13 @@
 import configparser
 from datetime import timedelta, datetime
-from dateutil.parser import parse
 import math
 from os.path import exists as check_file
 import os
 import re
-import subprocess
+
+from . import anchors, fragments
+from .findings import Finding, Findings, link_anchor
+from .template import UnresolvedPlaceholders, load_template
 
 # Define file paths
 SOURCE_PATH = './source/'
@@ -15,7 +17,7 @@ ASSISTING_AUDITORS = './source/assisting_auditors.md'
 WORKING_LEAD_AUDITORS = './working/lead_auditors.md'
 WORKING_ASSISTING_AUDITORS = './working/assisting_auditors.md'
 SEVERITY_COUNTS = SOURCE_PATH + 'severity_counts.conf'
-SUMMARY_TEX = './templates/summary.tex'
+SUMMARY_OF_FINDINGS = './working/summary_of_findings.tex'
 SUMMARY_INFORMATION = SOURCE_PATH + 'summary_information.conf'
 SOURCE_REPORT = SOURCE_PATH + 'report.md'
 OUTPUT_SOLODIT = OUTPUT_PATH + 'solodit_report.md'
@@ -27,6 +29,10 @@ SEVERITY_LABELS = ['Severity: Critical Risk', 'Severity: High Risk', 'Severity:
 # Possible status labels from github issues
 STATUS_LABELS = ['Report Status: Open', 'Report Status: Acknowledged', 'Report Status: Resolved', 'Report Status: Partially Resolved']
 
+# A fenced code block, left as it is, or a github issue link: ' #' followed by a number of up to 4 digits
+INTERNAL_LINK_PATTERN = re.compile(r'^[ \t]*(?P<fence>```|~~~).*?(?:^[ \t]*(?P=fence)[^\n]*$|\Z)'
+                                   r'|(?<= )#(?P<number>\d{1,4})(?!\d)', re.MULTILINE | re.DOTALL)
+
 # Little helper to get issues with a certain label
 def get_issue_count(dict, label):
     try:
@@ -43,58 +49,55 @@ def title_to_link(title):
 
     see https://stackoverflow.com/questions/2822089/how-to-link-to-part-of-the-same-document-in-markdown
     """
-    # all non-alphanumeric characters should be removed, and spaces replaced with hyphens
-    pattern = re.compile('[^a-zA-Z0-9 ]')
-    link_anchor = re.sub(pattern, '', title.lower()).replace(" ", "-")
-    full_link = f"[*{title}*](#{link_anchor})"
-    return full_link
+    return f"[*{title}*](#{link_anchor(title)})"
 
 
-def replace_internal_links(issues, issues_by_number):
-    """
-    replace_internal_links Replaces github's issue links (#xx) with internal document links
+def resolve_internal_links(findings):
     """
-    for label in issues:
-        for issue in issues[label]:
-            # Find every occurrence of ' #' followed by a number of up to 4 digits
-            p = re.findall(" #\d{1,4}", issue)
-            if p:
-                for match in p:
-                    # Extract the issue number to link to
-                    number = int(match[2:])
-                    # Create the internal link to the issue
-                    try:
-                        # The space below is needed, because the regexp match includes the space. Otherwise it would be lost.
-                        target = " " + title_to_link(issues_by_number[number])
-                    except KeyError as e:
-                        # Common error occurs when there is a '#' in the issue description i.e "Fix implemented in #2"
-                        print(f"Issue '{issue}' references issue #{number} but there is no such issue. KeyError {e}. Make sure there aren't any `#`s written in the Issue description.")
-                        exit(1)
-                    # Replace with link
-                    index = issues[label].index(issue)
-                    new_issue = issues[label][index].replace(match, target)
-                    issues[label][index] = new_issue
-                    issue = new_issue
-    return issues
-
-
-def markdown_heading_to_latex_hypertarget(heading):
-    # Use Pandoc to generate LaTeX with a table of contents
-    markdown = f"# Table of Contents\n\n{heading}"
-    latex = subprocess.check_output(['pandoc', '-f', 'markdown', '-t', 'latex'], input=markdown.encode()).decode()
-
-    # Extract the hypertarget from the LaTeX
-    hypertarget = ''
-    for line in latex.split('\n'):
-        if '\\hypertarget{table-of-contents}' in line:
-            continue
-        elif '\\hypertarget{' in line:
-            hypertarget = line.strip()
-            break
+    resolve_internal_links Replaces github's issue links (#xx) in the finding bodies with internal document links
+
+    Every body is rewritten in a single pass. A link is ' #' followed by a number of up to 4 digits;
+    the ones in fenced code blocks are code, not links, and are left alone.
 
-    hypertarget = re.sub(r'^\\hypertarget{(.*)}{%', r'\1', hypertarget) # Remove the leading "\\hypertarget{" and trailing "}{%"
+    :param findings: Findings, whose links point to findings of the same repository
+    :return: (Findings with the links replaced, list of (finding, number) of the links to unknown issues)
+    """
+    links = {(finding.repository, finding.number): finding.link() for finding in findings}
+    unknown = []
+
+    resolved = []
+    for finding in findings:
+        def replace(match):
+            if match.group('number') is None:
+                return match.group(0)
+            number = int(match.group('number'))
+            link = links.get((finding.repository, number))
+            if link is None:
+                unknown.append((finding, number))
+                return match.group(0)
+            return link
+
+        body = INTERNAL_LINK_PATTERN.sub(replace, finding.body)
+        resolved.append(finding if body == finding.body else finding.with_body(body))
+    return Findings(resolved), unknown
+
+
+def replace_internal_links(findings):
+    """
+    replace_internal_links Resolves the #xx links of the findings, and exits listing every link to an unknown issue
 
-    return hypertarget
+    :param findings: Findings, whose links point to findings of the same repository
+    :return: Findings with the links replaced.
+    """
+    resolved, unknown = resolve_internal_links(findings)
+    if unknown:
+        # Common error occurs when there is a '#' in the issue description i.e "Fix implemented in #2"
+        for finding, number in unknown:
+            print(f"Issue #{finding.number} '{finding.title}' references issue #{number} but there is no such issue.")
+        print(f"{len(unknown)} link(s) to unknown issues. Make sure there aren't any `#`s written in the Issue descriptions, "
+              "outside of code blocks.")
+        exit(1)
+    return resolved
 
 
 def escape_latex_special_chars(text):
@@ -121,6 +124,9 @@ def format_inline_code(text):
 
 
 def calculate_period(review_timeline):
+    # dateutil is slow to import and only needed here
+    from dateutil.parser import parse
+
     # Check if there's a year in the string (4 consecutive digits)
     year_match = re.search(r'\b(\d{4})\b', review_timeline)
 
@@ -153,159 +159,110 @@ def calculate_period(review_timeline):
     return workdays
 
 
-def get_issues(repository, github, filter_options=None):
+def get_issues(repository, issues):
     """
-    get_issues Reads all the issues from the repo configured in config.py and generates a .md file.
+    get_issues Turns the issues of a repository into findings, and resolves their #xx links.
 
-    A simple script that collects issues from a repo and generate a markdown
-    file (report.md). A personal access token will need to be configured. Also the repo name will
-    need to be provided.
+    The issues are fetched beforehand (see fetch_issues.py). Nothing is written: the findings of
+    one or more repositories are merged, then written with write_report_and_counts.
 
     Args:
         repository: The GitHub repository in format 'username/repo'
-        github: GitHub API client object
-        filter_options: Dictionary containing filter options:
-            - issue_ids: List of issue IDs to include
-            - label: Label to filter issues by
+        issues: List of issue dictionaries, oldest first, with number, title, body, state,
+            labels (names) and html_url. They are already filtered by issue number and label.
+
+    Returns:
+        The Findings of the open issues, or None if the issues are not labeled correctly.
     """
 
     repository = re.sub(r'^https://github.com/(.*?)(\.git)?$', r'\1', repository)  # Remove the leading "https://github.com/" and trailing ".git"
 
-    # The dictionary where the issues will be stored, by severity.
-    issue_dict : dict[str, list[str]] = {}
+    findings = Findings()
 
-    # Dictionary for issues by github number, to replace #xx links
-    issues_by_number : dict[int, str] = {}
+    try:
+        for issue in issues:
+            if issue['state'] == 'open':
+                # filter issue labels for only severity labels
+                severity_labels_in_issue = [label for label in issue['labels'] if label in SEVERITY_LABELS]
 
-    # Dictionary for count by severity
-    count_by_severity: dict[str, int] = {}
+                # filter issue labels for only status labels
+                status_labels_in_issue = [label for label in issue['labels'] if label in STATUS_LABELS]
 
-    # Dictionary for summary of findings
-    summary_of_findings: dict[str, list[tuple[str, str]]] = {}
+                assert len(severity_labels_in_issue) == 1, f"Issue {issue['html_url']} has more than one (or no) severity label."
+                assert len(status_labels_in_issue) == 1, f"Issue {issue['html_url']} has more than one (or no) status label."
 
-    # Set up filter options
-    filter_options = filter_options or {}
-    filter_issue_ids = filter_options.get('issue_ids', [])
-    filter_label = filter_options.get('label', '')
+                findings.add(Finding(issue['number'], issue['title'], issue['body'], severity_labels_in_issue[0],
+                                     status_labels_in_issue[0], repository))
 
-    # TODO catch get_repo() 404 errors and produce a gentle suggestion on what's wrong.
-    # "GitHub's REST API v3 considers every pull request an issue"--need to filter them out.
-    try:
-        issues_list = list(github.get_repo(repository).get_issues())
-        for i in range(len(issues_list)-1, -1, -1):
-            issue = issues_list[i]
-            if issue.state == 'open' and issue.pull_request is None:
-                # Apply filters
-                
-                # Filter by issue ID if specified
-                if filter_issue_ids and str(issue.number) not in filter_issue_ids:
-                    continue
-                
-                # Filter by label if specified
-                if filter_label and not any(label.name == filter_label for label in issue.labels):
-                    continue
-                
-                # get issue number and title for replacing links
-                issues_by_number[issue.number] = issue.title
+    except Exception as e:
+        print(f"Couldn't read the issues from repository {repository}.\nError:{e} \n")
+        return None
 
-                # filter issue labels for only severity labels
-                severity_labels_in_issue = [label.name for label in issue.labels if label.name in SEVERITY_LABELS]
+    return replace_internal_links(findings)
 
-                # filter issue labels for only status labels
-                status_labels_in_issue = [label.name for label in issue.labels if label.name in STATUS_LABELS]
-
-                assert len(severity_labels_in_issue) == 1, f"Issue {issue.html_url} has more than one (or no) severity label."
-                assert len(status_labels_in_issue) == 1, f"Issue {issue.html_url} has more than one (or no) status label."
-                
-                severity_label = severity_labels_in_issue[0]
-                if severity_label not in issue_dict:
-                    issue_dict[severity_label] = []
-                issue_dict[severity_label].append(f"\n\n### {issue.title}\n\n{issue.body}\n")
-
-                status_label = status_labels_in_issue[0]
-                # Append issue title and status to summary of findings dictionary
-                if severity_label not in summary_of_findings:
-                    summary_of_findings[severity_label] = []
-                summary_of_findings[severity_label].append((issue.title, status_label))
 
-    except Exception as e:
-        print(f"Couldn't fetch the issues from repository {repository}.\nError:{e} \n")
-        return 0
+def write_report_and_counts(findings):
+    """
+    write_report_and_counts Writes report.md, severity_counts.conf, the summary of findings table and the mitigation table
 
-    issue_dict = replace_internal_links(issue_dict, issues_by_number)
+    :param findings: Findings, from get_issues or Findings.merge
+    :return: The total number of issues.
+    """
+    # Fragment names of the findings of every severity
+    hypertargets: dict[str, list[str]] = {}
 
     with open(SOURCE_REPORT, "w") as report:
         for label in SEVERITY_LABELS:
             # Do nothing if there are no issues with this label
-            if get_issue_count(issue_dict, label) == 0:
+            if findings.count(label) == 0:
                 continue
 
-            report.write(f"## {label[10:]}\n")
-            for content in issue_dict[label]:
-                report.write(content.replace("\r\n", "\n"))
-            report.write("\n\\clearpage\n")
+            severity_slug = label[10:].lower().replace(" ", "-")
+            report.write(f"{fragments.marker(severity_slug)}\n\n## {label[10:]}\n")
+            hypertargets[label] = []
+            for finding in findings.with_severity(label):
+                report.write(finding.markdown().replace("\r\n", "\n"))
+                hypertargets[label].append(finding.fragment)
+            report.write(f"\n{fragments.marker(severity_slug + '-end')}\n\n\\clearpage\n")
+
+    # The converter gives every fragment of report.md a hypertarget named after its marker, whatever label pandoc
+    # gives the heading of the finding
+    targets = iter(fragments.targets(name for names in hypertargets.values() for name in names))
+    hypertargets = {label: [anchors.latex_label(next(targets)) for _ in names] for label, names in hypertargets.items()}
 
     total_count = 0
     with open(SEVERITY_COUNTS, "w") as counts_file:
         counts_file.write('[counts]' + '\n')
         for label in SEVERITY_LABELS:
             variable_name = label[10:].lower().replace(" risk", "").replace(" ", "_") + " = "
-            count = get_issue_count(issue_dict, label)
+            count = findings.count(label)
             counts_file.write(variable_name + str(count) + '\n')
-            count_by_severity[label] = count
             total_count += count
         counts_file.write('total = ' + str(total_count) + '\n')
 
-    with open(SUMMARY_TEX, "r") as summary_file:
-        summary_tex_content = summary_file.read()
-        
-    summary_findings_table = ""
+    summary_findings_table = "\\hline"
     mitigation_table = f"Name,Status,{get_summary_information()['team_name']},Cyfrin\n"
     for label in SEVERITY_LABELS:
         # Do nothing if there are no issues with this label
-        if get_issue_count(issue_dict, label) == 0:
+        if findings.count(label) == 0:
             continue
 
-        fill = math.ceil(math.log10(count_by_severity[label]))
+        fill = math.ceil(math.log10(findings.count(label)))
         prefix = f"{label[10:11]}-"
 
         mitigation_table += f"{label.split()[1].upper()},,,\n"
 
         # Iterate through all findings for the current severity
-        for counter, (issue_title, status_label) in enumerate(summary_of_findings[label], start=1):
-            latex_hypertarget = markdown_heading_to_latex_hypertarget("### " + issue_title)
-            escaped_title = escape_latex_special_chars(issue_title)
-            prefixed_title = f"\hyperlink{{{latex_hypertarget}}}{{[{prefix}{str(counter).zfill(fill)}] {format_inline_code(escaped_title)}}}"
-            status_label = status_label.replace("Report Status: ", "")
-            summary_findings_table += f"{prefixed_title} & {status_label} \\\\\n\hline"
-            mitigation_table += f"\"{issue_title}\",{status_label},,\n"
-
-    # Replace the placeholder in the SUMMARY_TEX file
-    placeholder_start = "% __PLACEHOLDER__SUMMARY_OF_FINDINGS_START"
-    placeholder_end = "% __PLACEHOLDER__SUMMARY_OF_FINDINGS_END"
-
-    if placeholder_start in summary_tex_content and placeholder_end in summary_tex_content:
-        # Find the position of the start and end placeholders
-        start_position = summary_tex_content.index(placeholder_start)
-        end_position = summary_tex_content.index(placeholder_end) + len(placeholder_end)
-
-        # Construct the new content with the updated table
-        new_content = (
-            summary_tex_content[:start_position]
-            + placeholder_start + "\n\hline"
-            + summary_findings_table + "\n"
-            + placeholder_end
-            + summary_tex_content[end_position:]
-        )
-
-        # Replace the table section with the new content in the summary_tex_content
-        updated_summary_tex_content = new_content
-    else:
-        print("Table placeholder not found in summary.tex. Make sure the placeholders are present.")
-        exit(1)
-            
-    with open(SUMMARY_TEX, "w") as summary_file:
-        summary_file.write(updated_summary_tex_content)
+        for counter, finding in enumerate(findings.with_severity(label), start=1):
+            escaped_title = escape_latex_special_chars(finding.title)
+            prefixed_title = f"\hyperlink{{{hypertargets[label][counter - 1]}}}{{[{prefix}{str(counter).zfill(fill)}] {format_inline_code(escaped_title)}}}"
+            summary_findings_table += f"{prefixed_title} & {finding.status_name} \\\\\n\hline"
+            mitigation_table += f"\"{finding.title}\",{finding.status_name},,\n"
+
+    # Filled in summary.tex by generate_report.py, in place of __PLACEHOLDER__SUMMARY_OF_FINDINGS
+    os.makedirs(os.path.dirname(SUMMARY_OF_FINDINGS), exist_ok=True)
+    with open(SUMMARY_OF_FINDINGS, "w") as summary_file:
+        summary_file.write(summary_findings_table)
 
     with open(MITIGATION_TABLE, "w") as mitigation_file:
         mitigation_file.write(mitigation_table)
@@ -342,27 +299,23 @@ def save_file_contents(filename, contents):
         file.write("\n".join(contents))
 
 
-def replace_in_file_content(file_content, replacement):
+def render_template(template_path, output_path, *replacements):
     """
-    replace_in_file_content Finds text in every element of a list and replaces it as required.
-
-    :param file_content: List containing the string elements to be replaced
-    :param replacement: A list of two-element lists containing text to replace, and what to replace it with.
-    :return: Input with text replaced.
-    """ 
+    render_template Fills in the placeholders of a template and saves the result. The template is not modified.
 
-    lines = []
-
-    # Sort replacements by length (descending) to handle nested placeholders
-    sorted_replacements = sorted(replacement, key=lambda x: len(x[0]), reverse=True)
-
-    for line in file_content:
-        if line.find("__PLACEHOLDER__") >= 0:
-            for r in sorted_replacements:
-                line = line.replace(r[0], r[1])
-        lines.append(line)
+    :param template_path: The template, e.g. ./templates/summary.tex
+    :param output_path: Where to save the rendered template, e.g. ./working/summary.tex
+    :param replacements: Lists of two-element lists containing a placeholder, and its value.
+    """
+    values = {placeholder: value for replacement in replacements for placeholder, value in replacement}
+    try:
+        rendered = load_template(template_path).render(values)
+    except UnresolvedPlaceholders as e:
+        print(f"Couldn't fill in {template_path}: {e}")
+        exit(1)
 
-    return lines
+    with open(output_path, "w") as file:
+        file.write(rendered)
 
 
 def get_summary_information():
@@ -394,6 +347,43 @@ def get_summary_information():
     return summary
 
 
+def get_phase_information():
+    """
+    get_phase_information Retrieves the [phase_N] sections of a combined multi-phase report
+
+    Every phase has its own private_github, project_number and filter_issue_id_list. The label
+    and column filters default to the ones of [summary].
+
+    :return: A list of phase dictionaries ordered by N, empty if there are no phases.
+    """
+    summary = get_summary_information()
+
+    config = configparser.ConfigParser()
+    config.read(SUMMARY_INFORMATION)
+
+    phases = []
+    for section in config.sections():
+        match = re.fullmatch(r'phase_(\d+)', section)
+        if not match:
+            continue
+
+        phase = {
+            'phase': int(match.group(1)),
+            'name': section,
+            'project_number': '',
+            'filter_issue_label': summary.get('filter_issue_label', ''),
+            'filter_issue_column': summary.get('filter_issue_column', 'Report'),
+        }
+        for key, value in config[section].items():
+            phase[key] = value
+
+        id_list = phase.get('filter_issue_id_list', '')
+        phase['filter_issue_id_list'] = [id.strip() for id in id_list.split(',')] if id_list.strip() else []
+        phases.append(phase)
+
+    return sorted(phases, key=lambda phase: phase['phase'])
+
+
 def get_severity_counts():
     """
     get_severity_counts Retrieves all information needed to fill the amount of findings in summary.tex
@@ -476,4 +466,5 @@ def edit_report_md():
             solodit_report.write(line)
         solodit_report.write('\n\n---\n\n# Findings\n')
         for line in source_report:
-            solodit_report.write(line)
+            if not fragments.is_marker(line):
+                solodit_report.write(line)
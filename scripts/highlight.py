@@ -0,0 +1,209 @@
+"""
+Syntax highlighting of the report's code blocks.
+
+In 'minted' mode the code blocks become minted environments, and minted runs
+pygmentize for every listing on every pdflatex pass, which needs
+-shell-escape. In 'pygments' mode the code is highlighted with the Pygments
+library when the report is converted: every block becomes a fancyvrb/fvextra
+Verbatim environment full of \\PY{...} macros, so pdflatex doesn't start any
+process.
+
+Highlighting results are kept in a cache outside the repository, shared by
+every report and branch built on the machine, so a report whose snippets
+mostly didn't change skips almost all of the highlighting work:
+- 'pygments' mode caches every highlighted block, keyed on the code, the lexer
+  and the style.
+- 'minted' mode keeps its own cache in working/_minted-main, with files named
+  after the hash of their contents. The listings a report used are copied
+  from the shared cache before pdflatex runs, and the new ones are copied
+  back afterwards, with the list of the report's listings.
+The cache is size-capped with least-recently-used eviction, and every entry is
+checked against its checksum when it is read.
+"""
+
+import hashlib
+import os
+
+# Only the package itself: the lexers and formatters are imported when a block is highlighted,
+# so that importing this module (e.g. for the mode) stays cheap
+from pygments import __version__ as PYGMENTS_VERSION
+
+from .disk_cache import DiskCache
+
+MINTED = 'minted'
+PYGMENTS = 'pygments'
+
+HIGHLIGHT_MODE = os.environ.get('REPORT_HIGHLIGHT_MODE', MINTED)
+
+# Written over the minted version of highlighting.tex copied from templates/
+HIGHLIGHTING_TEX = './working/highlighting.tex'
+
+HIGHLIGHT_CACHE = os.environ.get(
+    'REPORT_HIGHLIGHT_CACHE',
+    os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'report-generator', 'highlight'))
+HIGHLIGHT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_HIGHLIGHT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Where minted keeps the highlighted listings of working/main.tex. The listings are named after the hash
+# of their code and options, but the style definitions are named after the style only, so they aren't shared.
+MINTED_CACHE = './working/_minted-main'
+MINTED_LISTING_SUFFIX = '.pygtex'
+
+STYLE = 'default'
+
+# Same settings as \setminted in templates/highlighting.tex
+VERBATIM_OPTIONS = 'frame=single,fontsize=\\small,breaklines=true,breakanywhere'
+
+# Listings of this many lines or more are allowed to break across pages, in both modes (see postprocess.py).
+# It should be changed for different font sizes, font styles, and so on.
+LONG_LISTING_LINES = 40
+
+_cache = None
+
+
+def cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(HIGHLIGHT_CACHE, HIGHLIGHT_CACHE_MAX_BYTES, checksum=True)
+    return _cache
+
+
+def is_long_listing(code):
+    # Counted like postprocess.py does for minted: from the \begin line to the \end line
+    return code.count('\n') + 2 >= LONG_LISTING_LINES
+
+
+def verbatim_options(code):
+    if is_long_listing(code):
+        return VERBATIM_OPTIONS + ',samepage=false'
+    return VERBATIM_OPTIONS
+
+
+def get_lexer(language):
+    from pygments.lexers import get_lexer_by_name
+    from pygments.lexers.special import TextLexer
+    from pygments.util import ClassNotFound
+
+    try:
+        return get_lexer_by_name(language)
+    except ClassNotFound:
+        return TextLexer()
+
+
+def highlight_code(code, language):
+    """
+    highlight_code Highlights a code block as a LaTeX Verbatim environment
+
+    :param code: The contents of the code block
+    :param language: Its language, as given in the markdown (e.g. 'solidity')
+    :return: The LaTeX of the highlighted block.
+    """
+    options = verbatim_options(code)
+    lexer = get_lexer(language)
+
+    # Aliases of the same language (e.g. 'py' and 'python') share their entries
+    digest = hashlib.sha256()
+    for part in (PYGMENTS_VERSION, STYLE, options, lexer.name):
+        digest.update(part.encode() + b'\0')
+    digest.update(code.encode())
+    key = f"pygments-{digest.hexdigest()}"
+
+    cached = cache().get(key)
+    if cached is not None:
+        return cached.decode()
+
+    from pygments import highlight
+    from pygments.formatters import LatexFormatter
+
+    formatter = LatexFormatter(style=STYLE, verboptions=options)
+    latex = highlight(code, lexer, formatter).rstrip('\n')
+    cache().put(key, latex.encode())
+    return latex
+
+
+def style_definitions():
+    """
+    style_definitions Returns the preamble that highlighted blocks need
+    """
+    from pygments.formatters import LatexFormatter
+
+    return '\n'.join([
+        '% Generated by scripts/highlight.py: code blocks are highlighted with Pygments during the conversion',
+        '\\usepackage{fvextra}',
+        '\\usepackage{xcolor}',
+        LatexFormatter(style=STYLE).get_style_defs(),
+        '% No red boxes around tokens Pygments can\'t lex, like the minted workaround in templates/highlighting.tex',
+        '\\makeatletter',
+        '\\@namedef{PY@tok@err}{}',
+        '\\makeatother',
+        '',
+    ])
+
+
+def write_style_definitions(path=HIGHLIGHTING_TEX):
+    with open(path, 'w') as f:
+        f.write(style_definitions())
+
+
+def minted_manifest_key(directory=MINTED_CACHE):
+    """
+    minted_manifest_key Returns the key of the list of the listings a report used, in the shared cache
+
+    The report is identified by the absolute path of its minted cache directory, which is the same on every build
+    of a checkout, locally and on CI.
+    """
+    return 'minted-manifest-' + hashlib.sha256(os.path.abspath(directory).encode()).hexdigest()[:16]
+
+
+def seed_minted_cache(directory=MINTED_CACHE):
+    """
+    seed_minted_cache Copies the listings the report used the last time it was compiled from the shared cache into
+    minted's cache directory
+
+    Only the listings of this report are read, so the time it takes doesn't grow with the shared cache.
+
+    :return: The number of files copied.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = cache().get(minted_manifest_key(directory))
+    if manifest is None:
+        return 0
+
+    seeded = 0
+    for name in manifest.decode().split():
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            continue
+        # Not a use of the entry: minted deletes the files it didn't use, and the rest are touched when harvested
+        data = cache().get(f"minted-{name}", touch=False)
+        if data is not None:
+            with open(path, 'wb') as f:
+                f.write(data)
+            seeded += 1
+    return seeded
+
+
+def harvest_minted_cache(directory=MINTED_CACHE):
+    """
+    harvest_minted_cache Copies the listings minted created into the shared cache, marks the ones it used, and
+    records them as the listings of the report
+
+    :return: The number of files copied.
+    """
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return 0
+
+    # minted deletes the listings the document didn't use, so these are the listings of the report
+    listings = [name for name in names
+                if name.endswith(MINTED_LISTING_SUFFIX) and os.path.isfile(os.path.join(directory, name))]
+    harvested = 0
+    for name in listings:
+        # Reading a known entry marks it as recently used
+        if cache().get(f"minted-{name}") is not None:
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            cache().put(f"minted-{name}", f.read())
+        harvested += 1
+    cache().put(minted_manifest_key(directory), '\n'.join(listings).encode())
+    return harvested
@@ -0,0 +1,133 @@
+"""
+A local SQLite copy of the issues of the audit repositories.
+
+The first build of a report fetches every open issue. Later builds only fetch
+the issues updated since the last sync, then check which issues are still
+open and what their labels are, which is much cheaper than fetching their
+bodies again. report.md is generated from the store, so a build where one
+issue changed only downloads that issue.
+
+The issues are stored by repository, 'owner/repo'. The issues synced with a
+label filter are only the ones that have it, so they are stored apart, under
+'owner/repo label:<label>'.
+"""
+
+import json
+import os
+import sqlite3
+
+ISSUE_STORE = './working/issues.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    repository TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    state TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    html_url TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (repository, number)
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    repository TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL
+);
+"""
+
+COLUMNS = ['number', 'title', 'body', 'state', 'labels', 'html_url', 'created_at', 'updated_at']
+
+
+class IssueStore:
+    def __init__(self, path=ISSUE_STORE):
+        """
+        :param path: The SQLite database. Created with its tables if it does not exist.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The phases of a combined report sync at the same time, each with its own connection
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def last_sync(self, repository):
+        """
+        last_sync Returns the updated_at of the most recently updated issue of the last sync, or None
+        """
+        row = self.connection.execute("SELECT synced_at FROM syncs WHERE repository = ?", (repository,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, repository, issues):
+        """
+        save Inserts or replaces issue records (see fetch_issues.issue_record), and moves the sync point
+        to the latest updated_at among them.
+        """
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO issues (repository, {', '.join(COLUMNS)}) VALUES (?{', ?' * len(COLUMNS)})",
+                [(repository, issue['number'], issue['title'], issue['body'], issue['state'],
+                  json.dumps(issue['labels']), issue['html_url'], issue['created_at'], issue['updated_at'])
+                 for issue in issues])
+
+            latest = max((issue['updated_at'] for issue in issues), default=None)
+            if latest is not None and (self.last_sync(repository) or '') < latest:
+                self.connection.execute("INSERT OR REPLACE INTO syncs (repository, synced_at) VALUES (?, ?)",
+                                        (repository, latest))
+
+    def reconcile(self, repository, open_labels):
+        """
+        reconcile Updates the state and labels of the stored issues from the list of open issues
+
+        Issues that are closed, deleted or transferred are no longer in the list; they are marked closed.
+
+        :param open_labels: Dictionary of the labels of every open issue, by number
+        :return: The number of issues closed and the number of issues whose labels changed.
+        """
+        closed = relabeled = 0
+        with self.connection:
+            rows = self.connection.execute(
+                "SELECT number, state, labels FROM issues WHERE repository = ?", (repository,)).fetchall()
+            for number, state, labels in rows:
+                if number not in open_labels:
+                    if state == 'open':
+                        self.connection.execute("UPDATE issues SET state = 'closed' WHERE repository = ? AND number = ?",
+                                                (repository, number))
+                        closed += 1
+                    continue
+                if state != 'open':
+                    self.connection.execute("UPDATE issues SET state = 'open' WHERE repository = ? AND number = ?",
+                                            (repository, number))
+                if json.loads(labels) != open_labels[number]:
+                    self.connection.execute("UPDATE issues SET labels = ? WHERE repository = ? AND number = ?",
+                                            (json.dumps(open_labels[number]), repository, number))
+                    relabeled += 1
+        return closed, relabeled
+
+    def open_issues(self, repository, label=None):
+        """
+        open_issues Returns the open issues of a repository, oldest first
+
+        :param label: Only return the issues with this label
+        :return: List of issue records.
+        """
+        rows = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM issues WHERE repository = ? AND state = 'open' ORDER BY created_at, number",
+            (repository,)).fetchall()
+
+        issues = []
+        for row in rows:
+            issue = dict(zip(COLUMNS, row))
+            issue['labels'] = json.loads(issue['labels'])
+            if not label or label in issue['labels']:
+                issues.append(issue)
+        return issues
@@ -0,0 +1,166 @@
+"""
+Compiles working/main.tex to PDF with as few pdflatex passes as possible.
+
+LaTeX resolves cross-references, the table of contents and the PDF outline
+through the auxiliary files it writes on every pass and reads on the next
+one. Once a pass leaves those files unchanged, and LaTeX doesn't ask for
+another run in its log, the document has converged and further passes would
+produce the same PDF. A build with auxiliary files left over from a previous
+run of an unchanged report can converge after a single pass.
+"""
+
+import glob
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+
+from . import highlight
+
+LATEX_DIR = './working'
+MAIN_TEX = 'main.tex'
+OUTPUT_PDF = './output/report.pdf'
+
+PDFLATEX = ['pdflatex', '-interaction', 'nonstopmode']
+
+# minted runs pygmentize from pdflatex; code highlighted during the conversion needs no shell escape
+SHELL_ESCAPE = highlight.HIGHLIGHT_MODE == highlight.MINTED
+
+# The files pdflatex reads back on the next pass: labels, table of contents and PDF outline
+AUXILIARY_SUFFIXES = ['.aux', '.toc', '.out']
+
+# Messages of LaTeX, hyperref and rerunfilecheck asking for another pass
+RERUN_PATTERN = re.compile(
+    r'Rerun to get (cross-references|outlines) right'
+    r'|Label\(s\) may have changed\. Rerun'
+    r'|Please rerun LaTeX'
+    r'|Rerun LaTeX'
+)
+
+# Upper bound on passes, in case the document never converges (e.g. a reference that moves a page break)
+MAX_PASSES = int(os.environ.get('LATEX_MAX_PASSES', 4))
+
+
+def auxiliary_hashes(directory=LATEX_DIR):
+    """
+    auxiliary_hashes Returns the sha256 of every auxiliary file of the build
+
+    :param directory: The directory pdflatex runs in
+    :return: A dictionary of file name to hash.
+    """
+    hashes = {}
+    for suffix in AUXILIARY_SUFFIXES:
+        for path in sorted(glob.glob(os.path.join(directory, '*' + suffix))):
+            with open(path, 'rb') as f:
+                hashes[os.path.basename(path)] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def rerun_requested(log_path):
+    """
+    rerun_requested Checks the LaTeX log for a message asking for another pass
+    """
+    try:
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as log:
+            return RERUN_PATTERN.search(log.read()) is not None
+    except FileNotFoundError:
+        return False
+
+
+def pdflatex_path():
+    """
+    pdflatex_path Returns the path of the pdflatex executable, or None if it isn't installed
+    """
+    return shutil.which(PDFLATEX[0])
+
+
+def run_pdflatex(directory=LATEX_DIR, main=MAIN_TEX, log=None):
+    command = PDFLATEX + (['-shell-escape'] if SHELL_ESCAPE else []) + [main]
+    return subprocess.call(command, cwd=directory, stdout=log, stderr=log)
+
+
+def modification_time(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def compile_pdf(directory=LATEX_DIR, main=MAIN_TEX, max_passes=MAX_PASSES, log=None):
+    """
+    compile_pdf Runs pdflatex until the auxiliary files stop changing
+
+    In nonstopmode, pdflatex exits with an error for any LaTeX error but still writes the PDF, so a failed pass is
+    only a warning as long as it wrote one. The build exits if a pass wrote no PDF, or if the document doesn't
+    converge within max_passes.
+
+    :param directory: The directory pdflatex runs in
+    :param main: The main LaTeX file, relative to directory
+    :param max_passes: Maximum number of pdflatex passes
+    :param log: Open file for the output of pdflatex and the reason of every pass
+    :return: The number of passes that were run.
+    """
+    latex_log = os.path.join(directory, os.path.splitext(main)[0] + '.log')
+    pdf = os.path.join(directory, os.path.splitext(main)[0] + '.pdf')
+    hashes = auxiliary_hashes(directory)
+    reason = "first pass"
+
+    for number in range(1, max_passes + 1):
+        if log is not None:
+            log.write(f"==> pdflatex pass {number} ({reason})\n")
+            log.flush()
+        written = modification_time(pdf)
+        code = run_pdflatex(directory, main, log)
+        if code != 0:
+            if modification_time(pdf) in (None, written):
+                print(f"Error: pdflatex pass {number} failed with exit code {code} without writing '{pdf}'. "
+                      f"Check '{latex_log}' and the generation log for the LaTeX error.")
+                exit(1)
+            print(f"Warning: pdflatex pass {number} exited with code {code}. Check '{latex_log}' for the LaTeX errors.")
+
+        previous, hashes = hashes, auxiliary_hashes(directory)
+        changed = sorted(name for name in hashes.keys() | previous.keys() if hashes.get(name) != previous.get(name))
+        if changed:
+            reason = f"{', '.join(changed)} changed"
+        elif rerun_requested(latex_log):
+            reason = "rerun requested in the log"
+        else:
+            return number
+
+    print(f"Error: the document did not converge after {max_passes} pdflatex passes ({reason}). "
+          "Set LATEX_MAX_PASSES to allow more passes.")
+    exit(1)
+
+
+def generate_pdf(log=None, max_passes=MAX_PASSES):
+    """
+    generate_pdf Compiles the report and copies the PDF to the output folder
+
+    pdflatex is not installed on the GitHub runner when this runs (the workflow compiles working/main.tex in a later
+    step), so without it the compilation is skipped with a warning.
+
+    :return: The number of pdflatex passes that were run, or None if pdflatex is not installed.
+    """
+    if pdflatex_path() is None:
+        print(f"Warning: {PDFLATEX[0]} is not installed, skipping the compilation of '{os.path.join(LATEX_DIR, MAIN_TEX)}'.")
+        return None
+
+    if SHELL_ESCAPE:
+        seeded = highlight.seed_minted_cache()
+
+    passes = compile_pdf(max_passes=max_passes, log=log)
+
+    if SHELL_ESCAPE:
+        harvested = highlight.harvest_minted_cache()
+        print(f"minted cache: {seeded} listings restored, {harvested} new listings saved to '{highlight.HIGHLIGHT_CACHE}'.")
+
+    pdf = os.path.join(LATEX_DIR, os.path.splitext(MAIN_TEX)[0] + '.pdf')
+    if os.path.exists(pdf):
+        shutil.copyfile(pdf, OUTPUT_PDF)
+
+    return passes
+
+
+if __name__ == '__main__':
+    generate_pdf()
@@ -1,9 +1,34 @@
 import re
+from typing import NamedTuple
+
+# Anything that looks like a link: a URL, or a word with a dot in it (e.g. github.com/org/repo)
+LINK_PATTERN = re.compile(r'https?://[^\s<>"]+|[^\s<>"]+\.[^\s<>"]+')
+
+CODE_FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+
+# Lines starting like this are lists, code, headings or quotes, which are not merged into a header line
+NOT_MERGED_PATTERN = re.compile(r'^\s*(-|1\.|```|#|>)')
+
+SECTION_HEADERS = ["Description", "Impact", "Proof of Concept", "Recommended Mitigation"]
+
+BROKEN_LINK = 'broken-link'
+POSSIBLE_BROKEN_LINK = 'possible-broken-link'
+POSSIBLE_RAW_LINK = 'possible-raw-link'
+
+# Order the warnings are printed in
+DIAGNOSTIC_ORDER = [BROKEN_LINK, POSSIBLE_BROKEN_LINK, POSSIBLE_RAW_LINK]
+
+
+class Diagnostic(NamedTuple):
+    kind: str
+    line_number: int
+    line: str
+    message: str
 
 
 def replace_org_in_link(line, internal_org, internal_repo_name, source_org, source_repo_name):
     # Identify all links
-    links = re.findall('https?://[^\s<>"]+|[^\s<>"]+\.[^\s<>"]+', line)
+    links = LINK_PATTERN.findall(line)
 
     for link in links:
         if re.search(internal_org, link, re.IGNORECASE):
@@ -13,99 +38,134 @@ def replace_org_in_link(line, internal_org, internal_repo_name, source_org, sour
             # Replace internal repository name with source repository name, if different
             if source_repo_name != internal_repo_name:
                 new_link = re.sub(internal_repo_name, source_repo_name, new_link, flags=re.IGNORECASE)
-            
+
             line = line.replace(link, new_link)
 
     return line
 
 
-def lint(report, team_name, source_org, source_repo_name, internal_org, internal_repo_name,):
-    for line in report:
-        new_line = line
+def header_pattern(team_name, internal_org):
+    """
+    header_pattern Returns a pattern matching the bold headers findings are split in, e.g. **Description:**
+    """
+    names = SECTION_HEADERS + [internal_org, team_name]
+    return re.compile(r'\*\*(?:' + '|'.join(re.escape(name) for name in names) + r'):\*\*')
 
-        # Replace any internal organization repo links
-        new_line = replace_org_in_link(new_line, internal_org, internal_repo_name, source_org, source_repo_name)
 
-        # Replace any double backslashes with single backslashes (GitHub MathJax to LaTeX)
-        new_line = new_line.replace('\\\\', '\\')
+def broken_link_message(line_number, line, issue_title):
+    return (
+        "Broken markdown link in report.md at line "
+        f"{line_number}: {line!r}\n"
+        f"  Issue: {issue_title}\n"
+        "  The URL is wrapped onto the next line. Edit the issue body on "
+        "GitHub so the entire `[text](url)` is on one line, then re-run."
+    )
 
-        report[report.index(line)] = new_line
 
+def check_links(line, line_number, in_code_fence, issue_title, diagnostics):
+    """
+    check_links Appends the diagnostics of the markdown and raw links of a line
+    """
     # Check for link structures ( format [something](url) ) that don't start with http.
     # Skip fenced code blocks (``` / ~~~): code such as Solidity's `new Type[](size)` is not
     # a markdown link, and wrapping its size argument onto the next line ends the line in "]("
     # which would otherwise be misread as a link whose URL spilled onto the next line.
-    in_code_fence = False
-    for idx, line in enumerate(report):
-        stripped = line.lstrip()
-        if stripped.startswith("```") or stripped.startswith("~~~"):
-            in_code_fence = not in_code_fence
-            continue
-        if in_code_fence:
-            continue
+    if not in_code_fence:
         pos = line.find("](")
         while pos != -1:
             # Hard fail when the URL is wrapped onto the next line (line ends with "](").
             # Pandoc won't render this as a link, so refuse to continue and tell the auditor
             # exactly which issue and which line to fix in the source GitHub issue.
             if pos + 2 >= len(line):
-                issue_title = "<unknown — no '### ' heading found above this line>"
-                for prev in range(idx - 1, -1, -1):
-                    if report[prev].startswith("### "):
-                        issue_title = report[prev][4:].strip()
-                        break
-                raise ValueError(
-                    "Broken markdown link in report.md at line "
-                    f"{idx + 1}: {line!r}\n"
-                    f"  Issue: {issue_title}\n"
-                    "  The URL is wrapped onto the next line. Edit the issue body on "
-                    "GitHub so the entire `[text](url)` is on one line, then re-run."
-                )
+                diagnostics.append(Diagnostic(BROKEN_LINK, line_number, line,
+                                              broken_link_message(line_number, line, issue_title)))
             # Check if the first 4 characters after the open-paren are "http"
-            if line[pos+2:pos+6] != "http" and line[pos+2:pos+3] != "#":
-                print(f"Possible broken link at report.md line {idx + 1}: ")
-                print(f"\t{line}")
+            elif line[pos+2:pos+6] != "http" and line[pos+2:pos+3] != "#":
+                diagnostics.append(Diagnostic(POSSIBLE_BROKEN_LINK, line_number, line,
+                                              f"Possible broken link at report.md line {line_number}: "))
             pos = line.find("](", pos+1)
 
     # Check for raw links ("http" string not immediately preceded by a link structure)
-    for line in report:
-        pos = line.find("http")
-        while pos != -1:
-            # Check if the character to the left of "http" is an open-paren preceded by a close-bracket
-            if line[pos-2:pos] != "](":
-                position = report.index(line)
-                print(f"Possible raw link at report.md line {position}: ")
-                print(f"\t{line}")
-            pos = line.find("http", pos+1)
-
-    # Check for descriptions not starting in the same line as the headers
-    lineNumber = 0
-    for line in report:        
-        # If there's a newline, merge the next line with the current one
-        if (
-            (line.startswith("**Description:**") and len(line) < len("**Description:**") + 5) or
-            (line.startswith("**Impact:**") and len(line) < len("**Impact:**") + 5) or
-            (line.startswith("**Proof of Concept:**") and len(line) < len("**Proof of Concept:**") + 5) or
-            (line.startswith("**Recommended Mitigation:**") and len(line) < len("**Recommended Mitigation:**") + 5) or
-            (line.startswith("**" + internal_org + ":**") and len(line) < len("**" + internal_org +":**") + 5) or
-            (line.startswith("**" + team_name + ":**") and len(line) < len("**" + team_name + ":**") + 5)):
-            
+    pos = line.find("http")
+    while pos != -1:
+        # Check if the character to the left of "http" is an open-paren preceded by a close-bracket
+        if pos < 2 or line[pos-2:pos] != "](":
+            diagnostics.append(Diagnostic(POSSIBLE_RAW_LINK, line_number, line,
+                                          f"Possible raw link at report.md line {line_number}: "))
+        pos = line.find("http", pos+1)
+
+
+def lint_lines(report, team_name, source_org, source_repo_name, internal_org, internal_repo_name):
+    """
+    lint_lines Lints the lines of report.md in a single pass
+
+    Internal repository links are replaced by the source ones, double backslashes (GitHub MathJax)
+    become single ones, and bold headers left alone on their line (e.g. **Description:**) are merged
+    with the next line. Links are checked along the way.
+
+    :param report: List of the lines of report.md, without newlines. It is not modified.
+    :return: The new list of lines, and the list of Diagnostic of the input lines.
+    """
+    org_pattern = re.compile(internal_org, re.IGNORECASE)
+    headers = header_pattern(team_name, internal_org)
+
+    lines = []
+    diagnostics = []
+    in_code_fence = False
+    issue_title = "<unknown — no '### ' heading found above this line>"
+    # True while the last line of `lines` is a header waiting for the text that follows it
+    pending_header = False
+
+    for index, line in enumerate(report):
+        # Replace any internal organization repo links
+        if org_pattern.search(line):
+            line = replace_org_in_link(line, internal_org, internal_repo_name, source_org, source_repo_name)
+
+        # Replace any double backslashes with single backslashes (GitHub MathJax to LaTeX)
+        line = line.replace('\\\\', '\\')
+
+        if CODE_FENCE_PATTERN.match(line):
+            in_code_fence = not in_code_fence
+        else:
+            check_links(line, index + 1, in_code_fence, issue_title, diagnostics)
+
+        if line.startswith("### "):
+            issue_title = line[4:].strip()
+
+        # Check for descriptions not starting in the same line as the headers
+        if pending_header:
             # There might be more than one empty lines following the header, remove them
-            while lineNumber + 1 < len(report) and report[lineNumber + 1] == "":
-                del report[lineNumber + 1]
+            if line == "":
+                continue
+            pending_header = False
+            # If it's a list, code or quote, don't merge
+            if not NOT_MERGED_PATTERN.match(line):
+                lines[-1] = lines[-1] + " " + line.lstrip()
+                continue
+
+        header = headers.match(line)
+        pending_header = header is not None and len(line) < len(header.group(0)) + 5
+        lines.append(line)
+
+    return lines, diagnostics
+
+
+def lint(report, team_name, source_org, source_repo_name, internal_org, internal_repo_name,):
+    """
+    lint Lints report.md in place, printing its warnings
 
-            if lineNumber + 1 < len(report):
-                nextLine = report[lineNumber + 1]
-                # If it's a list, code or quote, don't merge
-                if (not nextLine.lstrip().startswith("-") and
-                    not nextLine.lstrip().startswith("1.") and
-                    not nextLine.lstrip().startswith("```") and
-                    not nextLine.lstrip().startswith("#") and
-                    not nextLine.lstrip().startswith(">")):
+    :param report: List of the lines of report.md, without newlines
+    :return: The same list, with the linted lines.
+    """
+    lines, diagnostics = lint_lines(report, team_name, source_org, source_repo_name, internal_org, internal_repo_name)
 
-                    report[lineNumber] = line + " " + nextLine.lstrip()
-                    del report[lineNumber + 1]
+    for diagnostic in diagnostics:
+        if diagnostic.kind == BROKEN_LINK:
+            raise ValueError(diagnostic.message)
 
-        lineNumber = lineNumber + 1
+    for diagnostic in sorted(diagnostics, key=lambda d: DIAGNOSTIC_ORDER.index(d.kind)):
+        print(diagnostic.message)
+        print(f"\t{diagnostic.line}")
 
+    report[:] = lines
     return report
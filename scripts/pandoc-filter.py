@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+''' A pandoc filter that applies pandoc-minted.py and pandoc-image.py in a
+single pass, so pandoc only starts one Python interpreter per conversion.
+
+Usage:
+    pandoc --filter ./pandoc-filter.py -o myfile.tex myfile.md
+'''
+
+import os
+import sys
+
+from pandocfilters import toJSONFilter
+
+# Run as a script by pandoc, so make the `scripts` package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scripts.pandoc_filters import report_filter
+
+
+if __name__ == '__main__':
+    toJSONFilter(report_filter)
@@ -6,26 +6,15 @@ Usage:
     pandoc --filter ./pandoc-image.py -o myfile.tex myfile.md
 '''
 
-from pandocfilters import toJSONFilter, RawBlock
+import os
+import sys
 
-def gfm_img_to_captioned_figure(key, value, format, meta):
-    if key == 'Para':
-        for item in value:
-            if item['t'] == 'Image':
-                # Extract alt text, source (src), and title from the image
-                alt_text = item['c'][1]
-                src = item['c'][2][0]
-                # Convert alt text list to string
-                alt_text_str = ' '.join([str(x['c']) for x in alt_text if x['t'] == 'Str'])
+from pandocfilters import toJSONFilter
 
-                latex_figure = f"""\\begin{{figure}}[!htbp]
-\\centering
-\\includegraphics{{{src}}}
-\\caption{{{alt_text_str}}}
-\\end{{figure}}
-\\FloatBarrier"""
+# Run as a script by pandoc, so make the `scripts` package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-                return RawBlock('latex', latex_figure)
+from scripts.pandoc_filters import gfm_img_to_captioned_figure
 
 if __name__ == "__main__":
     toJSONFilter(gfm_img_to_captioned_figure)
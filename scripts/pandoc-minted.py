@@ -5,80 +5,16 @@ Usage:
     pandoc --filter ./pandoc-minted.py -o myfile.tex myfile.md
 '''
 
-from string import Template
-from pandocfilters import toJSONFilter, RawBlock, RawInline
+import os
+import sys
 
+from pandocfilters import toJSONFilter
 
-def unpack_code(value, language):
-    ''' Unpack the body and language of a pandoc code element.
+# Run as a script by pandoc, so make the `scripts` package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-    Args:
-        value       contents of pandoc object
-        language    default language
-    '''
-    [[_, classes, attributes], contents] = value
-
-    if len(classes) > 0:
-        language = classes[0]
-
-    attributes = ', '.join('='.join(x) for x in attributes)
-
-    return {'contents': contents, 'language': language,
-            'attributes': attributes}
-
-
-def unpack_metadata(meta):
-    ''' Unpack the metadata to get pandoc-minted settings.
-
-    Args:
-        meta    document metadata
-    '''
-    settings = meta.get('pandoc-minted', {})
-    if settings.get('t', '') == 'MetaMap':
-        settings = settings['c']
-
-        # Get language.
-        language = settings.get('language', {})
-        if language.get('t', '') == 'MetaInlines':
-            language = language['c'][0]['c']
-        else:
-            language = None
-
-        return {'language': language}
-
-    else:
-        # Return default settings.
-        return {'language': 'text'}
-    
-
-def minted(key, value, format, meta):
-    ''' Use minted for code in LaTeX.
-
-    Args:
-        key     type of pandoc object
-        value   contents of pandoc object
-        format  target output format
-        meta    document metadata
-    '''
-    if format != 'latex':
-        return
-
-    # Determine what kind of code object this is.
-    if key == 'CodeBlock':
-        template = Template(
-            '\\begin{minted}[$attributes]{$language}\n$contents\n\end{minted}'
-        )
-        Element = RawBlock
-    else:
-        return
-
-    settings = unpack_metadata(meta)
-
-    code = unpack_code(value, settings['language'])
-
-    return [Element(format, template.substitute(code))]
+from scripts.pandoc_filters import minted
 
 
 if __name__ == '__main__':
     toJSONFilter(minted)
-
@@ -0,0 +1,146 @@
+''' The pandoc filters used to convert the report to LaTeX.
+
+minted() has the LaTeX writer use minted for typesetting code, or highlights
+it with Pygments right away when the document's `highlight` metadata is
+'pygments' (see highlight.py), and gfm_img_to_captioned_figure() uses
+markdown alt text for image captions.
+report_filter() applies both of them in a single walk of the document, either
+as a pandoc `--filter` (see pandoc-filter.py) or in-process through
+filter_document().
+'''
+
+from string import Template
+from pandocfilters import applyJSONFilters, RawBlock
+
+from . import highlight
+
+
+def unpack_code(value, language):
+    ''' Unpack the body and language of a pandoc code element.
+
+    Args:
+        value       contents of pandoc object
+        language    default language
+    '''
+    [[_, classes, attributes], contents] = value
+
+    if len(classes) > 0:
+        language = classes[0]
+
+    attributes = ', '.join('='.join(x) for x in attributes)
+
+    return {'contents': contents, 'language': language,
+            'attributes': attributes}
+
+
+def unpack_metadata(meta):
+    ''' Unpack the metadata to get pandoc-minted settings.
+
+    Args:
+        meta    document metadata
+    '''
+    settings = meta.get('pandoc-minted', {})
+    if settings.get('t', '') == 'MetaMap':
+        settings = settings['c']
+
+        # Get language.
+        language = settings.get('language', {})
+        if language.get('t', '') == 'MetaInlines':
+            language = language['c'][0]['c']
+        else:
+            language = None
+
+        return {'language': language}
+
+    else:
+        # Return default settings.
+        return {'language': 'text'}
+
+
+def highlight_mode(meta):
+    ''' Get the highlighting mode from the `highlight` metadata, minted by default.
+
+    Args:
+        meta    document metadata
+    '''
+    mode = meta.get('highlight', {})
+    if mode.get('t', '') == 'MetaString':
+        return mode['c']
+    return highlight.MINTED
+
+
+def minted(key, value, format, meta):
+    ''' Use minted for code in LaTeX.
+
+    Args:
+        key     type of pandoc object
+        value   contents of pandoc object
+        format  target output format
+        meta    document metadata
+    '''
+    if format != 'latex':
+        return
+
+    # Determine what kind of code object this is.
+    if key == 'CodeBlock':
+        template = Template(
+            '\\begin{minted}[$attributes]{$language}\n$contents\n\\end{minted}'
+        )
+        Element = RawBlock
+    else:
+        return
+
+    settings = unpack_metadata(meta)
+
+    code = unpack_code(value, settings['language'])
+
+    if highlight_mode(meta) == highlight.PYGMENTS:
+        return [Element(format, highlight.highlight_code(code['contents'], code['language']))]
+
+    return [Element(format, template.substitute(code))]
+
+
+def gfm_img_to_captioned_figure(key, value, format, meta):
+    if key == 'Para':
+        for item in value:
+            if item['t'] == 'Image':
+                # Extract alt text, source (src), and title from the image
+                alt_text = item['c'][1]
+                src = item['c'][2][0]
+                # Convert alt text list to string
+                alt_text_str = ' '.join([str(x['c']) for x in alt_text if x['t'] == 'Str'])
+
+                latex_figure = f"""\\begin{{figure}}[!htbp]
+\\centering
+\\includegraphics{{{src}}}
+\\caption{{{alt_text_str}}}
+\\end{{figure}}
+\\FloatBarrier"""
+
+                return RawBlock('latex', latex_figure)
+
+
+# Every filter only looks at one type of element, so a single walk can dispatch on it.
+FILTERS_BY_ELEMENT = {
+    'CodeBlock': minted,
+    'Para': gfm_img_to_captioned_figure,
+}
+
+
+def report_filter(key, value, format, meta):
+    ''' Apply all the report filters in a single walk of the document. '''
+    action = FILTERS_BY_ELEMENT.get(key)
+    if action is not None:
+        return action(key, value, format, meta)
+
+
+def filter_document(source, format='latex'):
+    ''' Apply the report filters to a JSON-formatted pandoc document.
+
+    Args:
+        source  the document, as output by `pandoc -t json`
+        format  target output format
+
+    Returns the filtered JSON-formatted document.
+    '''
+    return applyJSONFilters([report_filter], source, format)
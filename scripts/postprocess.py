@@ -0,0 +1,140 @@
+"""
+Post-processes the LaTeX pandoc wrote for the report, in a single streaming pass.
+
+Every rewrite is registered here instead of running as another pass over the
+file:
+- line rewrites replace a regex match with a literal string, anywhere outside
+  the blocks below. All of them are combined into one alternation, so each
+  line is scanned once whatever the number of rewrites.
+- block rewrites collect the lines from a begin pattern to an end pattern,
+  inclusive, and return their replacement. The lines of a block are not
+  touched by the line rewrites.
+
+This is called from convert.py on the LaTeX of report.md before it is cached.
+The rewrites only ever look at one line or one block, so report.md is
+post-processed one finding at a time, and only the findings that are converted
+again go through it.
+"""
+
+import re
+import shutil
+
+from .highlight import LONG_LISTING_LINES
+
+TEMPLATES_DIR = './templates'
+WORKING_DIR = './working'
+REPORT_TEX = './working/report.tex'
+
+# name -> (compiled pattern, replacement)
+LINE_REWRITES = {}
+
+# name -> (compiled begin pattern, compiled end pattern, function of the list of lines)
+BLOCK_REWRITES = {}
+
+
+def register_line_rewrite(name, pattern, replacement):
+    """
+    register_line_rewrite Registers a rewrite of every match of a pattern
+
+    :param pattern: Regex without capturing groups
+    :param replacement: Literal string that replaces every match
+    """
+    LINE_REWRITES[name] = (re.compile(pattern), replacement)
+
+
+def register_block_rewrite(name, begin, end):
+    """
+    register_block_rewrite Decorator registering a function that rewrites the lines of a block
+
+    :param begin: Pattern of the first line of the block
+    :param end: Pattern of the last line of the block
+    """
+    def register(function):
+        BLOCK_REWRITES[name] = (re.compile(begin), re.compile(end), function)
+        return function
+    return register
+
+
+# A temporary work around to have page breaks.
+# FIXME figure out a way to natively do this.
+# On macOS and Linux pandoc escapes \clearpage as `\textbackslash clearpage`, on GitHub CI as `\textbackslash{}clearpage`
+register_line_rewrite('clearpage', r'textbackslash(?: |\{\})clearpage', 'clearpage')
+
+# Adding Needspaces before subsections and subsubsections
+# Maybe 6cm is not the perfect value here, but it works good enough
+register_line_rewrite('needspace-subsubsection', r'\\subsubsection', '\\Needspace{6cm}\\subsubsection')
+register_line_rewrite('needspace-subsection', r'\\subsection', '\\Needspace{8cm}\\subsection')
+
+
+@register_block_rewrite('long-listings', r'\\begin\{minted\}', r'\\end\{minted\}')
+def allow_long_listings_to_break(lines):
+    """
+    allow_long_listings_to_break Allows code listings longer than LONG_LISTING_LINES lines to be split in more than one page
+    """
+    # Counted from the \begin line to the \end line
+    if len(lines) - 1 >= LONG_LISTING_LINES:
+        lines[0] = lines[0].replace("\\begin{minted}[]", "\\begin{minted}[samepage=false]")
+    return lines
+
+
+def combined_line_pattern():
+    """
+    combined_line_pattern Returns one pattern matching any line rewrite, with a named group for each of them
+    """
+    groups = [f"(?P<g{i}>{pattern.pattern})" for i, (pattern, _) in enumerate(LINE_REWRITES.values())]
+    return re.compile('|'.join(groups))
+
+
+def rewrite(lines):
+    """
+    rewrite Applies every registered rewrite to a stream of lines
+
+    :param lines: Iterable of lines, e.g. an open file
+    :return: Generator of the rewritten lines.
+    """
+    replacements = {f"g{i}": replacement for i, (_, replacement) in enumerate(LINE_REWRITES.values())}
+    combined = combined_line_pattern() if LINE_REWRITES else None
+    blocks = list(BLOCK_REWRITES.values())
+
+    block = None
+    end = function = None
+    for line in lines:
+        if block is not None:
+            block.append(line)
+            if end.search(line):
+                yield from function(block)
+                block = None
+            continue
+
+        for begin, block_end, block_function in blocks:
+            if begin.search(line):
+                block, end, function = [line], block_end, block_function
+                break
+        if block is not None:
+            continue
+
+        if combined is not None:
+            line = combined.sub(lambda match: replacements[match.lastgroup], line)
+        yield line
+
+    # An unterminated block is left as it is
+    if block is not None:
+        yield from block
+
+
+def postprocess(latex):
+    """
+    postprocess Applies every registered rewrite to LaTeX text
+
+    :return: The rewritten text.
+    """
+    return ''.join(rewrite(latex.splitlines(keepends=True)))
+
+
+def copy_templates(source=TEMPLATES_DIR, destination=WORKING_DIR, ignore=()):
+    """
+    copy_templates Copies the templates to the working directory
+
+    :param ignore: Names of the templates not to copy, e.g. the ones that are rendered instead
+    """
+    shutil.copytree(source, destination, dirs_exist_ok=True, ignore=shutil.ignore_patterns(*ignore) if ignore else None)
@@ -0,0 +1,123 @@
+"""
+Recorded snapshots of the data fetched from GitHub.
+
+A snapshot holds the issues and the project columns that were fetched for a
+report, for every repository of the report (one per phase of a combined
+report), as JSON:
+
+    {
+        "version": 1,
+        "recorded_at": "2025-01-01T00:00:00Z",
+        "repositories": [
+            {
+                "repository": "https://github.com/org/repo",
+                "issues": [{"number": 1, "title": ..., "labels": [...], ...}],
+                "columns": {"org/1/Report": [1, 2]}
+            }
+        ]
+    }
+
+Issues are the records get_issues reads (see fetch_issues.issue_record), and
+columns are the issue numbers of every project column that was looked up, keyed
+like the project cache. A report built with --replay reads everything from a
+snapshot instead of GitHub, with the same filters applied, so it needs neither
+network nor a token.
+"""
+
+import json
+import os
+import time
+
+SNAPSHOT_VERSION = 1
+
+
+class Snapshot:
+    def __init__(self, repository, issues=None, columns=None, recorded_at=None):
+        self.repository = repository
+        self.issues = {issue['number']: issue for issue in issues or []}
+        self.columns = dict(columns or {})
+        self.recorded_at = recorded_at
+
+    @staticmethod
+    def column_key(repo_owner, project_number, column_name):
+        return f"{repo_owner}/{project_number}/{column_name}"
+
+    def add_issues(self, issues):
+        for issue in issues:
+            self.issues[issue['number']] = issue
+
+    def add_column(self, repo_owner, project_number, column_name, issue_numbers):
+        self.columns[self.column_key(repo_owner, project_number, column_name)] = list(issue_numbers)
+
+    def issues_in_column(self, repo_owner, project_number, column_name):
+        """
+        issues_in_column Returns the recorded issue numbers of a project column, like get_issues_in_column
+        """
+        key = self.column_key(repo_owner, project_number, column_name)
+        if key not in self.columns:
+            print(f"Warning: column '{column_name}' of project #{project_number} is not in the snapshot.")
+            return []
+        return self.columns[key]
+
+    def issues_by_number(self, issue_numbers, label=None):
+        """
+        issues_by_number Returns the recorded issues with the given numbers, like fetch_issues_by_number
+        """
+        issues = []
+        for number in sorted({int(number) for number in issue_numbers if str(number).isdigit()}):
+            if number not in self.issues:
+                print(f"Warning: issue #{number} is not in the snapshot, skipping it.")
+                continue
+            issues.append(self.issues[number])
+        return [issue for issue in issues if not label or label in issue['labels']]
+
+    def open_issues(self, label=None):
+        """
+        open_issues Returns the recorded open issues, oldest first, like fetch_repository_issues
+        """
+        issues = sorted((issue for issue in self.issues.values() if issue['state'] == 'open'),
+                        key=lambda issue: (issue.get('created_at', ''), issue['number']))
+        return [issue for issue in issues if not label or label in issue['labels']]
+
+    def to_json(self):
+        return {
+            'repository': self.repository,
+            'issues': [self.issues[number] for number in sorted(self.issues)],
+            'columns': self.columns,
+        }
+
+
+def save_snapshots(path, snapshots):
+    """
+    save_snapshots Writes the snapshots of the repositories of a report to a file
+
+    :param snapshots: List of Snapshot, one per repository
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        'version': SNAPSHOT_VERSION,
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'repositories': [snapshot.to_json() for snapshot in snapshots],
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_snapshots(path):
+    """
+    load_snapshots Reads a file written by save_snapshots
+
+    :return: Dictionary of Snapshot by repository.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if data.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {data.get('version')!r} in {path}, expected {SNAPSHOT_VERSION}.")
+
+    return {repository['repository']: Snapshot(repository['repository'], repository['issues'], repository['columns'],
+                                               data.get('recorded_at'))
+            for repository in data['repositories']}
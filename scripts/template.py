@@ -0,0 +1,67 @@
+"""
+Templates with __PLACEHOLDER__ names, like templates/title.tex and templates/summary.tex.
+
+A template is read and compiled once: the placeholders it contains become a
+single alternation pattern, longest name first, so a placeholder that is the
+prefix of another (__PLACEHOLDER__REPO_LINK and __PLACEHOLDER__REPO_LINK_2)
+never matches inside it. Rendering is one re.sub over the whole template, and
+every placeholder must have a value. The template files themselves are never
+written; the rendered files go to working/.
+"""
+
+import os
+import re
+import threading
+
+PLACEHOLDER_PATTERN = re.compile(r'__PLACEHOLDER__[A-Z0-9_]*[A-Z0-9]')
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+class UnresolvedPlaceholders(ValueError):
+    def __init__(self, name, placeholders):
+        self.placeholders = sorted(placeholders)
+        super().__init__(f"{name} has placeholders without a value: {', '.join(self.placeholders)}")
+
+
+class Template:
+    def __init__(self, text, name='template'):
+        self.text = text
+        self.name = name
+        self.placeholders = frozenset(PLACEHOLDER_PATTERN.findall(text))
+        names = sorted(self.placeholders, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(name) for name in names)) if names else None
+
+    def render(self, values):
+        """
+        render Fills in the placeholders of the template
+
+        :param values: Dictionary of the value of every placeholder, e.g. {'__PLACEHOLDER__PROJECT_NAME': 'Name'}.
+            Values of placeholders the template doesn't have are ignored.
+        :return: The rendered text.
+        """
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise UnresolvedPlaceholders(self.name, missing)
+        if self.pattern is None:
+            return self.text
+        return self.pattern.sub(lambda match: str(values[match.group(0)]), self.text)
+
+
+def load_template(path):
+    """
+    load_template Returns the compiled template of a file, compiling it again only when the file changes
+    """
+    stat = os.stat(path)
+    path = os.path.abspath(path)
+    with _templates_lock:
+        cached = _templates.get(path)
+    if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    with open(path, 'r') as f:
+        template = Template(f.read(), os.path.basename(path))
+    with _templates_lock:
+        _templates[path] = ((stat.st_mtime_ns, stat.st_size), template)
+    return template
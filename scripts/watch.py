@@ -0,0 +1,117 @@
+"""
+Rebuilds the report whenever its sources change.
+
+The watched files are polled: their modification times and sizes are compared
+every POLL_INTERVAL seconds. Polling works the same on every OS and with
+every editor, and needs no extra dependency; checking the few dozen files of a
+report takes well under a millisecond. Once files change, the rebuild waits
+until they stop changing for DEBOUNCE seconds, so that saving several files at
+once, or an editor writing a file in more than one step, rebuilds only once.
+
+The rebuild gets the changed paths, and runs in the same process every time,
+so everything that is cached in memory (compiled templates, the pandoc version,
+the highlight cache) stays warm between rebuilds.
+"""
+
+import os
+import time
+
+POLL_INTERVAL = 0.25
+DEBOUNCE = 0.3
+
+
+def is_ignored_name(name):
+    # Hidden files, and the backup and swap files of editors
+    return name.startswith('.') or name.endswith('~') or name.endswith('.swp')
+
+
+def snapshot(paths):
+    """
+    snapshot Returns the modification time and size of the files under the given directories, and of the given files
+
+    :param paths: Directories and files to watch
+    :return: Dictionary of (mtime_ns, size) by normalized path.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, directories, names in os.walk(path):
+                directories[:] = [name for name in directories if not is_ignored_name(name)]
+                files.extend(os.path.join(directory, name) for name in names if not is_ignored_name(name))
+        else:
+            files.append(path)
+
+    result = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        result[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def changed_files(before, after):
+    """
+    changed_files Returns the paths that were added, removed or modified between two snapshots
+    """
+    return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+
+def watch(paths, rebuild, written=(), interval=POLL_INTERVAL, debounce=DEBOUNCE, rebuilds=None,
+          sleep=time.sleep, clock=time.monotonic):
+    """
+    watch Calls rebuild every time the watched files change, until interrupted
+
+    A rebuild that fails (raises or exits) is reported, and the next change is waited for.
+
+    :param paths: Directories and files to watch
+    :param rebuild: Function called with the set of changed paths
+    :param written: Paths of the watched files the build itself writes, e.g. report.md that the linter rewrites.
+        Changes the rebuild makes to them don't trigger another rebuild.
+    :param rebuilds: Number of rebuilds after which to return, or None to watch until interrupted
+    :return: The number of rebuilds.
+    """
+    print(f"Watching {', '.join(paths)} for changes. Press Ctrl+C to stop.")
+    count = 0
+    last = snapshot(paths)
+    try:
+        while rebuilds is None or count < rebuilds:
+            sleep(interval)
+            current = snapshot(paths)
+            changed = changed_files(last, current)
+            if not changed:
+                continue
+
+            # Wait until the files stop changing
+            detected = clock()
+            quiet_since = detected
+            while clock() - quiet_since < debounce:
+                sleep(interval)
+                latest = snapshot(paths)
+                if latest != current:
+                    changed |= changed_files(current, latest)
+                    current = latest
+                    quiet_since = clock()
+            # Other changes made while rebuilding are picked up by the next rebuild
+            last = current
+
+            print(f"\nChanged: {', '.join(sorted(changed))}")
+            start = clock()
+            try:
+                rebuild(changed)
+                status = "Rebuilt"
+            except (Exception, SystemExit) as e:
+                status = f"Rebuild failed ({type(e).__name__}: {e})"
+            after = snapshot(paths)
+            for path in map(os.path.normpath, written):
+                last.pop(path, None)
+                if path in after:
+                    last[path] = after[path]
+            count += 1
+            end = clock()
+            print(f"{status} in {end - start:.2f}s, {end - detected:.2f}s after the change was noticed. "
+                  "Waiting for changes...")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    return count
@@ -0,0 +1,129 @@
+"""Unit tests for scripts/anchors.py — native pandoc heading identifiers.
+
+The parity test at the bottom runs only when pandoc is installed, and checks
+the native identifiers against what pandoc actually generates.
+"""
+import shutil
+
+import pytest
+
+from scripts import anchors
+
+
+def _str(text):
+    inlines = []
+    for word in text.split(" "):
+        inlines += [{"t": "Space"}, {"t": "Str", "c": word}]
+    return inlines[1:]
+
+
+class TestSlug:
+    def test_basic(self):
+        assert anchors.slug("Heading identifiers in HTML") == "heading-identifiers-in-html"
+
+    def test_punctuation_dropped_spaces_collapse(self):
+        assert anchors.slug("Reentrancy in withdraw()") == "reentrancy-in-withdraw"
+        assert anchors.slug("A & B: C") == "a-b-c"
+
+    def test_leading_non_letters_dropped(self):
+        assert anchors.slug("1. Numbers first") == "numbers-first"
+        assert anchors.slug("_balance not updated") == "balance-not-updated"
+
+    def test_unicode_letters_kept(self):
+        assert anchors.slug("Maître d'hôtel") == "maître-dhôtel"
+
+    def test_periods_kept(self):
+        assert anchors.slug("Upgrade to version 1.2.3") == "upgrade-to-version-1.2.3"
+
+    def test_nothing_left(self):
+        assert anchors.slug("!!!") == ""
+
+    def test_gfm_flavor(self):
+        assert anchors.slug("A & B: C", anchors.GFM) == "a--b-c"
+        assert anchors.slug("1. Numbers first", anchors.GFM) == "1-numbers-first"
+        assert anchors.slug("Version 1.2", anchors.GFM) == "version-12"
+
+
+class TestInlineText:
+    def test_markup_flattened(self):
+        inlines = [{"t": "Emph", "c": _str("Important")}, {"t": "Space"},
+                   {"t": "Link", "c": [["", [], []], _str("the docs"), ["https://example.com", ""]]}]
+        assert anchors.inline_text(inlines) == "Important the docs"
+
+    def test_code_and_math_verbatim(self):
+        inlines = [{"t": "Code", "c": [["", [], []], "a...b"]}, {"t": "Space"}, {"t": "Math", "c": [{"t": "InlineMath"}, "x^2"]}]
+        assert anchors.inline_text(inlines) == "a...b x^2"
+
+    def test_notes_and_raw_inlines_dropped(self):
+        inlines = _str("Title") + [{"t": "Note", "c": [{"t": "Para", "c": _str("note")}]},
+                                   {"t": "RawInline", "c": ["html", "<br>"]}]
+        assert anchors.inline_text(inlines) == "Title"
+
+    def test_quotes_curly(self):
+        inlines = [{"t": "Quoted", "c": [{"t": "DoubleQuote"}, _str("a")]}]
+        assert anchors.inline_text(inlines) == "\u201ca\u201d"
+
+
+class TestIterHeaders:
+    def test_nested_headers_in_order(self):
+        blocks = [{"t": "Header", "c": [1, ["a", [], []], _str("A")]},
+                  {"t": "BlockQuote", "c": [{"t": "Header", "c": [3, ["b", [], []], _str("B")]}]},
+                  {"t": "Para", "c": _str("text")}]
+        assert list(anchors.iter_headers(blocks)) == [("a", _str("A")), ("b", _str("B"))]
+
+
+class TestIdentifierRegistry:
+    def test_duplicates_get_suffixes(self):
+        registry = anchors.IdentifierRegistry()
+        assert [registry.register("foo") for _ in range(3)] == ["foo", "foo-1", "foo-2"]
+
+    def test_suffix_skips_taken_identifiers(self):
+        registry = anchors.IdentifierRegistry()
+        registry.register("foo")
+        registry.register("foo-1")
+        assert registry.register("foo") == "foo-2"
+
+    def test_empty_identifier_becomes_section(self):
+        registry = anchors.IdentifierRegistry()
+        assert registry.register("") == "section"
+        assert registry.register("") == "section-1"
+
+    def test_gfm_counts_occurrences(self):
+        registry = anchors.IdentifierRegistry(anchors.GFM)
+        assert [registry.register(base) for base in ("foo", "foo", "foo-1", "")] == ["foo", "foo-1", "foo-1", ""]
+
+
+class TestLatexLabel:
+    def test_plain_identifier_unchanged(self):
+        assert anchors.latex_label("foo-bar_1.2") == "foo-bar_1.2"
+
+    def test_non_letter_characters_escaped(self):
+        assert anchors.latex_label("x²") == "xuxb2"
+        assert anchors.latex_label("été") == "uxe9tuxe9"
+
+
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="pandoc is not installed")
+@pytest.mark.parametrize("flavor", [anchors.MARKDOWN, anchors.GFM])
+def test_parity_with_pandoc(flavor):
+    document = "\n\n".join([
+        "## High Risk",
+        "### Reentrancy in `withdraw()`",
+        "### A & B: C",
+        "### 1. Numbers first",
+        "### Maître d'hôtel",
+        "### _Important_ **note** about snake_case_name",
+        "### See [the docs](https://example.com)",
+        "### Upgrade to version 1.2.3",
+        "### A & B: C",
+        "### !!!",
+        "### Wait... what -- now",
+        "### `a_b` and *c* \\_d\\_",
+        "### Use `_safeMint` instead of `_mint`",
+        "### Missing `onlyOwner` on `setFee(uint256)` drains 100% of fees",
+        "### `  spaced  code  `",
+        "### x²",
+        "Setext\n======",
+        "> ### Quoted `code`",
+        "- ### Setext",
+    ])
+    assert anchors.verify_parity(document, flavor) == []
@@ -0,0 +1,190 @@
+"""Unit tests for scripts/build.py — the stage graph of the report build and its up-to-date checks."""
+import threading
+
+import pytest
+
+from scripts import build
+
+
+class _Files:
+    """Stages that write their outputs from their inputs, in a temporary directory"""
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.ran = []
+        self.lock = threading.Lock()
+
+    def path(self, name):
+        return str(self.tmp_path / name)
+
+    def write(self, name, text):
+        (self.tmp_path / name).write_text(text)
+
+    def read(self, name):
+        return (self.tmp_path / name).read_text()
+
+    def stage(self, name, inputs, outputs, transform=str.upper, **kwargs):
+        def action():
+            with self.lock:
+                self.ran.append(name)
+            text = "".join(self.read(path) for path in inputs)
+            for path in outputs:
+                self.write(path, transform(text))
+        return build.Stage(name, action, [self.path(p) for p in inputs], [self.path(p) for p in outputs], **kwargs)
+
+    def run(self, stages, **kwargs):
+        self.ran = []
+        return build.run(stages, state_path=self.path("state.json"), **kwargs)
+
+
+@pytest.fixture
+def files(tmp_path):
+    files = _Files(tmp_path)
+    files.write("a.md", "a")
+    files.write("b.md", "b")
+    return files
+
+
+def _pipeline(files):
+    return [
+        files.stage("convert:a", ["a.md"], ["a.tex"]),
+        files.stage("convert:b", ["b.md"], ["b.tex"]),
+        files.stage("compile", ["a.tex", "b.tex"], ["report.pdf"]),
+    ]
+
+
+class TestDependencies:
+    def test_writers_of_inputs(self, files):
+        assert build.dependencies(_pipeline(files)) == {
+            "convert:a": set(), "convert:b": set(), "compile": {"convert:a", "convert:b"}}
+
+    def test_stage_rewriting_its_input_depends_on_the_earlier_writer(self, files):
+        stages = [files.stage("fetch", ["a.md"], ["report.md"]), files.stage("lint", ["report.md"], ["report.md"]),
+                  files.stage("convert", ["report.md"], ["report.tex"])]
+        assert build.dependencies(stages) == {"fetch": set(), "lint": {"fetch"}, "convert": {"lint"}}
+
+    def test_paths_normalized(self):
+        stages = [build.Stage("a", None, [], ["./working/a.tex"]), build.Stage("b", None, ["working/a.tex"], [])]
+        assert build.dependencies(stages)["b"] == {"a"}
+
+
+class TestRun:
+    def test_first_run_runs_everything(self, files):
+        ran = files.run(_pipeline(files))
+        assert set(ran) == {"convert:a", "convert:b", "compile"}
+        assert files.read("report.pdf") == "AB"
+
+    def test_nothing_changed(self, files):
+        files.run(_pipeline(files))
+        assert files.run(_pipeline(files)) == {}
+
+    def test_only_the_changed_input_and_its_dependents(self, files):
+        files.run(_pipeline(files))
+        files.write("b.md", "c")
+        assert set(files.run(_pipeline(files))) == {"convert:b", "compile"}
+        assert files.read("report.pdf") == "AC"
+
+    def test_unchanged_output_stops_the_rebuild(self, files):
+        stages = [files.stage("convert:a", ["a.md"], ["a.tex"], transform=lambda text: "same"),
+                  files.stage("compile", ["a.tex"], ["report.pdf"])]
+        files.run(stages)
+        files.write("a.md", "changed")
+        assert set(files.run(stages)) == {"convert:a"}
+
+    def test_missing_or_modified_output(self, files):
+        files.run(_pipeline(files))
+        (files.tmp_path / "a.tex").unlink()
+        assert set(files.run(_pipeline(files))) == {"convert:a"}
+        files.write("b.tex", "edited")
+        assert set(files.run(_pipeline(files))) == {"convert:b"}
+
+    def test_params_are_fingerprinted(self, files):
+        stage = lambda mode: [files.stage("convert:a", ["a.md"], ["a.tex"], params=[mode])]
+        files.run(stage("minted"))
+        assert files.run(stage("minted")) == {}
+        assert set(files.run(stage("pygments"))) == {"convert:a"}
+
+    def test_always(self, files):
+        stages = [files.stage("fetch", ["a.md"], ["report.md"], always=True), files.stage("convert", ["report.md"], ["r.tex"])]
+        files.run(stages)
+        assert set(files.run(stages)) == {"fetch"}
+
+    def test_stage_rewriting_its_input_is_up_to_date_after_it_runs(self, files):
+        stages = [files.stage("lint", ["a.md"], ["a.md"])]
+        files.run(stages)
+        assert files.read("a.md") == "A"
+        assert files.run(stages) == {}
+
+    def test_rewritten_output_does_not_make_its_first_writer_stale(self, files):
+        stages = [files.stage("fetch", ["a.md"], ["report.md"], transform=str.lower),
+                  files.stage("lint", ["report.md"], ["report.md"])]
+        files.run(stages)
+        assert files.read("report.md") == "A"
+        assert files.run(stages) == {}
+
+    def test_independent_stages_run_concurrently(self, files):
+        # Both conversions wait for each other, so this only returns if they run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        stages = _pipeline(files)
+        for stage in stages[:2]:
+            stage.action = (lambda action: lambda: (barrier.wait(), action()))(stage.action)
+        assert set(files.run(stages, max_workers=2)) == {"convert:a", "convert:b", "compile"}
+
+    def test_failure_stops_dependents(self, files):
+        stages = _pipeline(files)
+        stages[0].action = lambda: exit(1)
+        with pytest.raises(SystemExit):
+            files.run(stages, max_workers=1)
+        assert "compile" not in files.ran
+        # The failed stage runs again next time
+        stages = _pipeline(files)
+        assert "convert:a" in files.run(stages)
+
+    def test_failure_does_not_stop_independent_stages(self, files, capsys):
+        # Like the compilation failing while the Solodit export doesn't depend on it
+        stages = _pipeline(files) + [files.stage("export", ["b.md"], ["export.md"])]
+        stages[0].action = lambda: exit(1)
+        with pytest.raises(SystemExit):
+            files.run(stages, max_workers=1)
+        assert "compile" not in files.ran
+        assert "export" in files.ran and files.read("export.md") == "B"
+        out = capsys.readouterr().out
+        assert "Failed stages: convert:a." in out
+        assert "Skipped because a stage they depend on failed: compile." in out
+
+
+class TestChanged:
+    def test_affected(self, files):
+        assert build.affected(_pipeline(files), [files.path("b.md")]) == {"convert:b", "compile"}
+        assert build.affected(_pipeline(files), [files.path("other.md")]) == set()
+
+    def test_only_affected_stages_are_checked(self, files):
+        files.run(_pipeline(files))
+        files.write("a.md", "x")
+        files.write("b.md", "y")
+        # a.md changed too, but only b.md is reported
+        assert set(files.run(_pipeline(files), changed=[files.path("b.md")])) == {"convert:b", "compile"}
+        assert files.read("report.pdf") == "AY"
+
+    def test_affected_stages_still_use_fingerprints(self, files):
+        files.run(_pipeline(files))
+        assert files.run(_pipeline(files), changed=[files.path("a.md")]) == {}
+
+
+class TestSelect:
+    def test_only(self, files):
+        files.run(_pipeline(files))
+        assert set(files.run(_pipeline(files), only="convert:b")) == {"convert:b"}
+
+    def test_only_prefix(self, files):
+        files.run(_pipeline(files))
+        assert set(files.run(_pipeline(files), only="convert")) == {"convert:a", "convert:b"}
+
+    def test_from_runs_dependents(self, files):
+        files.run(_pipeline(files))
+        assert set(files.run(_pipeline(files), start="convert:a")) == {"convert:a", "compile"}
+
+    def test_unknown_stage(self, files, capsys):
+        with pytest.raises(SystemExit):
+            build.select(_pipeline(files), only="nope")
+        assert "convert:a, convert:b, compile" in capsys.readouterr().out
@@ -0,0 +1,170 @@
+"""Unit tests for scripts/convert.py — the pandoc conversions and their cache.
+
+pandoc itself is replaced by a fake runner where the tests only check how the
+conversions are cached and logged. The fragment conversions run the real pandoc, when it
+is installed, and compare the stitched fragments with a whole-document run.
+"""
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from scripts import anchors, convert, fragments
+from scripts.disk_cache import DiskCache
+
+
+def _fake_run(conversion, filter_mode=None, cache=None, highlight_mode=None):
+    source, output, reader = conversion
+    result = subprocess.CompletedProcess(args=[], returncode=0, stdout=f"converted {source}\n", stderr="")
+    return result, 0.0, "converted"
+
+
+class TestPandocCommand:
+    def test_single_filter_and_reader(self):
+        assert convert.pandoc_command("markdown", "minted") == [
+            "pandoc", "--filter", "./scripts/pandoc-filter.py", "--from", "markdown", "--to", "latex",
+            "--metadata", "highlight=minted",
+        ]
+
+    def test_readers_kept_per_file(self):
+        readers = {source: reader for source, _, reader in convert.CONVERSIONS}
+        assert readers["./source/protocol_summary.md"] == "markdown"
+        assert readers["./source/executive_summary.md"] == "markdown"
+        assert readers["./source/report.md"] == "gfm"
+
+
+class TestConvertFile:
+    def test_appended_to_the_log(self, tmp_path, monkeypatch):
+        log = tmp_path / "conversion.log"
+        log.write_text("==> earlier conversion\n")
+        monkeypatch.setattr(convert, "CONVERSION_LOG", str(log))
+        monkeypatch.setattr(convert, "run_conversion", _fake_run)
+
+        convert.convert_file(("b.md", str(tmp_path / "b.tex"), "gfm"))
+
+        assert log.read_text().splitlines() == [
+            "==> earlier conversion", f"==> b.md -> {tmp_path / 'b.tex'} (--from gfm, converted, 0.00s)", "converted b.md"]
+
+    def test_failure_exits(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(convert, "CONVERSION_LOG", str(tmp_path / "conversion.log"))
+        failed = subprocess.CompletedProcess(args=[], returncode=1, stdout="", stderr="error")
+        monkeypatch.setattr(convert, "run_conversion", lambda *args: (failed, 0.0, "exit code 1"))
+        with pytest.raises(SystemExit):
+            convert.convert_file(("a.md", str(tmp_path / "a.tex"), "gfm"))
+
+
+class TestConversionCache:
+    def test_hit_restores_output_without_pandoc(self, tmp_path, monkeypatch):
+        source = tmp_path / "in.md"
+        output = tmp_path / "out.tex"
+        source.write_text("# Title")
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1024, suffix=".tex")
+
+        monkeypatch.setattr(convert, "pandoc_version", lambda: "pandoc 3.1.3")
+        calls = []
+
+        def fake_convert(markdown, reader, filter_mode=None, highlight_mode=None):
+            calls.append(markdown)
+            return subprocess.CompletedProcess(args=[], returncode=0, stdout="\\section{Title}", stderr="")
+
+        monkeypatch.setattr(convert, "markdown_to_latex", fake_convert)
+
+        job = (str(source), str(output), "gfm")
+        assert convert.run_conversion(job, cache=cache)[2] == "converted"
+        output.unlink()
+        assert convert.run_conversion(job, cache=cache)[2] == "restored from cache"
+        assert output.read_text() == "\\section{Title}"
+        assert len(calls) == 1
+
+    def test_key_depends_on_reader_and_pandoc_version(self, monkeypatch):
+        monkeypatch.setattr(convert, "pandoc_version", lambda: "pandoc 3.1.3")
+        key = convert.cache_key(b"text", "gfm", "inprocess")
+        assert key != convert.cache_key(b"text", "markdown", "inprocess")
+        assert key != convert.cache_key(b"other", "gfm", "inprocess")
+        monkeypatch.setattr(convert, "pandoc_version", lambda: "pandoc 3.2")
+        assert key != convert.cache_key(b"text", "gfm", "inprocess")
+
+
+def _report(*bodies, title="Same title"):
+    return "".join(f"{fragments.marker(f'issue-{n}')}\n\n### {title}\n\n{body}\n\n" for n, body in enumerate(bodies, start=1))
+
+
+def _without_targets(latex):
+    return re.sub(r"\\hypertarget\{fragment:[^}]*\}\{\}(%\n)?", "", latex)
+
+
+def _counting(monkeypatch):
+    calls = []
+    convert_together = convert.convert_together
+
+    def counted(texts, *args):
+        calls.append(texts)
+        return convert_together(texts, *args)
+
+    monkeypatch.setattr(convert, "convert_together", counted)
+    return calls
+
+
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="pandoc is not installed")
+class TestFragmentConversion:
+    def test_only_changed_fragments_are_converted(self, tmp_path, monkeypatch):
+        calls = _counting(monkeypatch)
+        cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+
+        first, converted = convert.convert_fragments(_report("one", "two", "three"), "gfm", cache=cache)
+        assert converted == 3
+        assert len(calls) == 1  # all the misses share one pandoc run
+
+        second, converted = convert.convert_fragments(_report("one", "changed", "three"), "gfm", cache=cache)
+        assert converted == 1
+        assert second.stdout == first.stdout.replace("two", "changed")
+
+    def test_duplicate_labels_numbered_like_the_whole_document(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+        # Setext headings and headings in block quotes and lists are numbered by pandoc as well
+        bodies = ["a", "Same title\n----------", "> ### Same title", "- ### Same title\n\n### Same title 1"]
+
+        convert.convert_fragments(_report(*bodies[:2]), "gfm", cache=cache)
+        # The last fragments are converted on their own, where pandoc would label them 'same-title'
+        result, converted = convert.convert_fragments(_report(*bodies), "gfm", cache=cache)
+        assert converted == 2
+        assert _without_targets(result.stdout) == convert.markdown_to_latex(_report(*bodies), "gfm").stdout
+
+    def test_markdown_reader_takes_the_first_free_suffix(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+        bodies = ["### Same title 1", "a", "b"]
+
+        convert.convert_fragments(_report(*bodies[:1]), "markdown", cache=cache)
+        result, _ = convert.convert_fragments(_report(*bodies), "markdown", cache=cache)
+        assert convert.LABEL_PATTERN.findall(result.stdout) == [
+            "same-title", "same-title-1", "same-title-2", "same-title-3"]
+        assert _without_targets(result.stdout) == convert.markdown_to_latex(_report(*bodies), "markdown").stdout
+
+    def test_whole_document_converted_when_labels_cant_be_numbered(self, tmp_path, monkeypatch):
+        cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+        convert.convert_fragments(_report("a"), "markdown", cache=cache)
+
+        calls = _counting(monkeypatch)
+        document = _report("a", "### Explicit {#same-title}")
+        result, converted = convert.convert_fragments(document, "markdown", cache=cache)
+        assert converted == 2
+        assert [len(texts) for texts in calls] == [1, 2]
+        assert _without_targets(result.stdout) == convert.markdown_to_latex(document, "markdown").stdout
+
+    def test_fragment_targets_follow_the_first_label(self):
+        result, _ = convert.convert_fragments(f"intro\n\n{_report('a', 'b')}", "gfm")
+        assert result.stdout.startswith("\\hypertarget{fragment:preamble}{}%\nintro")
+        assert "\\label{same-title}\\hypertarget{fragment:issue-1}{}" in result.stdout
+        assert "\\label{same-title-1}\\hypertarget{fragment:issue-2}{}" in result.stdout
+
+    def test_rewritten_before_caching(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+        result, _ = convert.convert_fragments(_report("a", "b"), "gfm", cache=cache, rewrite=True)
+        assert result.stdout.count("\\Needspace{6cm}\\subsubsection") == 2
+
+    def test_hypertargets_follow_their_label(self):
+        section = "\\hypertarget{x}{%\n\\subsection{X}\\label{x}}"
+        fragment = {"latex": f"\\hypertarget{{other}}{{}}\n{section}", "headers": [["x", "x"]]}
+        assert convert.renumber_labels([fragment, fragment], anchors.GFM) == [
+            fragment["latex"], fragment["latex"].replace("{x}", "{x-1}")]
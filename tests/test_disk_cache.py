@@ -0,0 +1,72 @@
+"""Unit tests for scripts/disk_cache.py — the size-bounded LRU file cache."""
+import os
+
+from scripts.disk_cache import DiskCache
+
+
+def _age(cache, key, seconds):
+    # Push an entry's last use into the past, as if it had not been read for a while
+    path = cache.path(key)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+class TestDiskCache:
+    def test_miss_then_hit(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=1024, suffix=".tex")
+        assert cache.get("k") is None
+        cache.put("k", b"data")
+        assert cache.get("k") == b"data"
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.summary() == "1 hits, 1 misses"
+
+    def test_evicts_least_recently_used_over_limit(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=10)
+        cache.put("old", b"12345")
+        cache.put("used", b"12345")
+        _age(cache, "old", 100)
+        _age(cache, "used", 200)
+        # Reading refreshes "used", so "old" is now the least recently used entry
+        cache.get("used")
+        cache.put("new", b"12345")
+        assert cache.get("old") is None
+        assert cache.get("used") == b"12345"
+        assert cache.get("new") == b"12345"
+
+    def test_directory_is_only_listed_to_evict(self, tmp_path, monkeypatch):
+        cache = DiskCache(str(tmp_path), max_bytes=12)
+        cache.put("a", b"1234")
+        listed = []
+        entries = cache.entries
+        monkeypatch.setattr(cache, "entries", lambda: listed.append(1) or entries())
+        cache.put("b", b"1234")
+        # Replacing an entry doesn't count it twice
+        cache.put("b", b"1234")
+        cache.put("c", b"1234")
+        assert listed == []
+        cache.put("d", b"1234")
+        assert len(listed) == 1
+        assert cache.get("a") is None and cache.get("d") == b"1234"
+
+    def test_entries_ignore_other_suffixes(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=1024, suffix=".tex")
+        cache.put("a", b"x")
+        (tmp_path / "notes.txt").write_text("not an entry")
+        assert [os.path.basename(path) for _, _, path in cache.entries()] == ["a.tex"]
+
+
+class TestChecksum:
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=1024, checksum=True)
+        cache.put("k", b"data")
+        assert cache.get("k") == b"data"
+        with open(cache.path("k"), "ab") as entry:
+            entry.write(b"garbage")
+        assert cache.get("k") is None
+        assert not os.path.exists(cache.path("k"))
+
+    def test_keys(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=1024, suffix=".tex", checksum=True)
+        cache.put("a", b"x")
+        cache.put("b", b"y")
+        assert sorted(cache.keys()) == ["a", "b"]
@@ -0,0 +1,387 @@
+"""Unit tests for scripts/fetch_issues.py — fetching issues with GitHub's GraphQL and REST APIs.
+
+run_graphql_query and the transport are replaced by fakes that serve canned pages, so no network is needed.
+"""
+import json
+import threading
+
+import requests
+
+from scripts import fetch_issues
+from scripts.findings import Finding, Findings
+from scripts.snapshot import Snapshot, save_snapshots
+
+
+def _node(number, labels=("Severity: High Risk", "Report Status: Open"), state="OPEN", updated_at=None):
+    return {
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "Body",
+        "state": state,
+        "url": f"https://github.com/org/repo/issues/{number}",
+        "createdAt": f"2025-01-01T00:00:{number:02d}Z",
+        "updatedAt": updated_at or f"2025-01-01T00:00:{number:02d}Z",
+        "labels": {"nodes": [{"name": name} for name in labels]},
+    }
+
+
+def _pages(*pages):
+    """A fake run_graphql_query serving one page of issue nodes per call."""
+    calls = []
+
+    def run_graphql_query(query, variables=None):
+        calls.append(variables)
+        index = len(calls) - 1
+        has_next = index + 1 < len(pages)
+        return {"data": {"repository": {"issues": {
+            "pageInfo": {"hasNextPage": has_next, "endCursor": f"cursor-{index}" if has_next else None},
+            "nodes": pages[index],
+        }}}}
+
+    return run_graphql_query, calls
+
+
+class TestFetchRepositoryIssues:
+    def test_follows_cursors_until_last_page(self, monkeypatch):
+        run, calls = _pages([_node(1), _node(2)], [_node(3)])
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+
+        issues = fetch_issues.fetch_repository_issues("org", "repo")
+
+        assert [issue["number"] for issue in issues] == [1, 2, 3]
+        assert [call["cursor"] for call in calls] == [None, "cursor-0"]
+        assert all(call["pageSize"] == 100 for call in calls)
+
+    def test_records_have_label_names(self, monkeypatch):
+        run, _ = _pages([_node(7)])
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+
+        [issue] = fetch_issues.fetch_repository_issues("org", "repo")
+
+        assert issue == {
+            "number": 7,
+            "title": "Issue 7",
+            "body": "Body",
+            "state": "open",
+            "labels": ["Severity: High Risk", "Report Status: Open"],
+            "html_url": "https://github.com/org/repo/issues/7",
+            "created_at": "2025-01-01T00:00:07Z",
+            "updated_at": "2025-01-01T00:00:07Z",
+        }
+
+    def test_query_excludes_pull_requests_and_closed_issues(self, monkeypatch):
+        assert "issues(first: $pageSize" in fetch_issues.REPOSITORY_ISSUES_QUERY
+        assert "pullRequests" not in fetch_issues.REPOSITORY_ISSUES_QUERY
+
+        run, calls = _pages([_node(1)])
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+        fetch_issues.fetch_repository_issues("org", "repo")
+        assert "states: [OPEN]" in fetch_issues.REPOSITORY_ISSUES_QUERY
+
+    def test_label_filter_sent_to_github(self, monkeypatch):
+        for label, expected in (("Phase 2", ["Phase 2"]), (None, None)):
+            run, calls = _pages([_node(1)])
+            monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+            fetch_issues.fetch_repository_issues("org", "repo", label)
+            assert calls[0]["labels"] == expected
+
+
+def _rest_issue(number, labels=("Severity: High Risk", "Report Status: Open"), state="open", updated_at=None, **extra):
+    return dict({
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "Body",
+        "state": state,
+        "html_url": f"https://github.com/org/repo/issues/{number}",
+        "created_at": f"2025-01-01T00:00:{number:02d}Z",
+        "updated_at": updated_at or f"2025-01-01T00:00:{number:02d}Z",
+        "labels": [{"name": name} for name in labels],
+    }, **extra)
+
+
+class _FakeTransport:
+    """Serves pages of REST issues, linked with a Link header like GitHub's."""
+
+    def __init__(self, *pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, path, params=None):
+        self.calls.append((path, params))
+        index = len(self.calls) - 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(self.pages[index]).encode()
+        if index + 1 < len(self.pages):
+            response.headers["Link"] = f'<https://api.example.com/next?page={index + 2}>; rel="next"'
+        return response
+
+
+class TestRestIssuePages:
+    def test_follows_link_header_and_skips_pull_requests(self, monkeypatch):
+        transport = _FakeTransport([_rest_issue(1), _rest_issue(2, pull_request={})], [_rest_issue(3)])
+        monkeypatch.setattr(fetch_issues, "get_transport", lambda: transport)
+
+        issues = fetch_issues.fetch_updated_issues("org", "repo", "2025-01-01T00:00:00Z")
+
+        assert [issue["number"] for issue in issues] == [1, 3]
+        assert transport.calls[0] == ("repos/org/repo/issues", {"state": "all", "since": "2025-01-01T00:00:00Z", "per_page": 100})
+        assert transport.calls[1] == ("https://api.example.com/next?page=2", None)
+
+    def test_records_match_graphql_records(self, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "get_transport", lambda: _FakeTransport([_rest_issue(7)]))
+        [issue] = fetch_issues.fetch_updated_issues("org", "repo", "2025-01-01T00:00:00Z")
+        assert issue == fetch_issues.issue_record(_node(7))
+
+    def test_label_filter_sent_to_github(self, monkeypatch):
+        transport = _FakeTransport([])
+        monkeypatch.setattr(fetch_issues, "get_transport", lambda: transport)
+        fetch_issues.fetch_updated_issues("org", "repo", "2025-01-01T00:00:00Z", "Phase 2")
+        assert transport.calls[0][1]["labels"] == "Phase 2"
+
+
+class TestFetchOpenIssueLabels:
+    def test_numbers_and_labels_only(self, monkeypatch):
+        run, calls = _pages([{"number": 1, "labels": {"nodes": [{"name": "Phase 2"}]}}], [{"number": 2, "labels": {"nodes": []}}])
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+
+        assert fetch_issues.fetch_open_issue_labels("org", "repo", "Phase 2") == {1: ["Phase 2"], 2: []}
+        assert calls[0]["labels"] == ["Phase 2"] and calls[1]["cursor"] == "cursor-0"
+
+    def test_query_has_no_bodies(self):
+        query = fetch_issues.OPEN_ISSUE_LABELS_QUERY
+        assert "states: [OPEN]" in query and "labels: $labels" in query
+        assert "body" not in query and "IssueFields" not in query
+
+
+class TestSyncRepositoryIssues:
+    def test_first_sync_fetches_every_open_issue(self, tmp_path, monkeypatch):
+        run, calls = _pages([_node(1), _node(2)])
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+
+        with fetch_issues.IssueStore(str(tmp_path / "issues.sqlite")) as store:
+            issues = fetch_issues.sync_repository_issues("org", "repo", store)
+
+        assert [issue["number"] for issue in issues] == [1, 2]
+        assert len(calls) == 1
+
+    def test_later_sync_fetches_updates_and_labels(self, tmp_path, monkeypatch):
+        with fetch_issues.IssueStore(str(tmp_path / "issues.sqlite")) as store:
+            run, _ = _pages([_node(1), _node(2), _node(3)])
+            monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+            fetch_issues.sync_repository_issues("org", "repo", store)
+
+            # 1 is edited, 2 is closed without being updated, 3 is relabeled
+            since = []
+            edited = dict(fetch_issues.issue_record(_node(1, updated_at="2025-02-01T00:00:00Z")), title="Edited")
+            monkeypatch.setattr(fetch_issues, "fetch_updated_issues", lambda owner, name, time, label: since.append(time) or [edited])
+            monkeypatch.setattr(fetch_issues, "fetch_open_issue_labels", lambda owner, name, label: {
+                1: ["Severity: High Risk", "Report Status: Open"], 3: ["Severity: Low Risk", "Report Status: Open"]})
+            issues = fetch_issues.sync_repository_issues("org", "repo", store)
+
+        assert since == ["2025-01-01T00:00:03Z"]
+        assert [(issue["number"], issue["title"], issue["labels"][0]) for issue in issues] == [
+            (1, "Edited", "Severity: High Risk"), (3, "Issue 3", "Severity: Low Risk")]
+
+
+    def test_label_filtered_by_github_and_stored_apart(self, tmp_path, monkeypatch):
+        with fetch_issues.IssueStore(str(tmp_path / "issues.sqlite")) as store:
+            run, calls = _pages([_node(1, labels=("Phase 2",))])
+            monkeypatch.setattr(fetch_issues, "run_graphql_query", run)
+            assert [issue["number"] for issue in fetch_issues.sync_repository_issues("org", "repo", store, "Phase 2")] == [1]
+            assert calls[0]["labels"] == ["Phase 2"]
+
+            # The label is removed from 1, which is no longer among the open issues with it
+            requested = []
+            monkeypatch.setattr(fetch_issues, "fetch_updated_issues", lambda owner, name, time, label: requested.append(label) or [])
+            monkeypatch.setattr(fetch_issues, "fetch_open_issue_labels", lambda owner, name, label: requested.append(label) or {})
+            assert fetch_issues.sync_repository_issues("org", "repo", store, "Phase 2") == []
+            assert requested == ["Phase 2", "Phase 2"]
+
+            # Syncing without the label doesn't reuse the filtered copy
+            assert store.last_sync("org/repo") is None
+
+class TestFetchIssuesByNumber:
+    def _fake(self, existing, calls, labels=None):
+        def run_graphql_query(query, variables=None, allowed_errors=()):
+            calls.append(query)
+            repository = {}
+            for number in existing:
+                if f"issue_{number}: issue(number: {number})" in query:
+                    repository[f"issue_{number}"] = _node(number, *([labels[number]] if labels else []))
+            for alias in query.split():
+                if alias.startswith("issue_") and alias.endswith(":") and alias[:-1] not in repository:
+                    assert "NOT_FOUND" in allowed_errors
+                    repository[alias[:-1]] = None
+            return {"data": {"repository": repository}}
+        return run_graphql_query
+
+    def test_batches_of_aliases(self, monkeypatch):
+        calls = []
+        numbers = list(range(1, 121))
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake(numbers, calls))
+
+        issues = fetch_issues.fetch_issues_by_number("org", "repo", [str(n) for n in reversed(numbers)])
+
+        assert [issue["number"] for issue in issues] == numbers
+        assert len(calls) == 3
+        assert calls[0].count("...IssueFields") == fetch_issues.ISSUES_PER_QUERY
+
+    def test_missing_numbers_skipped(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake([1, 3], calls))
+
+        issues = fetch_issues.fetch_issues_by_number("org", "repo", ["1", "2", "3", "x"])
+
+        assert [issue["number"] for issue in issues] == [1, 3]
+
+    def test_label_filter(self, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake([1], []))
+
+        assert fetch_issues.fetch_issues_by_number("org", "repo", [1], "Severity: High Risk")
+        assert fetch_issues.fetch_issues_by_number("org", "repo", [1], "Other") == []
+
+    def test_label_filter_keeps_the_order(self, monkeypatch):
+        labels = {1: ["Phase 2"], 2: [], 3: ["Other", "Phase 2"]}
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake([1, 2, 3], [], labels))
+
+        issues = fetch_issues.fetch_issues_by_number("org", "repo", [3, 2, 1], "Phase 2")
+
+        assert [(issue["number"], issue["labels"]) for issue in issues] == [(1, ["Phase 2"]), (3, ["Other", "Phase 2"])]
+
+
+def _item(number, option_id, repo="repo", field_id="F1"):
+    return {
+        "fieldValues": {"nodes": [{}, {"optionId": option_id, "field": {"id": field_id}}]},
+        "content": {"number": number, "repository": {"name": repo}},
+    }
+
+
+def _items(nodes, cursor=None):
+    return {"pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor}, "nodes": nodes}
+
+
+class TestGetIssuesInColumn:
+    FIELDS = {"nodes": [
+        {},
+        {"id": "F1", "name": "Status", "options": [{"id": "O-todo", "name": "Todo"}, {"id": "O-report", "name": "Report"}]},
+    ]}
+
+    def _fake(self, calls, item_pages, project_id="P1"):
+        """The first page of items comes with the ProjectColumn query, the others with ProjectItems."""
+        def run_graphql_query(query, variables=None, allowed_errors=()):
+            calls.append(query.split("(")[0].split()[-1])
+            if "query ProjectColumn" in query:
+                project = {"id": project_id, "fields": self.FIELDS, "items": item_pages[0]}
+                return {"data": {"repositoryOwner": {"projectV2": project}}}
+            if variables["projectId"] != project_id:
+                return {"data": {"node": None}}
+            page = item_pages[0] if variables["cursor"] is None else \
+                item_pages[[p["pageInfo"]["endCursor"] for p in item_pages].index(variables["cursor"]) + 1]
+            return {"data": {"node": {"items": page}}}
+        return run_graphql_query
+
+    def test_single_query_then_pages(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+        calls = []
+        pages = [
+            _items([_item(1, "O-report"), _item(2, "O-todo"), _item(3, "O-report", repo="other")], "c1"),
+            _items([_item(4, "O-report")], "c2"),
+            _items([_item(5, "O-report")]),
+        ]
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake(calls, pages))
+
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Report") == [1, 4, 5]
+        assert calls == ["ProjectColumn", "ProjectItems", "ProjectItems"]
+
+    def test_cached_ids_skip_the_lookup(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+        calls = []
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake(calls, [_items([_item(1, "O-report")])]))
+
+        fetch_issues.get_issues_in_column("org", "repo", 5, "Report")
+        calls.clear()
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Report") == [1]
+        assert calls == ["ProjectItems"]
+
+    def test_stale_cache_is_resolved_again(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+        fetch_issues.save_project_cache({"org/5/Report": {"project_id": "gone", "field_id": "F", "option_id": "O"}})
+        calls = []
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake(calls, [_items([_item(1, "O-report")])]))
+
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Report") == [1]
+        assert calls == ["ProjectItems", "ProjectColumn"]
+        assert fetch_issues.load_project_cache()["org/5/Report"]["project_id"] == "P1"
+
+    def test_same_option_id_in_another_field(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+        pages = [_items([_item(1, "O-report"), _item(2, "O-report", field_id="F-other")])]
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake([], pages))
+
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Report") == [1]
+        # Also when the ids come from the cache
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Report") == [1]
+
+    def test_cache_without_field_id_is_resolved_again(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+        fetch_issues.save_project_cache({"org/5/Report": {"project_id": "P1", "option_id": "O-report"}})
+        calls = []
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake(calls, [_items([_item(1, "O-report")])]))
+
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Report") == [1]
+        assert calls == ["ProjectColumn"]
+        assert fetch_issues.load_project_cache()["org/5/Report"]["field_id"] == "F1"
+
+    def test_unknown_column(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+        monkeypatch.setattr(fetch_issues, "run_graphql_query", self._fake([], [_items([])]))
+        assert fetch_issues.get_issues_in_column("org", "repo", 5, "Missing") == []
+
+
+class TestFetchPhases:
+    def _phases(self, count):
+        return [{"name": f"Phase {n}", "private_github": f"https://github.com/org/phase{n}"} for n in range(1, count + 1)]
+
+    def test_phases_fetched_concurrently_and_merged_in_order(self, monkeypatch):
+        phases = self._phases(3)
+        # Every phase waits for the others, so this only returns if they all run at the same time
+        barrier = threading.Barrier(len(phases), timeout=5)
+
+        def fetch_issues_for_phase(phase, snapshot, replay=False):
+            barrier.wait()
+            return Findings([Finding(1, phase["name"], "", "Severity: High Risk", "Report Status: Open", phase["name"])])
+
+        written = []
+        monkeypatch.setattr(fetch_issues, "get_summary_information", lambda: {"project_name": "P", "private_github": "x"})
+        monkeypatch.setattr(fetch_issues, "get_phase_information", lambda: phases)
+        monkeypatch.setattr(fetch_issues, "fetch_issues_for_phase", fetch_issues_for_phase)
+        monkeypatch.setattr(fetch_issues, "write_report_and_counts", lambda *args: written.append(args) or 3)
+
+        assert fetch_issues.fetch_issues(replay=None) == 3
+        assert [finding.title for finding in written[0][0]] == ["Phase 1", "Phase 2", "Phase 3"]
+
+    def test_failed_phase_writes_nothing(self, monkeypatch):
+        written = []
+        monkeypatch.setattr(fetch_issues, "get_summary_information", lambda: {"project_name": "P", "private_github": "x"})
+        monkeypatch.setattr(fetch_issues, "get_phase_information", lambda: self._phases(2))
+        monkeypatch.setattr(fetch_issues, "fetch_issues_for_phase",
+                            lambda phase, snapshot, replay=False: None if phase["name"] == "Phase 2" else Findings())
+        monkeypatch.setattr(fetch_issues, "write_report_and_counts", lambda *args: written.append(args))
+
+        assert fetch_issues.fetch_issues() == 0
+        assert written == []
+
+    def test_replay_reads_each_phase_from_the_snapshot(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "snapshot.json")
+        save_snapshots(path, [Snapshot("https://github.com/org/phase1", [fetch_issues.issue_record(_node(1))]),
+                              Snapshot("https://github.com/org/phase2", [fetch_issues.issue_record(_node(2))])])
+
+        written = []
+        monkeypatch.setattr(fetch_issues, "get_summary_information", lambda: {"project_name": "P", "private_github": "x"})
+        monkeypatch.setattr(fetch_issues, "get_phase_information", lambda: self._phases(2))
+        monkeypatch.setattr(fetch_issues, "write_report_and_counts", lambda *args: written.append(args) or 2)
+
+        assert fetch_issues.fetch_issues(replay=path) == 2
+        assert [(finding.repository, finding.title) for finding in written[0][0]] == [
+            ("org/phase1", "Issue 1"), ("org/phase2", "Issue 2")]
@@ -0,0 +1,60 @@
+"""Unit tests for scripts/findings.py — the Finding record and the indexed Findings collection."""
+import dataclasses
+
+import pytest
+
+from scripts import fragments
+from scripts.findings import Finding, Findings, link_anchor
+
+
+def _finding(number, severity="Severity: High Risk", repository="org/repo", body="Body"):
+    return Finding(number, f"Issue {number}", body, severity, "Report Status: Resolved", repository)
+
+
+class TestFinding:
+    def test_derived_fields(self):
+        finding = Finding(1, "Reentrancy in `withdraw()`", "Body", "Severity: High Risk", "Report Status: Acknowledged")
+        assert finding.anchor == "reentrancy-in-withdraw"
+        assert finding.link() == "[*Reentrancy in `withdraw()`*](#reentrancy-in-withdraw)"
+        assert finding.severity_name == "High Risk"
+        assert finding.status_name == "Acknowledged"
+        assert len(finding.body_hash) == 64
+
+    def test_markdown(self):
+        assert _finding(7).markdown() == f"\n\n{fragments.marker('issue-7')}\n\n### Issue 7\n\nBody\n"
+
+    def test_with_body_rehashes(self):
+        finding = _finding(1)
+        changed = finding.with_body("Other")
+        assert changed.body == "Other" and finding.body == "Body"
+        assert changed.body_hash != finding.body_hash
+
+    def test_slots(self):
+        with pytest.raises((AttributeError, TypeError)):
+            _finding(1).extra = True
+        assert "anchor" in [f.name for f in dataclasses.fields(Finding)]
+
+    def test_link_anchor(self):
+        assert link_anchor("A & B: C") == "a--b-c"
+
+
+class TestFindings:
+    def test_indexes(self):
+        findings = Findings([_finding(1), _finding(2, "Severity: Low Risk"), _finding(3)])
+        assert len(findings) == 3
+        assert [f.number for f in findings.with_severity("Severity: High Risk")] == [1, 3]
+        assert findings.count("Severity: Low Risk") == 1 and findings.count("Severity: Medium Risk") == 0
+        assert findings.get("org/repo", 2).number == 2
+        assert findings.get("org/repo", 9) is None
+
+    def test_merged_in_repository_order(self):
+        first = Findings([_finding(1), _finding(2, "Severity: Low Risk")])
+        second = Findings([_finding(1, repository="org/phase2")])
+
+        merged = Findings.merge([first, second])
+
+        assert [(f.repository, f.number) for f in merged.with_severity("Severity: High Risk")] == [
+            ("org/repo", 1), ("org/phase2", 1)]
+        # Issue numbers of different repositories don't collide
+        assert merged.get("org/phase2", 1) is not merged.get("org/repo", 1)
+        assert len(first) == 2
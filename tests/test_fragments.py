@@ -0,0 +1,31 @@
+"""Unit tests for scripts/fragments.py — splitting report.md on its fragment markers."""
+from scripts import fragments
+
+
+class TestSplitFragments:
+    def test_split_on_markers(self):
+        text = f"{fragments.marker('high-risk')}\n\n## High Risk\n{fragments.marker('issue-3')}\n\n### Title\n"
+        assert fragments.split_fragments(text) == [
+            ("high-risk", "\n\n## High Risk\n"),
+            ("issue-3", "\n\n### Title\n"),
+        ]
+
+    def test_text_before_first_marker_is_preamble(self):
+        text = f"intro\n{fragments.marker('issue-1')}\nbody"
+        assert fragments.split_fragments(text) == [("preamble", "intro\n"), ("issue-1", "\nbody")]
+
+    def test_no_markers(self):
+        assert fragments.split_fragments("just text") == [("preamble", "just text")]
+
+    def test_is_marker(self):
+        assert fragments.is_marker(fragments.marker("issue-12") + "\n")
+        assert not fragments.is_marker("<!-- a comment -->\n")
+
+
+class TestTargets:
+    def test_named_after_the_marker(self):
+        assert fragments.targets(["high-risk", "issue-3"]) == ["fragment:high-risk", "fragment:issue-3"]
+
+    def test_same_names_numbered(self):
+        assert fragments.targets(["issue-1", "issue-2", "issue-1", "issue-1"]) == [
+            "fragment:issue-1", "fragment:issue-2", "fragment:issue-1-1", "fragment:issue-1-2"]
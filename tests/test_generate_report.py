@@ -0,0 +1,117 @@
+"""Unit tests for the stage graph of generate_report.py.
+
+The stages' actions are replaced by fakes that write their outputs, so this
+checks which stages a change makes stale, without GitHub, pandoc or pdflatex.
+"""
+import os
+
+import pytest
+
+import generate_report
+from scripts import build
+
+SUMMARY_DATA = {"project_name": "Project", "team_name": "Team", "project_github": "https://github.com/org/repo",
+                "project_github_2": "", "project_github_3": "", "private_github": "https://github.com/cyfrin/audit"}
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for path in ["source/summary_information.conf", "source/auditors.json", "source/lead_auditors.md",
+                 "source/assisting_auditors.md", "source/report.md", "working/snapshot.json",
+                 "templates/main.tex", "templates/title.tex", "templates/summary.tex"]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(path)
+    for source, _, _ in generate_report.convert.CONVERSIONS:
+        if source.startswith("./source/"):
+            with open(source, "w") as f:
+                f.write(source)
+    return tmp_path
+
+
+def _stages(argv=("--replay", "working/snapshot.json"), report_stages=generate_report.report_stages):
+    stages = report_stages(generate_report.parse_args(list(argv)), SUMMARY_DATA)
+    for stage in stages:
+        def action(stage=stage):
+            # Outputs depend on the inputs only, like the real stages
+            content = "".join(open(path).read() for path in stage.inputs if os.path.exists(path)).lower()
+            for path in stage.outputs:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                if path in stage.inputs:
+                    # Stages that rewrite their input, like lint, do it the same way every time
+                    content = open(path).read().upper()
+                with open(path, "w") as f:
+                    f.write(content)
+        stage.action = action
+    return stages
+
+
+class TestReportStages:
+    def test_stage_names(self, tree):
+        names = [stage.name for stage in _stages()]
+        assert names[:3] == ["fetch", "lint", "auditors"]
+        assert "convert:disclaimer" in names and "convert:report" in names
+        assert names[-4:] == ["title", "summary", "compile", "solodit"]
+
+    def test_rendered_templates_are_not_copied(self, tree):
+        templates = next(stage for stage in _stages() if stage.name == "templates")
+        assert [path for path in templates.inputs if path.startswith("templates")] == [os.path.normpath("templates/main.tex")]
+
+    def test_code_is_an_input_of_its_stages(self, tree):
+        stages = {stage.name: stage for stage in _stages()}
+        assert generate_report.postprocess.__file__ in stages["convert:report"].inputs
+        assert generate_report.highlight.__file__ in stages["convert:report"].inputs
+        assert generate_report.latex.__file__ in stages["compile"].inputs
+        assert os.path.normpath("templates/main.tex") in stages["compile"].inputs
+        assert generate_report.linter.__file__ in stages["lint"].inputs
+
+    def test_editing_a_source_file_only_converts_it_and_compiles(self, tree):
+        assert len(build.run(_stages())) == len(_stages())
+
+        with open("source/disclaimer.md", "a") as f:
+            f.write("edited")
+
+        assert set(build.run(_stages())) == {"convert:disclaimer", "compile"}
+
+    def test_fetching_from_github_always_runs(self, tree):
+        build.run(_stages(()))
+        # report.md is fetched again and linted again, but the issues didn't change, so nothing else runs
+        assert set(build.run(_stages(()))) == {"fetch", "lint"}
+
+
+class TestBuildReport:
+    @pytest.fixture
+    def fakes(self, tree, monkeypatch):
+        monkeypatch.setattr(generate_report, "get_summary_data", lambda: SUMMARY_DATA)
+        monkeypatch.setattr(generate_report, "report_stages", lambda args, summary_data, cache: _stages(
+            ["--replay", args.replay] if args.replay else []))
+        os.makedirs("working", exist_ok=True)
+        return generate_report.DiskCache(str(tree / "cache"), 1024 * 1024, ".tex")
+
+    def test_rebuild_without_fetching(self, fakes):
+        args = generate_report.parse_args([])
+        generate_report.build_report(args, fakes)
+
+        with open("templates/summary.tex", "a") as f:
+            f.write("edited")
+
+        ran = generate_report.build_report(args, fakes, changed={"templates/summary.tex"}, fetch=False)
+        assert set(ran) == {"summary", "compile"}
+
+    def test_watch_rebuilds_the_changed_file(self, fakes, monkeypatch):
+        args = generate_report.parse_args(["--watch"])
+        generate_report.build_report(args, fakes)
+        rebuilds = []
+
+        def watch(paths, rebuild, written):
+            assert "./source" in paths and "./templates" in paths
+            # The linter rewrites report.md
+            assert os.path.normpath("source/report.md") in written
+            with open("source/disclaimer.md", "a") as f:
+                f.write("edited")
+            rebuilds.append(rebuild({"source/disclaimer.md"}))
+
+        monkeypatch.setattr(generate_report.watch, "watch", watch)
+        generate_report.watch_report(args, fakes)
+        assert set(rebuilds[0]) == {"convert:disclaimer", "compile"}
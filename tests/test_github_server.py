@@ -0,0 +1,68 @@
+"""Tests of benchmarks/github_server.py against the fetch code — the stand-in must answer the queries fetch_issues sends.
+
+The fetch functions run with a real transport pointed at the stand-in, so a query the stand-in doesn't
+implement, or a response it shapes differently from GitHub, fails here instead of in the benchmark.
+"""
+import pytest
+
+from benchmarks.github_server import OWNER, PROJECT_NUMBER, REPO, GitHubStandIn, synthetic_data
+from scripts import fetch_issues, github_transport
+from scripts.github_transport import GitHubTransport, ResponseCache
+
+
+@pytest.fixture(scope="module")
+def data():
+    return synthetic_data(issues=250, items=60, pull_requests=10)
+
+
+@pytest.fixture
+def transport(data, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_issues, "PROJECT_CACHE", str(tmp_path / "projects.json"))
+    with GitHubStandIn(data) as stand_in:
+        transport = GitHubTransport("token", base_url=stand_in.url, cache=ResponseCache(str(tmp_path / "http")))
+        monkeypatch.setattr(github_transport, "_transport", transport)
+        yield transport
+
+
+def _open_issues(data):
+    return [record for record in data["issues"] if "pull_request" not in record and record["state"] == "open"]
+
+
+class TestGitHubStandIn:
+    def test_repository_issues(self, data, transport):
+        issues = fetch_issues.fetch_repository_issues(OWNER, REPO)
+        assert [issue["number"] for issue in issues] == [record["number"] for record in _open_issues(data)]
+        # More than one page
+        assert transport.requests > 1
+
+    def test_repository_issues_with_label(self, data, transport):
+        label = "Severity: High Risk"
+        issues = fetch_issues.fetch_repository_issues(OWNER, REPO, label)
+        assert issues and all(label in issue["labels"] for issue in issues)
+
+    def test_issues_by_number(self, data, transport):
+        pull_request = next(record["number"] for record in data["issues"] if "pull_request" in record)
+        issues = fetch_issues.fetch_issues_by_number(OWNER, REPO, [1, 2, pull_request, 10_000])
+        assert [issue["number"] for issue in issues] == [number for number in (1, 2) if number != pull_request]
+
+    def test_issues_in_column(self, data, transport):
+        option = next(option["id"] for field in data["project"]["fields"] for option in field.get("options", [])
+                      if option["name"] == "Report")
+        expected = [item["content"]["number"] for item in data["project"]["items"]
+                    if item["option"] == option and item["content"].get("repository", {}).get("name") == REPO]
+
+        assert fetch_issues.get_issues_in_column(OWNER, REPO, PROJECT_NUMBER, "Report") == expected
+        # Again with the ids from the project cache
+        assert fetch_issues.get_issues_in_column(OWNER, REPO, PROJECT_NUMBER, "Report") == expected
+
+    def test_rest_pages_revalidated_with_304(self, data, transport):
+        first = fetch_issues.fetch_updated_issues(OWNER, REPO, "2000-01-01T00:00:00Z")
+        pages = transport.requests
+        assert pages > 1 and transport.not_modified == 0
+
+        assert fetch_issues.fetch_updated_issues(OWNER, REPO, "2000-01-01T00:00:00Z") == first
+        assert transport.not_modified == pages
+
+    def test_open_issue_labels(self, data, transport):
+        labels = fetch_issues.fetch_open_issue_labels(OWNER, REPO)
+        assert labels == {record["number"]: [label["name"] for label in record["labels"]] for record in _open_issues(data)}
@@ -0,0 +1,164 @@
+"""Unit tests for scripts/github_transport.py — retries, backoff, rate limit metrics and conditional requests.
+
+The session's request method is replaced by a fake serving canned responses, and
+sleeping is recorded instead of waited for.
+"""
+import json
+import time
+
+import pytest
+import requests
+
+from scripts.github_transport import GitHubTransport, ResponseCache, graphql_endpoint
+
+
+def _response(status, headers=None, json_body=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = b"{}" if json_body is None else json.dumps(json_body).encode()
+    return response
+
+
+@pytest.fixture
+def transport():
+    transport = GitHubTransport("token", base_url="https://api.example.com", max_retries=3)
+    transport.slept = []
+    transport.sleep = transport.slept.append
+    return transport
+
+
+def _serve(transport, *responses):
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append((method, url, kwargs))
+        response = responses[len(calls) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    transport.session.request = request
+    return calls
+
+
+class TestRetries:
+    def test_transient_errors_retried_with_backoff(self, transport):
+        calls = _serve(transport, _response(502), requests.ConnectionError(), _response(200))
+        assert transport.get("repos/o/r").status_code == 200
+        assert len(calls) == 3
+        assert 1 <= transport.slept[0] < transport.slept[1]
+        assert transport.retries == 2
+
+    def test_retry_after_is_honoured(self, transport):
+        _serve(transport, _response(403, {"Retry-After": "7"}), _response(200))
+        transport.get("repos/o/r")
+        assert transport.slept == [7.0]
+
+    def test_waits_for_rate_limit_reset(self, transport):
+        reset = int(time.time()) + 30
+        _serve(transport, _response(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)}), _response(200))
+        transport.get("repos/o/r")
+        assert 25 < transport.slept[0] <= 32
+
+    def test_client_errors_not_retried(self, transport):
+        calls = _serve(transport, _response(404))
+        assert transport.get("repos/o/r").status_code == 404
+        assert len(calls) == 1
+
+    def test_gives_up_after_max_retries(self, transport):
+        calls = _serve(transport, *[_response(503)] * 4)
+        assert transport.get("repos/o/r").status_code == 503
+        assert len(calls) == 4
+
+    def test_graphql_rate_limited_error_retried(self, transport):
+        limited = _response(200, json_body={"errors": [{"type": "RATE_LIMITED", "message": "limit"}]})
+        calls = _serve(transport, limited, _response(200, json_body={"data": {"ok": True}}))
+        assert transport.graphql("query { ok }") == {"data": {"ok": True}}
+        assert calls[0][1] == "https://api.example.com/graphql"
+        assert len(transport.slept) == 1
+
+
+class TestGraphqlEndpoint:
+    def test_next_to_the_rest_api(self):
+        assert graphql_endpoint("https://api.github.com") == "https://api.github.com/graphql"
+        assert graphql_endpoint("https://api.example.ghe.com/") == "https://api.example.ghe.com/graphql"
+
+    def test_enterprise_server(self):
+        assert graphql_endpoint("https://github.example.com/api/v3") == "https://github.example.com/api/graphql"
+
+    def test_queries_sent_to_the_endpoint(self):
+        transport = GitHubTransport("token", base_url="https://github.example.com/api/v3")
+        calls = _serve(transport, _response(200, json_body={"data": {}}))
+        transport.graphql("query { ok }")
+        assert calls[0][1] == "https://github.example.com/api/graphql"
+
+    def test_explicit_endpoint(self):
+        transport = GitHubTransport("token", base_url="https://github.example.com/api/v3",
+                                    graphql_url="https://graphql.example.com")
+        assert transport.graphql_url == "https://graphql.example.com"
+
+
+class TestMetrics:
+    def test_rate_limit_recorded_per_resource(self, transport):
+        headers = {"X-RateLimit-Resource": "graphql", "X-RateLimit-Limit": "5000",
+                   "X-RateLimit-Remaining": "4990", "X-RateLimit-Reset": "0"}
+        _serve(transport, _response(200, headers))
+        transport.get("graphql")
+        assert transport.rate_limits["graphql"].remaining == 4990
+        assert transport.summary().startswith("1 requests, 0 retries")
+
+    def test_requests_have_timeout_and_token(self, transport):
+        calls = _serve(transport, _response(200))
+        transport.get("https://uploads.example.com/x")
+        method, url, kwargs = calls[0]
+        assert url == "https://uploads.example.com/x"
+        assert kwargs["timeout"] == transport.timeout
+        assert transport.session.headers["Authorization"] == "Bearer token"
+
+
+@pytest.fixture
+def cached_transport(transport, tmp_path):
+    transport.cache = ResponseCache(str(tmp_path / "http"), 1024 * 1024, ttl=60)
+    return transport
+
+
+class TestConditionalRequests:
+    def test_not_modified_replays_cached_response(self, cached_transport):
+        headers = {"ETag": '"abc"', "Link": '<https://api.example.com/next>; rel="next"'}
+        calls = _serve(cached_transport, _response(200, headers, [1, 2]), _response(304, {"ETag": '"abc"'}))
+
+        first = cached_transport.get("repos/org/repo/issues", params={"state": "open"})
+        second = cached_transport.get("repos/org/repo/issues", params={"state": "open"})
+
+        assert "If-None-Match" not in calls[0][2]["headers"]
+        assert calls[1][2]["headers"]["If-None-Match"] == '"abc"'
+        assert second.status_code == 200
+        assert second.json() == first.json() == [1, 2]
+        assert second.links["next"]["url"] == "https://api.example.com/next"
+        assert cached_transport.not_modified == 1
+        assert "1 not modified" in cached_transport.summary()
+
+    def test_last_modified_sent_as_if_modified_since(self, cached_transport):
+        calls = _serve(cached_transport, _response(200, {"Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}),
+                       _response(200, {"Last-Modified": "Thu, 02 Jan 2025 00:00:00 GMT"}, [3]))
+        cached_transport.get("repos/org/repo/issues")
+        response = cached_transport.get("repos/org/repo/issues")
+        assert calls[1][2]["headers"]["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+        assert response.json() == [3]
+
+    def test_keyed_by_full_url(self, cached_transport):
+        calls = _serve(cached_transport, _response(200, {"ETag": '"a"'}), _response(200, {"ETag": '"b"'}))
+        cached_transport.get("repos/org/repo/issues", params={"page": 1})
+        cached_transport.get("repos/org/repo/issues", params={"page": 2})
+        assert "If-None-Match" not in calls[1][2]["headers"]
+
+    def test_expired_entries_fetched_unconditionally(self, cached_transport, monkeypatch):
+        calls = _serve(cached_transport, _response(200, {"ETag": '"a"'}), _response(200, {"ETag": '"a"'}))
+        cached_transport.get("repos/org/repo/issues")
+        monkeypatch.setattr(time, "time", lambda real=time.time: real() + 120)
+        cached_transport.get("repos/org/repo/issues")
+        assert "If-None-Match" not in calls[1][2]["headers"]
+
+    def test_token_is_part_of_the_key(self):
+        assert ResponseCache.key("https://x", "Bearer a") != ResponseCache.key("https://x", "Bearer b")
@@ -3,9 +3,12 @@
 These cover the text/markdown/LaTeX transformations and the date math used
 when generating a report. None of them touch the network, GitHub or pandoc.
 """
+import re
+
 import pytest
 
 from scripts import helpers
+from scripts.findings import Finding, Findings
 
 
 class TestGetIssueCount:
@@ -33,24 +36,57 @@ class TestTitleToLink:
         assert helpers.title_to_link("A & B: C") == "[*A & B: C*](#a--b-c)"
 
 
+def _finding(number, title, body="", severity="Severity: High Risk"):
+    return Finding(number, title, body, severity, "Report Status: Open", "org/repo")
+
+
 class TestReplaceInternalLinks:
     def test_replaces_known_issue_number(self):
-        issues = {"Severity: High Risk": ["This duplicates issue #12 entirely"]}
-        issues_by_number = {12: "Some Other Bug"}
-        out = helpers.replace_internal_links(issues, issues_by_number)
-        assert out["Severity: High Risk"][0] == (
+        findings = Findings([_finding(1, "Bug", "This duplicates issue #12 entirely"), _finding(12, "Some Other Bug")])
+        out = helpers.replace_internal_links(findings)
+        assert out.get("org/repo", 1).body == (
             "This duplicates issue " + helpers.title_to_link("Some Other Bug") + " entirely"
         )
 
     def test_unknown_issue_number_exits(self):
-        issues = {"Severity: High Risk": ["see #99 here"]}
         with pytest.raises(SystemExit):
-            helpers.replace_internal_links(issues, {})
+            helpers.replace_internal_links(Findings([_finding(1, "Bug", "see #99 here")]))
 
     def test_no_reference_is_unchanged(self):
-        issues = {"Severity: Low Risk": ["nothing to link here"]}
-        out = helpers.replace_internal_links(issues, {})
-        assert out["Severity: Low Risk"][0] == "nothing to link here"
+        finding = _finding(1, "Bug", "nothing to link here")
+        out = helpers.replace_internal_links(Findings([finding]))
+        assert list(out) == [finding]
+
+    def test_links_in_fenced_code_are_left_alone(self):
+        body = "see #2\n\n```solidity\nuint a = b #2;\n```\n\n~~~\n #9\n~~~\nand #2"
+        out = helpers.replace_internal_links(Findings([_finding(1, "Bug", body), _finding(2, "Other")]))
+        link = helpers.title_to_link("Other")
+        assert out.get("org/repo", 1).body == f"see {link}\n\n```solidity\nuint a = b #2;\n```\n\n~~~\n #9\n~~~\nand {link}"
+
+    def test_unclosed_fence_runs_to_the_end(self):
+        finding = _finding(1, "Bug", "```\ncode #9")
+        assert list(helpers.replace_internal_links(Findings([finding]))) == [finding]
+
+    def test_every_reference_resolved_once(self):
+        body = "#2 at the start, then #2, #23 and #2345678"
+        out = helpers.replace_internal_links(Findings([_finding(1, "Bug", body), _finding(2, "Two"), _finding(23, "Three")]))
+        assert out.get("org/repo", 1).body == (
+            f"#2 at the start, then {helpers.title_to_link('Two')}, {helpers.title_to_link('Three')} and #2345678")
+
+    def test_all_unknown_references_reported(self, capsys):
+        findings = Findings([_finding(1, "Bug", "see #98 and #99"), _finding(2, "Other", "see #97")])
+        _, unknown = helpers.resolve_internal_links(findings)
+        assert [(finding.number, number) for finding, number in unknown] == [(1, 98), (1, 99), (2, 97)]
+
+        with pytest.raises(SystemExit):
+            helpers.replace_internal_links(findings)
+        output = capsys.readouterr().out
+        assert "#98" in output and "#99" in output and "#97" in output and "3 link(s)" in output
+
+    def test_links_stay_within_the_repository(self):
+        other = Finding(2, "Elsewhere", "", "Severity: High Risk", "Report Status: Open", "org/other")
+        with pytest.raises(SystemExit):
+            helpers.replace_internal_links(Findings([_finding(1, "Bug", "see #2 here"), other]))
 
 
 class TestEscapeLatexSpecialChars:
@@ -89,20 +125,25 @@ class TestCalculatePeriod:
         assert helpers.calculate_period("Dec 31st - Jan 1st, 2024") == 1
 
 
-class TestReplaceInFileContent:
-    def test_replaces_only_placeholder_lines(self):
-        content = ["__PLACEHOLDER__NAME goes here", "untouched line"]
-        out = helpers.replace_in_file_content(content, [["__PLACEHOLDER__NAME", "Acme"]])
-        assert out == ["Acme goes here", "untouched line"]
+class TestRenderTemplate:
+    def test_renders_to_output_without_touching_template(self, tmp_path):
+        template = tmp_path / "title.tex"
+        template.write_text("__PLACEHOLDER__NAME goes here\nuntouched line\n")
+        output = tmp_path / "working" / "title.tex"
+        output.parent.mkdir()
 
-    def test_longest_placeholder_first(self):
-        # Sorted by length desc so __PLACEHOLDER__FOO_BAR is replaced before __PLACEHOLDER__FOO.
-        content = ["__PLACEHOLDER__FOO_BAR"]
-        out = helpers.replace_in_file_content(
-            content,
-            [["__PLACEHOLDER__FOO", "short"], ["__PLACEHOLDER__FOO_BAR", "long"]],
-        )
-        assert out == ["long"]
+        helpers.render_template(str(template), str(output), [["__PLACEHOLDER__NAME", "Acme"]], [["__PLACEHOLDER__X", 1]])
+
+        assert output.read_text() == "Acme goes here\nuntouched line\n"
+        assert template.read_text() == "__PLACEHOLDER__NAME goes here\nuntouched line\n"
+
+    def test_unresolved_placeholder_exits(self, tmp_path, capsys):
+        template = tmp_path / "title.tex"
+        template.write_text("__PLACEHOLDER__NAME and __PLACEHOLDER__OTHER")
+        with pytest.raises(SystemExit):
+            helpers.render_template(str(template), str(tmp_path / "out.tex"), [["__PLACEHOLDER__NAME", "Acme"]])
+        assert "__PLACEHOLDER__OTHER" in capsys.readouterr().out
+        assert not (tmp_path / "out.tex").exists()
 
 
 class TestJoinWithAmpersand:
@@ -140,3 +181,87 @@ class TestBuildFindingsSentence:
     def test_only_informational(self):
         s = helpers.build_findings_sentence(self._counts(informational=4))
         assert s == " The findings consist of 4 Informational."
+
+
+def _record(number, title, body="", severity="Severity: High Risk"):
+    return {"number": number, "title": title, "body": body, "state": "open",
+            "labels": [severity, "Report Status: Open"], "html_url": f"https://github.com/org/repo/issues/{number}"}
+
+
+class TestGetIssues:
+    def test_findings_with_links_resolved(self):
+        findings = helpers.get_issues("https://github.com/org/repo.git", [
+            _record(1, "First", "see #2 here"), _record(2, "Second", severity="Severity: Low Risk")])
+
+        assert [finding.number for finding in findings] == [1, 2]
+        assert findings.get("org/repo", 1).body == "see " + helpers.title_to_link("Second") + " here"
+        assert findings.get("org/repo", 2).status == "Report Status: Open"
+        assert findings.count("Severity: High Risk") == 1 and findings.count("Severity: Critical Risk") == 0
+
+    def test_closed_issues_skipped(self):
+        assert len(helpers.get_issues("org/repo", [dict(_record(1, "First"), state="closed")])) == 0
+
+    def test_bad_labels(self):
+        assert helpers.get_issues("org/repo", [dict(_record(1, "First"), labels=[])]) is None
+
+
+class TestWriteReportAndCounts:
+    @pytest.fixture
+    def paths(self, tmp_path, monkeypatch):
+        (tmp_path / "summary_information.conf").write_text("[summary]\nteam_name = Team\n")
+        for name, file in [("SOURCE_REPORT", "report.md"), ("SEVERITY_COUNTS", "severity_counts.conf"),
+                           ("SUMMARY_OF_FINDINGS", "working/summary_of_findings.tex"), ("SUMMARY_INFORMATION", "summary_information.conf"),
+                           ("MITIGATION_TABLE", "mitigation_table.csv")]:
+            monkeypatch.setattr(helpers, name, str(tmp_path / file))
+        return tmp_path
+
+    def test_writes_every_output(self, paths):
+        findings = Findings([_finding(1, "First", "Body"), _finding(2, "Low one", severity="Severity: Low Risk"),
+                             _finding(3, "Second", "More")])
+
+        assert helpers.write_report_and_counts(findings) == 3
+
+        report = (paths / "report.md").read_text()
+        assert report.index("## High Risk") < report.index("### First") < report.index("### Second") \
+            < report.index("## Low Risk") < report.index("### Low one")
+        assert "high = 2\nmedium = 0\nlow = 1\n" in (paths / "severity_counts.conf").read_text()
+        summary = (paths / "working" / "summary_of_findings.tex").read_text()
+        assert summary.startswith("\\hline\\hyperlink{")
+        assert "[H-1] First} & Open" in summary and "[H-2] Second} & Open" in summary and "[L-1] Low one}" in summary
+        assert (paths / "mitigation_table.csv").read_text() == (
+            "Name,Status,Team,Cyfrin\nHIGH,,,\n\"First\",Open,,\n\"Second\",Open,,\nLOW,,,\n\"Low one\",Open,,\n")
+
+    def test_hyperlinks_point_to_the_fragment_targets(self, paths):
+        # The same title twice, and the same number in two repositories of a combined report
+        findings = Findings([_finding(1, "Use abi.encode in v1.2", "Body"), _finding(2, "Use abi.encode in v1.2", "Body"),
+                             Finding(1, "Other", "Body", "Severity: High Risk", "Report Status: Open", "org/other")])
+        helpers.write_report_and_counts(findings)
+        summary = (paths / "working" / "summary_of_findings.tex").read_text()
+        assert re.findall(r"\\hyperlink\{([^}]*)\}", summary) == ["fragment:issue-1", "fragment:issue-2", "fragment:issue-1-1"]
+
+
+class TestGetPhaseInformation:
+    def test_phases_in_order_with_summary_filters(self, tmp_path, monkeypatch):
+        conf = tmp_path / "summary_information.conf"
+        conf.write_text(
+            "[summary]\nprivate_github = https://github.com/org/one\nfilter_issue_label = Report\n"
+            "filter_issue_column = Final\nfilter_issue_id_list =\n\n"
+            "[phase_10]\nname = Ten\nprivate_github = https://github.com/org/ten\n\n"
+            "[phase_2]\nname = Two\nprivate_github = https://github.com/org/two\nproject_number = 4\n"
+            "filter_issue_id_list = 1, 3\nfilter_issue_column = Done\n")
+        monkeypatch.setattr(helpers, "SUMMARY_INFORMATION", str(conf))
+
+        phases = helpers.get_phase_information()
+
+        assert [phase["name"] for phase in phases] == ["Two", "Ten"]
+        assert phases[0]["filter_issue_id_list"] == ["1", "3"]
+        assert phases[0]["filter_issue_column"] == "Done"
+        assert phases[1]["filter_issue_column"] == "Final"
+        assert phases[1]["filter_issue_label"] == "Report"
+        assert phases[1]["project_number"] == ""
+
+    def test_no_phases(self, tmp_path, monkeypatch):
+        conf = tmp_path / "summary_information.conf"
+        conf.write_text("[summary]\nprivate_github = https://github.com/org/one\n")
+        monkeypatch.setattr(helpers, "SUMMARY_INFORMATION", str(conf))
+        assert helpers.get_phase_information() == []
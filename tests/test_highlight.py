@@ -0,0 +1,88 @@
+"""Unit tests for scripts/highlight.py — Pygments highlighting of code blocks."""
+import pytest
+
+from scripts import highlight
+
+
+@pytest.fixture(autouse=True)
+def highlight_cache(tmp_path, monkeypatch):
+    cache = highlight.DiskCache(str(tmp_path / "cache"), max_bytes=1024 * 1024, checksum=True)
+    monkeypatch.setattr(highlight, "_cache", cache)
+    return cache
+
+
+class TestHighlightCode:
+    def test_verbatim_with_minted_settings(self):
+        latex = highlight.highlight_code("uint x = 1;", "solidity")
+        assert latex.startswith("\\begin{Verbatim}[commandchars=\\\\\\{\\},frame=single,fontsize=\\small,")
+        assert "\\PY{k+kt}{uint}" in latex
+        assert latex.endswith("\\end{Verbatim}")
+
+    def test_long_listings_can_break_pages(self):
+        short = "\n".join(["x"] * (highlight.LONG_LISTING_LINES - 2))
+        long = "\n".join(["x"] * (highlight.LONG_LISTING_LINES - 1))
+        assert "samepage=false" not in highlight.highlight_code(short, "text")
+        assert "samepage=false" in highlight.highlight_code(long, "text")
+
+    def test_language_aliases_share_entries(self, highlight_cache):
+        highlight.highlight_code("x", "py")
+        highlight.highlight_code("x", "python")
+        assert highlight_cache.hits == 1
+
+    def test_unknown_language_is_plain_text(self):
+        assert "\\PY" not in highlight.highlight_code("just words", "no-such-language")
+
+    def test_cached_by_contents(self, highlight_cache):
+        first = highlight.highlight_code("a = 1", "python")
+        assert highlight.highlight_code("a = 1", "python") == first
+        highlight.highlight_code("a = 2", "python")
+        assert (highlight_cache.hits, highlight_cache.misses) == (1, 2)
+
+
+class TestStyleDefinitions:
+    def test_defines_the_pygments_macros(self):
+        preamble = highlight.style_definitions()
+        assert "\\usepackage{fvextra}" in preamble
+        assert "\\def\\PY#1#2" in preamble
+        assert "\\usepackage{minted}" not in preamble
+
+
+class TestMintedCache:
+    def test_listings_survive_a_clean_working_directory(self, tmp_path):
+        working = tmp_path / "_minted-main"
+        working.mkdir()
+        (working / "A1B2.pygtex").write_text("listing")
+        (working / "default.pygstyle").write_text("style")
+        assert highlight.harvest_minted_cache(str(working)) == 1
+
+        # Like a fresh checkout at the same path
+        for path in working.iterdir():
+            path.unlink()
+        working.rmdir()
+        assert highlight.seed_minted_cache(str(working)) == 1
+        assert (working / "A1B2.pygtex").read_text() == "listing"
+        assert not (working / "default.pygstyle").exists()
+
+    def test_harvest_only_adds_new_listings(self, tmp_path):
+        working = tmp_path / "_minted-main"
+        working.mkdir()
+        (working / "A.pygtex").write_text("a")
+        assert highlight.harvest_minted_cache(str(working)) == 1
+        assert highlight.harvest_minted_cache(str(working)) == 0
+
+    def test_only_the_listings_of_the_report_are_seeded(self, tmp_path, highlight_cache):
+        other = tmp_path / "other" / "_minted-main"
+        other.mkdir(parents=True)
+        (other / "OTHER.pygtex").write_text("other report")
+        highlight.harvest_minted_cache(str(other))
+
+        working = tmp_path / "_minted-main"
+        working.mkdir()
+        (working / "A.pygtex").write_text("a")
+        highlight.harvest_minted_cache(str(working))
+        (working / "A.pygtex").unlink()
+
+        # The shared cache isn't listed
+        highlight_cache.keys = lambda: pytest.fail("listed the whole cache")
+        assert highlight.seed_minted_cache(str(working)) == 1
+        assert sorted(path.name for path in working.iterdir()) == ["A.pygtex"]
@@ -0,0 +1,79 @@
+"""Unit tests for scripts/issue_store.py — the SQLite copy of the issues."""
+import pytest
+
+from scripts.issue_store import IssueStore
+
+
+def _issue(number, labels=("Severity: High Risk",), state="open", created_at=None, updated_at="2025-01-01T00:00:00Z"):
+    return {
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "Body",
+        "state": state,
+        "labels": list(labels),
+        "html_url": f"https://github.com/org/repo/issues/{number}",
+        "created_at": created_at or f"2025-01-01T00:00:{number:02d}Z",
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    with IssueStore(str(tmp_path / "working" / "issues.sqlite")) as store:
+        yield store
+
+
+class TestIssueStore:
+    def test_round_trip(self, store):
+        store.save("org/repo", [_issue(1)])
+        assert store.open_issues("org/repo") == [_issue(1)]
+
+    def test_persists_between_runs(self, tmp_path):
+        path = str(tmp_path / "issues.sqlite")
+        with IssueStore(path) as store:
+            store.save("org/repo", [_issue(1)])
+        with IssueStore(path) as store:
+            assert [issue["number"] for issue in store.open_issues("org/repo")] == [1]
+            assert store.last_sync("org/repo") == "2025-01-01T00:00:00Z"
+
+    def test_oldest_first_and_open_only(self, store):
+        store.save("org/repo", [_issue(3, created_at="2025-01-01T00:00:00Z"), _issue(1, created_at="2025-01-02T00:00:00Z"),
+                                _issue(2, state="closed")])
+        assert [issue["number"] for issue in store.open_issues("org/repo")] == [3, 1]
+
+    def test_label_filter(self, store):
+        store.save("org/repo", [_issue(1, labels=("Phase 2",)), _issue(2)])
+        assert [issue["number"] for issue in store.open_issues("org/repo", "Phase 2")] == [1]
+
+    def test_repositories_are_separate(self, store):
+        store.save("org/repo", [_issue(1)])
+        assert store.open_issues("org/other") == []
+        assert store.last_sync("org/other") is None
+
+    def test_sync_point_only_moves_forward(self, store):
+        store.save("org/repo", [_issue(1, updated_at="2025-03-01T00:00:00Z")])
+        store.save("org/repo", [_issue(2, updated_at="2025-02-01T00:00:00Z")])
+        store.save("org/repo", [])
+        assert store.last_sync("org/repo") == "2025-03-01T00:00:00Z"
+
+    def test_updates_replace_the_stored_issue(self, store):
+        store.save("org/repo", [_issue(1)])
+        store.save("org/repo", [dict(_issue(1), title="Edited", state="closed")])
+        assert store.open_issues("org/repo") == []
+
+
+class TestReconcile:
+    def test_missing_issues_are_closed(self, store):
+        store.save("org/repo", [_issue(1), _issue(2)])
+        assert store.reconcile("org/repo", {2: ["Severity: High Risk"]}) == (1, 0)
+        assert [issue["number"] for issue in store.open_issues("org/repo")] == [2]
+
+    def test_label_changes(self, store):
+        store.save("org/repo", [_issue(1)])
+        assert store.reconcile("org/repo", {1: ["Severity: Low Risk"]}) == (0, 1)
+        assert store.open_issues("org/repo")[0]["labels"] == ["Severity: Low Risk"]
+
+    def test_reopened_issues(self, store):
+        store.save("org/repo", [_issue(1, state="closed")])
+        store.reconcile("org/repo", {1: ["Severity: High Risk"]})
+        assert [issue["number"] for issue in store.open_issues("org/repo")] == [1]
@@ -0,0 +1,82 @@
+"""Unit tests for scripts/latex.py — the pdflatex pass driver.
+
+pdflatex is replaced by a fake that writes auxiliary files and a log, so
+these only check when the driver decides to stop.
+"""
+import pytest
+
+from scripts import latex
+
+
+def _fake_pdflatex(directory, passes, code=0, pdf=True):
+    """Every call writes the next (aux, log) pair of `passes`, then keeps repeating the last one."""
+    calls = []
+
+    def run_pdflatex(directory_=None, main=None, log=None):
+        aux, log_text = passes[min(len(calls), len(passes) - 1)]
+        calls.append(aux)
+        (directory / "main.aux").write_text(aux)
+        (directory / "main.log").write_text(log_text)
+        if pdf:
+            (directory / "main.pdf").write_text(f"pass {len(calls)}")
+        return code
+
+    return run_pdflatex, calls
+
+
+class TestCompilePdf:
+    def test_stops_when_auxiliary_files_are_stable(self, tmp_path, monkeypatch):
+        run, calls = _fake_pdflatex(tmp_path, [("labels", ""), ("labels", "")])
+        monkeypatch.setattr(latex, "run_pdflatex", run)
+        assert latex.compile_pdf(str(tmp_path)) == 2
+
+    def test_rerun_message_forces_another_pass(self, tmp_path, monkeypatch):
+        warning = "LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right."
+        run, calls = _fake_pdflatex(tmp_path, [("labels", ""), ("labels", warning), ("labels", "")])
+        monkeypatch.setattr(latex, "run_pdflatex", run)
+        assert latex.compile_pdf(str(tmp_path)) == 3
+
+    def test_single_pass_with_up_to_date_auxiliary_files(self, tmp_path, monkeypatch):
+        (tmp_path / "main.aux").write_text("labels")
+        run, calls = _fake_pdflatex(tmp_path, [("labels", "")])
+        monkeypatch.setattr(latex, "run_pdflatex", run)
+        assert latex.compile_pdf(str(tmp_path)) == 1
+
+    def test_max_passes(self, tmp_path, monkeypatch):
+        run, calls = _fake_pdflatex(tmp_path, [(str(n), "") for n in range(10)])
+        monkeypatch.setattr(latex, "run_pdflatex", run)
+        with pytest.raises(SystemExit) as e:
+            latex.compile_pdf(str(tmp_path), max_passes=3)
+        assert e.value.code == 1
+        assert len(calls) == 3
+
+    def test_failed_pass_with_a_pdf_is_a_warning(self, tmp_path, monkeypatch, capsys):
+        run, calls = _fake_pdflatex(tmp_path, [("labels", ""), ("labels", "")], code=1)
+        monkeypatch.setattr(latex, "run_pdflatex", run)
+        assert latex.compile_pdf(str(tmp_path)) == 2
+        assert "Warning: pdflatex pass 1 exited with code 1" in capsys.readouterr().out
+
+    def test_failed_pass_without_a_pdf(self, tmp_path, monkeypatch, capsys):
+        # A PDF left over from an earlier build doesn't count
+        (tmp_path / "main.pdf").write_text("earlier build")
+        run, calls = _fake_pdflatex(tmp_path, [("labels", "")], code=1, pdf=False)
+        monkeypatch.setattr(latex, "run_pdflatex", run)
+        with pytest.raises(SystemExit) as e:
+            latex.compile_pdf(str(tmp_path))
+        assert e.value.code == 1
+        assert "pdflatex pass 1 failed with exit code 1" in capsys.readouterr().out
+
+
+class TestGeneratePdf:
+    def test_skipped_without_pdflatex(self, monkeypatch, capsys):
+        monkeypatch.setattr(latex, "pdflatex_path", lambda: None)
+        monkeypatch.setattr(latex, "compile_pdf", lambda **kwargs: pytest.fail("compiled without pdflatex"))
+        assert latex.generate_pdf() is None
+        assert "pdflatex is not installed" in capsys.readouterr().out
+
+
+class TestAuxiliaryHashes:
+    def test_only_auxiliary_files(self, tmp_path):
+        for name in ("main.aux", "main.toc", "main.out", "main.log", "main.pdf"):
+            (tmp_path / name).write_text(name)
+        assert sorted(latex.auxiliary_hashes(str(tmp_path))) == ["main.aux", "main.out", "main.toc"]
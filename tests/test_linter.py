@@ -66,3 +66,40 @@ class TestLint:
         out = linter.lint(report, *self._args())
         assert out[0] == "**Impact:**"
         assert "- bullet item" in out
+
+    def test_duplicate_lines_all_rewritten(self):
+        link = "https://github.com/InternalOrg/internal-repo/blob/x"
+        report = [link, "other", link]
+        out = linter.lint(report, *self._args())
+        assert out == [link.replace("InternalOrg/internal-repo", "SourceOrg/source-repo"), "other",
+                       link.replace("InternalOrg/internal-repo", "SourceOrg/source-repo")]
+
+    def test_several_headers_merged(self):
+        report = ["**Description:**", "", "", "First.", "**Acme:**", "Fixed.", "**Impact:**", "", "```", "code", "```"]
+        out = linter.lint(report, *self._args())
+        assert out == ["**Description:** First.", "**Acme:** Fixed.", "**Impact:**", "```", "code", "```"]
+
+
+class TestLintLines:
+    def _args(self):
+        return ("Acme", "SourceOrg", "source-repo", "InternalOrg", "internal-repo")
+
+    def test_input_is_not_modified(self):
+        report = ["**Description:**", "", "Text."]
+        lines, _ = linter.lint_lines(report, *self._args())
+        assert lines == ["**Description:** Text."]
+        assert report == ["**Description:**", "", "Text."]
+
+    def test_diagnostics_use_input_line_numbers(self):
+        report = ["**Description:**", "", "See [a](relative)", "raw https://x.y", "ok [b](https://x.y)"]
+        _, diagnostics = linter.lint_lines(report, *self._args())
+        assert [(d.kind, d.line_number) for d in diagnostics] == [
+            (linter.POSSIBLE_BROKEN_LINK, 3),
+            (linter.POSSIBLE_RAW_LINK, 4),
+        ]
+
+    def test_broken_link_names_the_issue(self):
+        report = ["### First", "### Second", "text", "link]("]
+        _, diagnostics = linter.lint_lines(report, *self._args())
+        assert diagnostics[0].kind == linter.BROKEN_LINK
+        assert "Issue: Second" in diagnostics[0].message
@@ -0,0 +1,62 @@
+"""Unit tests for scripts/pandoc_filters.py — the minted and image filters.
+
+Documents are built by hand in pandoc's JSON format, so pandoc is not needed.
+"""
+import json
+
+from scripts import pandoc_filters
+
+
+def _code_block(code, language=None):
+    return {"t": "CodeBlock", "c": [["", [language] if language else [], []], code]}
+
+
+def _image_para(alt, src):
+    image = {"t": "Image", "c": [["", [], []], [{"t": "Str", "c": w} for w in alt.split()], [src, ""]]}
+    return {"t": "Para", "c": [image]}
+
+
+def _document(*blocks):
+    return json.dumps({"pandoc-api-version": [1, 23], "meta": {}, "blocks": list(blocks)})
+
+
+class TestMinted:
+    def test_code_block_uses_language(self):
+        out = pandoc_filters.minted("CodeBlock", _code_block("x = 1", "solidity")["c"], "latex", {})
+        assert out[0]["c"] == ["latex", "\\begin{minted}[]{solidity}\nx = 1\n\\end{minted}"]
+
+    def test_default_language_is_text(self):
+        out = pandoc_filters.minted("CodeBlock", _code_block("x")["c"], "latex", {})
+        assert "{text}" in out[0]["c"][1]
+
+    def test_pygments_mode_highlights_in_place(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(pandoc_filters.highlight, "_cache",
+                            pandoc_filters.highlight.DiskCache(str(tmp_path), max_bytes=1024 * 1024))
+        meta = {"highlight": {"t": "MetaString", "c": "pygments"}}
+        out = pandoc_filters.minted("CodeBlock", _code_block("x = 1", "python")["c"], "latex", meta)
+        assert out[0]["c"][1].startswith("\\begin{Verbatim}")
+
+    def test_other_formats_untouched(self):
+        assert pandoc_filters.minted("CodeBlock", _code_block("x")["c"], "html", {}) is None
+
+
+class TestReportFilter:
+    def test_single_walk_applies_both_filters(self):
+        doc = json.loads(pandoc_filters.filter_document(_document(
+            _code_block("contract A {}", "solidity"),
+            _image_para("The caption", "img/a.png"),
+            {"t": "Para", "c": [{"t": "Str", "c": "plain"}]},
+        )))
+        code, figure, para = doc["blocks"]
+        assert code == {"t": "RawBlock", "c": ["latex", "\\begin{minted}[]{solidity}\ncontract A {}\n\\end{minted}"]}
+        assert figure["t"] == "RawBlock"
+        assert "\\includegraphics{img/a.png}" in figure["c"][1]
+        assert "\\caption{The caption}" in figure["c"][1]
+        assert para == {"t": "Para", "c": [{"t": "Str", "c": "plain"}]}
+
+    def test_matches_filters_applied_one_after_the_other(self):
+        source = _document(_code_block("a", "python"), _image_para("x", "y.png"))
+        one_by_one = source
+        for action in (pandoc_filters.minted, pandoc_filters.gfm_img_to_captioned_figure):
+            one_by_one = pandoc_filters.applyJSONFilters([action], one_by_one, "latex")
+        assert pandoc_filters.filter_document(source) == one_by_one
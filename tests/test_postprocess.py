@@ -0,0 +1,50 @@
+"""Unit tests for scripts/postprocess.py — the streaming LaTeX rewriter."""
+from scripts import postprocess
+
+
+def _rewrite(text):
+    return "".join(postprocess.rewrite(text.splitlines(keepends=True)))
+
+
+def _listing(lines):
+    code = "".join(f"line {i}\n" for i in range(lines))
+    return f"\\begin{{minted}}[]{{solidity}}\n{code}\\end{{minted}}\n"
+
+
+class TestLineRewrites:
+    def test_clearpage_both_escapes(self):
+        assert _rewrite("\\textbackslash clearpage\n\\textbackslash{}clearpage\n") == "\\clearpage\n\\clearpage\n"
+
+    def test_needspace_before_sections(self):
+        assert _rewrite("\\subsection{A}\\label{a}\n\\subsubsection{B}\n") == (
+            "\\Needspace{8cm}\\subsection{A}\\label{a}\n\\Needspace{6cm}\\subsubsection{B}\n"
+        )
+
+    def test_code_is_left_alone(self):
+        listing = "\\begin{minted}[]{latex}\n\\subsection{In code}\n\\end{minted}\n"
+        assert _rewrite(listing) == listing
+
+
+class TestLongListings:
+    def test_long_listing_can_break_pages(self):
+        out = _rewrite(_listing(postprocess.LONG_LISTING_LINES - 1))
+        assert out.startswith("\\begin{minted}[samepage=false]{solidity}\n")
+
+    def test_short_listing_unchanged(self):
+        listing = _listing(postprocess.LONG_LISTING_LINES - 2)
+        assert _rewrite(listing) == listing
+
+    def test_unterminated_listing_kept(self):
+        assert _rewrite("\\begin{minted}[]{text}\ncode\n") == "\\begin{minted}[]{text}\ncode\n"
+
+
+class TestRegistry:
+    def test_new_rewrites_join_the_same_pass(self, monkeypatch):
+        monkeypatch.setattr(postprocess, "LINE_REWRITES", dict(postprocess.LINE_REWRITES))
+        postprocess.register_line_rewrite("tightlist", r"\\tightlist", "")
+        assert _rewrite("\\tightlist\\subsection{A}\n") == "\\Needspace{8cm}\\subsection{A}\n"
+
+
+class TestPostprocess:
+    def test_rewrites_text(self):
+        assert postprocess.postprocess("\\textbackslash{}clearpage\n\\subsection{A}") == "\\clearpage\n\\Needspace{8cm}\\subsection{A}"
@@ -1,31 +1,17 @@
 """Smoke tests that the upgraded third-party dependencies import and behave as
-the code expects. These guard against breaking changes from dependency bumps
-(notably the PyGithub 1.x -> 2.x upgrade).
+the code expects. These guard against breaking changes from dependency bumps.
 """
 import importlib
+import os
+import subprocess
+import sys
 
 
 def test_core_libraries_import():
-    for mod in ("requests", "dateutil.parser", "dotenv", "pandocfilters", "github"):
+    for mod in ("requests", "dateutil.parser", "dotenv", "pandocfilters", "pygments"):
         importlib.import_module(mod)
 
 
-def test_pygithub_client_constructs_with_auth_token():
-    # fetch_issues builds `Github(auth=Auth.Token(...))`; ensure the
-    # non-deprecated Auth API is present and usable on the installed PyGithub.
-    from github import Auth, Github
-
-    client = Github(auth=Auth.Token("dummy-token-not-used"))
-    assert client is not None
-
-
-def test_pygithub_anonymous_client_constructs():
-    # fetch_issues falls back to an anonymous client when no token is set.
-    from github import Github
-
-    assert Github() is not None
-
-
 def test_dateutil_parse_used_by_calculate_period():
     from dateutil.parser import parse
     from datetime import datetime
@@ -35,15 +21,23 @@ def test_dateutil_parse_used_by_calculate_period():
 
 
 def test_fetch_issues_module_imports():
-    # Importing this module runs top-level code that reads source config and
-    # constructs a Github client — a good end-to-end check that the upgraded
-    # PyGithub/requests/dotenv stack still wires together.
     import scripts.fetch_issues as fetch_issues
 
     assert hasattr(fetch_issues, "fetch_issues")
     assert hasattr(fetch_issues, "extract_github_owner_repo")
 
 
+def test_imports_are_lazy():
+    # The network, date parsing and highlighting libraries are imported when first used,
+    # so steps that don't need them start fast. A fresh interpreter, as sys.modules is shared here.
+    code = ("import sys, generate_report; "
+            "print(','.join(m for m in ('requests', 'dotenv', 'dateutil.parser', 'pygments.lexers', 'pygments.formatters') "
+            "if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.join(os.path.dirname(__file__), ".."), check=True)
+    assert result.stdout.strip() == ""
+
+
 def test_extract_github_owner_repo_variants():
     from scripts.fetch_issues import extract_github_owner_repo
 
@@ -0,0 +1,60 @@
+"""Unit tests for scripts/snapshot.py — recording and replaying the data fetched from GitHub."""
+import json
+
+import pytest
+
+from scripts.snapshot import SNAPSHOT_VERSION, Snapshot, load_snapshots, save_snapshots
+
+
+def _issue(number, labels=("Severity: High Risk",), state="open"):
+    return {
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "Body",
+        "state": state,
+        "labels": list(labels),
+        "html_url": f"https://github.com/org/repo/issues/{number}",
+        "created_at": f"2025-01-01T00:00:{50 - number:02d}Z",
+        "updated_at": "2025-01-02T00:00:00Z",
+    }
+
+
+class TestSnapshot:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "snapshots" / "report.json")
+        snapshot = Snapshot("https://github.com/org/repo", [_issue(2), _issue(1)])
+        snapshot.add_column("org", 3, "Report", [1, 2])
+        save_snapshots(path, [snapshot, Snapshot("https://github.com/org/phase2", [_issue(1)])])
+
+        loaded = load_snapshots(path)
+
+        assert list(loaded) == ["https://github.com/org/repo", "https://github.com/org/phase2"]
+        loaded = loaded["https://github.com/org/repo"]
+        assert loaded.issues == {1: _issue(1), 2: _issue(2)}
+        assert loaded.issues_in_column("org", 3, "Report") == [1, 2]
+        assert loaded.recorded_at is not None
+
+    def test_unknown_version_rejected(self, tmp_path):
+        path = tmp_path / "report.json"
+        path.write_text(json.dumps({"version": SNAPSHOT_VERSION + 1, "repositories": []}))
+        with pytest.raises(ValueError, match="Unsupported snapshot version"):
+            load_snapshots(str(path))
+
+    def test_missing_column_is_empty(self):
+        assert Snapshot("r").issues_in_column("org", 3, "Report") == []
+
+
+class TestReplayFilters:
+    @pytest.fixture
+    def snapshot(self):
+        return Snapshot("r", [_issue(1), _issue(2, labels=("Phase 2",)), _issue(3, state="closed")])
+
+    def test_open_issues_oldest_first(self, snapshot):
+        assert [issue["number"] for issue in snapshot.open_issues()] == [2, 1]
+
+    def test_open_issues_by_label(self, snapshot):
+        assert [issue["number"] for issue in snapshot.open_issues("Phase 2")] == [2]
+
+    def test_issues_by_number(self, snapshot):
+        assert [issue["number"] for issue in snapshot.issues_by_number(["3", "1", "9", "x"])] == [1, 3]
+        assert snapshot.issues_by_number([1, 2], "Phase 2") == [_issue(2, labels=("Phase 2",))]
@@ -0,0 +1,55 @@
+"""Unit tests for scripts/template.py — compiling and rendering the __PLACEHOLDER__ templates."""
+import os
+
+import pytest
+
+from scripts import template
+from scripts.template import Template, UnresolvedPlaceholders, load_template
+
+
+class TestTemplate:
+    def test_placeholders(self):
+        assert Template("a __PLACEHOLDER__FOO b __PLACEHOLDER__FOO_2}").placeholders == {
+            "__PLACEHOLDER__FOO", "__PLACEHOLDER__FOO_2"}
+
+    def test_longest_placeholder_first(self):
+        rendered = Template("__PLACEHOLDER__FOO_BAR __PLACEHOLDER__FOO").render(
+            {"__PLACEHOLDER__FOO": "short", "__PLACEHOLDER__FOO_BAR": "long"})
+        assert rendered == "long short"
+
+    def test_values_are_not_rendered_again(self):
+        rendered = Template("__PLACEHOLDER__A").render({"__PLACEHOLDER__A": "__PLACEHOLDER__B", "__PLACEHOLDER__B": "x"})
+        assert rendered == "__PLACEHOLDER__B"
+
+    def test_values_converted_to_strings(self):
+        assert Template("__PLACEHOLDER__COUNT issues").render({"__PLACEHOLDER__COUNT": 3}) == "3 issues"
+
+    def test_unresolved_placeholders(self):
+        with pytest.raises(UnresolvedPlaceholders, match="__PLACEHOLDER__A, __PLACEHOLDER__B") as e:
+            Template("__PLACEHOLDER__B __PLACEHOLDER__A __PLACEHOLDER__C", "summary.tex").render({"__PLACEHOLDER__C": ""})
+        assert e.value.placeholders == ["__PLACEHOLDER__A", "__PLACEHOLDER__B"]
+
+    def test_no_placeholders(self):
+        assert Template("plain").render({}) == "plain"
+
+    def test_repository_templates_have_only_known_placeholders(self):
+        # Every placeholder of the templates is filled in by generate_report.py
+        root = os.path.join(os.path.dirname(__file__), "..")
+        with open(os.path.join(root, "generate_report.py")) as f:
+            known = set(template.PLACEHOLDER_PATTERN.findall(f.read()))
+        for name in ("title.tex", "summary.tex"):
+            assert load_template(os.path.join(root, "templates", name)).placeholders <= known
+
+
+class TestLoadTemplate:
+    def test_compiled_once_until_changed(self, tmp_path):
+        path = tmp_path / "title.tex"
+        path.write_text("__PLACEHOLDER__A")
+        first = load_template(str(path))
+        assert load_template(str(path)) is first
+
+        path.write_text("__PLACEHOLDER__A __PLACEHOLDER__B")
+        os.utime(path, ns=(0, 0))
+        changed = load_template(str(path))
+        assert changed is not first
+        assert changed.placeholders == {"__PLACEHOLDER__A", "__PLACEHOLDER__B"}
@@ -0,0 +1,115 @@
+"""Unit tests for scripts/watch.py — polling the sources of the report and debouncing the rebuilds."""
+import os
+
+from scripts import watch
+
+
+class _Clock:
+    """Time that only passes when sleeping, running a scripted edit at given times"""
+
+    def __init__(self, edits=()):
+        self.now = 0.0
+        self.edits = sorted(edits, key=lambda edit: edit[0])
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        while self.edits and self.edits[0][0] <= self.now:
+            self.edits.pop(0)[1]()
+
+
+def _write(path, text):
+    def edit():
+        with open(path, "w") as f:
+            f.write(text)
+        # Make sure the modification time changes even on coarse file systems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    return edit
+
+
+def _watch(tmp_path, edits, rebuild, **kwargs):
+    clock = _Clock(edits)
+    kwargs.setdefault("rebuilds", 1)
+    return watch.watch([str(tmp_path / "source")], rebuild, sleep=clock.sleep, clock=clock, **kwargs)
+
+
+class TestSnapshot:
+    def test_files_of_directories_and_files(self, tmp_path):
+        (tmp_path / "source" / "img").mkdir(parents=True)
+        (tmp_path / "source" / "a.md").write_text("a")
+        (tmp_path / "source" / "img" / "logo.png").write_text("png")
+        (tmp_path / "other.conf").write_text("conf")
+        result = watch.snapshot([str(tmp_path / "source"), str(tmp_path / "other.conf"), str(tmp_path / "missing")])
+        assert set(result) == {str(tmp_path / "source" / "a.md"), str(tmp_path / "source" / "img" / "logo.png"),
+                               str(tmp_path / "other.conf")}
+
+    def test_hidden_and_editor_files_ignored(self, tmp_path):
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "index").write_text("")
+        for name in [".a.md.swp", "a.md~", ".#a.md", "a.md"]:
+            (tmp_path / name).write_text("")
+        assert set(watch.snapshot([str(tmp_path)])) == {str(tmp_path / "a.md")}
+
+    def test_changed_files(self):
+        before = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        after = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        assert watch.changed_files(before, after) == {"b", "c", "d"}
+
+
+class TestWatch:
+    def test_rebuilds_with_the_changed_files(self, tmp_path):
+        (tmp_path / "source").mkdir()
+        path = str(tmp_path / "source" / "a.md")
+        _write(path, "a")()
+        rebuilt = []
+        assert _watch(tmp_path, [(1, _write(path, "b"))], rebuilt.append) == 1
+        assert rebuilt == [{path}]
+
+    def test_changes_in_quick_succession_rebuild_once(self, tmp_path):
+        (tmp_path / "source").mkdir()
+        a, b = str(tmp_path / "source" / "a.md"), str(tmp_path / "source" / "b.md")
+        rebuilt = []
+        edits = [(1, _write(a, "a")), (1.25, _write(b, "b")), (1.5, _write(a, "aa")), (10, _write(b, "bb"))]
+        _watch(tmp_path, edits, rebuilt.append, rebuilds=2)
+        assert rebuilt == [{a, b}, {b}]
+
+    def test_failed_rebuild_keeps_watching(self, tmp_path, capsys):
+        (tmp_path / "source").mkdir()
+        path = str(tmp_path / "source" / "a.md")
+        rebuilt = []
+
+        def rebuild(changed):
+            rebuilt.append(changed)
+            if len(rebuilt) == 1:
+                exit(1)
+
+        _watch(tmp_path, [(1, _write(path, "a")), (5, _write(path, "b"))], rebuild, rebuilds=2)
+        assert len(rebuilt) == 2
+        assert "Rebuild failed (SystemExit: 1)" in capsys.readouterr().out
+
+    def test_files_the_build_writes_do_not_trigger_a_rebuild(self, tmp_path):
+        (tmp_path / "source").mkdir()
+        report, other = str(tmp_path / "source" / "report.md"), str(tmp_path / "source" / "other.md")
+        _write(report, "report")()
+        rebuilt = []
+
+        def rebuild(changed):
+            rebuilt.append(changed)
+            # Like the linter rewriting report.md
+            _write(report, "linted " + str(len(rebuilt)))()
+
+        _watch(tmp_path, [(1, _write(report, "edited")), (5, _write(other, "other"))], rebuild, rebuilds=2,
+               written=[report])
+        assert rebuilt == [{report}, {other}]
+
+    def test_interrupted(self, tmp_path, capsys):
+        (tmp_path / "source").mkdir()
+
+        def interrupt():
+            raise KeyboardInterrupt
+
+        assert _watch(tmp_path, [(1, interrupt)], lambda changed: None, rebuilds=None) == 0
+        assert "Stopped watching." in capsys.readouterr().out